@@ -0,0 +1,105 @@
+"""
+Benchmark: secure channel message throughput vs plaintext framing.
+
+For each message size one message is taken through a full round trip:
+  * plain   - encode_frame() and FramedCodec.feed() on the receiving side
+  * sealed  - SecureChannel.seal() into the channel buffer, FramedCodec.feed()
+              and SecureChannel.open() on the receiving side
+
+With --socket the frames also go through a local socketpair, which adds
+the system call cost that a real connection pays for either variant.
+The overhead column is the sealed/plain time ratio.
+
+Usage:
+    python benchmarks/bench_channel.py --sizes 64 256 1024 16384 --socket
+"""
+
+import os
+import sys
+import json
+import socket
+import argparse
+
+ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from protocols.wire import FramedCodec, encode_frame
+from protocols.channel import SecureChannel
+from bench_primitives import measure, summarize
+
+
+def _pair():
+    """Two ends of a channel with matching keys"""
+    keys = [os.urandom(32) for _ in range(4)]
+    client_keys, server_keys = (keys[0], keys[1]), (keys[2], keys[3])
+    return SecureChannel(client_keys, server_keys), SecureChannel(server_keys, client_keys)
+
+
+def build_cases(size, use_socket):
+    text = "x" * size
+    data = text.encode('utf-8')
+    sender, receiver = _pair()
+    plain_codec, sealed_codec = FramedCodec(), FramedCodec()
+    ends = socket.socketpair() if use_socket else None
+
+    def transfer(codec, frame):
+        if ends is None:
+            return codec.feed(frame)
+        ends[0].sendall(frame)
+        messages = []
+        while not messages:
+            messages = codec.feed(ends[1].recv(65536))
+        return messages
+
+    def plain():
+        (message,) = transfer(plain_codec, encode_frame(text))
+        assert len(message) == size
+
+    def sealed():
+        (payload,) = transfer(sealed_codec, sender.seal(data))
+        assert len(receiver.open(payload)) == size
+
+    return {"plain": plain, "sealed": sealed}, ends
+
+
+def run(args):
+    results = []
+    for size in args.sizes:
+        cases, ends = build_cases(size, args.socket)
+        try:
+            summary = {name: summarize(measure(func, args.warmup, args.repeat, args.min_time)[0], 1)
+                       for name, func in cases.items()}
+        finally:
+            if ends:
+                for end in ends:
+                    end.close()
+        plain, sealed = summary["plain"]["median_us"], summary["sealed"]["median_us"]
+        rates = {name: 1e6 / value for name, value in (("plain", plain), ("sealed", sealed))}
+        results.append({"size": size, "socket": args.socket, **summary,
+                        "plain_msg_s": round(rates["plain"]), "sealed_msg_s": round(rates["sealed"]),
+                        "sealed_mb_s": round(rates["sealed"] * size / (1 << 20), 1),
+                        "overhead": round(sealed / plain, 2)})
+        print(f"{size:7} B  plain {rates['plain']:>10.0f} msg/s  sealed {rates['sealed']:>10.0f} msg/s  "
+              f"{rates['sealed'] * size / (1 << 20):8.1f} MB/s  x{sealed / plain:.2f}")
+    return results
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Secure channel throughput benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64, 256, 1024, 16384, 262144],
+                        help='Message sizes in bytes')
+    parser.add_argument('--socket', action='store_true', help='Send the frames through a socketpair')
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--min-time', type=float, default=0.02)
+    parser.add_argument('--json', help='Write the results to this file')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    results = run(args)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,82 @@
+"""
+Benchmark: prover arithmetic modulo n vs modulo p and q (CRT).
+
+For each modulus size a real Blum modulus is generated and the same
+operations are timed with plain key material (n only) and with
+FiatShamirKey carrying p, q:
+  * commit      - x = r^2 mod n
+  * prove_ni    - fiat_shamir_prove_noninteractive (k=16, 128-bit soundness)
+  * pow_full    - base^e mod n with a full-size exponent (the cost that
+                  dominates exponent-based provers such as Guillou-Quisquater)
+
+Fiat-Shamir itself only squares and multiplies, so only pow_full is
+expected to profit; the benchmark shows by how much.
+
+Usage:
+    python benchmarks/bench_crt.py --bits 1024 2048 4096 --json crt.json
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+
+ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fiatshamir.authentication import FiatShamirKey, generate_fiat_shamir_keys, fiat_shamir_prove_noninteractive
+from protocols.primes import generate_blum_modulus
+from bench_primitives import measure, summarize
+
+
+def build_cases(bits, k):
+    n, p, q = generate_blum_modulus(bits, workers=1)
+    s, _ = generate_fiat_shamir_keys(n, k)
+    plain = FiatShamirKey(s, n)
+    crt = FiatShamirKey(s, n, p, q)
+    r = random.randint(1, n - 1)
+    exponent = random.getrandbits(bits)
+    nonce = os.urandom(16)
+    assert plain.pow(r, exponent) == crt.pow(r, exponent)
+
+    return {
+        "commit": (lambda: plain.pow(r, 2), lambda: crt.pow(r, 2)),
+        "prove_ni": (lambda: fiat_shamir_prove_noninteractive(plain, None, nonce),
+                     lambda: fiat_shamir_prove_noninteractive(crt, None, nonce)),
+        "pow_full": (lambda: plain.pow(r, exponent), lambda: crt.pow(r, exponent)),
+    }
+
+
+def run(args):
+    results = []
+    for bits in args.bits:
+        for name, (plain, crt) in build_cases(bits, args.keys).items():
+            base = summarize(measure(plain, args.warmup, args.repeat, args.min_time)[0], 1)
+            fast = summarize(measure(crt, args.warmup, args.repeat, args.min_time)[0], 1)
+            speedup = base["median_us"] / fast["median_us"]
+            results.append({"case": name, "bits": bits, "mod_n": base, "crt": fast,
+                            "speedup": round(speedup, 2)})
+            print(f"{name:10} {bits:5}  mod n {base['median_us']:>12.1f} us  "
+                  f"crt {fast['median_us']:>12.1f} us  x{speedup:.2f}")
+    return results
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='CRT prover benchmark')
+    parser.add_argument('--bits', type=int, nargs='+', default=[1024, 2048, 3072, 4096])
+    parser.add_argument('--keys', type=int, default=16, help='k for the non-interactive proof')
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--min-time', type=float, default=0.02)
+    parser.add_argument('--json', help='Write the results to this file')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    results = run(args)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,220 @@
+"""
+Benchmark: thread-per-connection vs asyncio ZKPServer engine.
+
+Runs the server in a child process and measures from the parent:
+  * held   - how many idle connections the server keeps open and its RSS / thread count
+  * auth   - Fiat-Shamir handshakes per second with a number of concurrent provers
+
+Usage:
+    python benchmarks/bench_engines.py --engine both --connections 5000 --handshakes 2000
+"""
+
+import os
+import sys
+import time
+import json
+import random
+import asyncio
+import logging
+import argparse
+import resource
+import multiprocessing
+
+ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'server'))
+
+from protocols.wire import LegacyCodec, FramedCodec, byte_length, hello_request, parse_hello_reply
+
+
+def _raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+def _server_process(engine, host, port, ready):
+    _raise_fd_limit()
+    from server import ZKPServer
+    logging.getLogger().setLevel(logging.WARNING)
+
+    server = ZKPServer(host=host, base_port=port, num_ports=1, engine=engine)
+    server.start()
+    ready.set()
+    while True:
+        time.sleep(3600)
+
+
+def _proc_status(pid):
+    """Return (rss_kb, threads) of a process from /proc"""
+    rss = threads = None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1])
+                elif line.startswith("Threads:"):
+                    threads = int(line.split()[1])
+    except OSError:
+        pass
+    return rss, threads
+
+
+async def _hold_connections(host, port, count, server_pid, concurrency=200):
+    """Open up to `count` idle connections and sample the server while they are held"""
+    writers = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def open_one():
+        async with semaphore:
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), 10)
+                writers.append(writer)
+            except Exception:
+                pass
+
+    await asyncio.gather(*(open_one() for _ in range(count)))
+    # Give the server time to accept everything from its backlog
+    await asyncio.sleep(1.0)
+    rss, threads = _proc_status(server_pid)
+    for writer in writers:
+        writer.close()
+    return len(writers), rss, threads
+
+
+async def _receive(reader, codec, pending):
+    while not pending:
+        data = await reader.read(65536)
+        if not data:
+            raise ConnectionError("Server closed the connection")
+        pending.extend(codec.feed(data))
+    return pending.pop(0)
+
+
+async def _handshake(host, port, private_key, n, wire):
+    """One complete Fiat-Shamir handshake"""
+    reader, writer = await asyncio.open_connection(host, port)
+    codec = LegacyCodec()
+    pending = []
+    width = byte_length(n)
+    try:
+        if wire == 'framed':
+            writer.write(codec.encode(hello_request()))
+            if parse_hello_reply(await _receive(reader, codec, pending)) is None:
+                raise ConnectionError("Server refused framing")
+            codec = FramedCodec()
+
+        auth_request = {
+            "action": "auth_request",
+            "protocol": "fiat-shamir",
+            "public_key": pow(private_key, 2, n),
+            "n": n
+        }
+        writer.write(codec.encode(json.dumps(auth_request)))
+        if not codec.framed:
+            # The legacy protocol has no framing and no reply to auth_request:
+            # pause so the request and x are not merged into one recv()
+            await writer.drain()
+            await asyncio.sleep(0.005)
+
+        r = random.randint(1, n - 1)
+        writer.write(codec.encode(pow(r, 2, n), width))
+        e = int(await _receive(reader, codec, pending))
+
+        writer.write(codec.encode((r * pow(private_key, e, n)) % n, width))
+        return (await _receive(reader, codec, pending)) == "AUTH_SUCCESS"
+    finally:
+        writer.close()
+
+
+async def _run_handshakes(host, port, total, concurrency, n, wire):
+    semaphore = asyncio.Semaphore(concurrency)
+    private_key = random.randint(2, n - 1)
+    results = {"ok": 0, "failed": 0}
+
+    async def one():
+        async with semaphore:
+            try:
+                ok = await asyncio.wait_for(_handshake(host, port, private_key, n, wire), 30)
+            except Exception:
+                ok = False
+            results["ok" if ok else "failed"] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def bench_engine(engine, args):
+    ctx = multiprocessing.get_context('fork')
+    ready = ctx.Event()
+    proc = ctx.Process(target=_server_process, args=(engine, args.host, args.port, ready), daemon=True)
+    proc.start()
+    ready.wait(10)
+    time.sleep(0.2)
+
+    report = {"engine": engine}
+    try:
+        base_rss, base_threads = _proc_status(proc.pid)
+        opened, rss, threads = asyncio.run(
+            _hold_connections(args.host, args.port, args.connections, proc.pid))
+        report["held"] = {
+            "requested": args.connections,
+            "opened": opened,
+            "server_rss_kb": rss,
+            "server_rss_per_conn_kb": round((rss - base_rss) / max(opened, 1), 2) if rss and base_rss else None,
+            "server_threads": threads,
+            "server_threads_idle": base_threads,
+        }
+        time.sleep(1.0)
+
+        results, elapsed = asyncio.run(
+            _run_handshakes(args.host, args.port, args.handshakes, args.concurrency, args.modulus, args.wire))
+        report["auth"] = {
+            "handshakes": args.handshakes,
+            "concurrency": args.concurrency,
+            "wire": args.wire,
+            "ok": results["ok"],
+            "failed": results["failed"],
+            "seconds": round(elapsed, 3),
+            "handshakes_per_sec": round(results["ok"] / elapsed, 1) if elapsed else None,
+        }
+    finally:
+        proc.terminate()
+        proc.join()
+    return report
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='ZKPServer engine benchmark')
+    parser.add_argument('--engine', choices=['threads', 'asyncio', 'both'], default='both')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--connections', type=int, default=2000, help='Idle connections to hold')
+    parser.add_argument('--handshakes', type=int, default=1000, help='Total handshakes to run')
+    parser.add_argument('--concurrency', type=int, default=100, help='Concurrent provers')
+    parser.add_argument('--modulus', type=int, default=1223, help='Modulus n')
+    parser.add_argument('--wire', choices=['framed', 'legacy'], default='framed', help='Wire protocol')
+    parser.add_argument('--json', help='Write the report to this file')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    fd_limit = _raise_fd_limit()
+    if args.connections + 100 > fd_limit:
+        print(f"Warning: fd limit {fd_limit} is below the requested connection count")
+
+    engines = ['threads', 'asyncio'] if args.engine == 'both' else [args.engine]
+    reports = []
+    for engine in engines:
+        report = bench_engine(engine, args)
+        reports.append(report)
+        print(json.dumps(report, indent=2))
+        args.port += 1
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
@@ -0,0 +1,88 @@
+"""
+Benchmark: file encryption throughput vs number of worker processes.
+
+A random file of --size MB is encrypted with encrypt_file() for each
+worker count; the output of every run is checked to be identical to the
+single-process run (the nonce is fixed for the benchmark). Decryption is
+timed with the same worker counts. Speedup is relative to workers=1 and
+can only approach the worker count with that many idle cores.
+
+Usage:
+    python benchmarks/bench_file_crypto.py --size 512 --workers 1 2 4 8
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import tempfile
+
+ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'server'))
+
+import file_crypto
+from file_crypto import encrypt_file, decrypt_file, DEFAULT_CHUNK_SIZE
+
+
+def _digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def run(args):
+    key = os.urandom(32)
+    nonce = os.urandom(16)
+    results = []
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        plain = os.path.join(tmp, 'plain.bin')
+        with open(plain, 'wb') as f:
+            for _ in range(args.size):
+                f.write(os.urandom(1 << 20))
+
+        reference = None
+        base = None
+        for workers in args.workers:
+            encrypted = os.path.join(tmp, f'enc{workers}.bin')
+            decrypted = os.path.join(tmp, f'dec{workers}.bin')
+            # Одинаковый nonce во всех прогонах, чтобы сравнить шифртексты
+            urandom, file_crypto.os.urandom = os.urandom, lambda size: nonce[:size]
+            try:
+                enc = encrypt_file(plain, encrypted, key, args.chunk << 10, workers=workers)
+            finally:
+                file_crypto.os.urandom = urandom
+            dec = decrypt_file(encrypted, decrypted, key, workers=workers)
+            digest = _digest(encrypted)
+            reference = reference or digest
+            base = base or enc.mb_per_s
+            identical = digest == reference and _digest(decrypted) == _digest(plain)
+            results.append({"workers": workers, "encrypt_mb_s": round(enc.mb_per_s, 1),
+                            "decrypt_mb_s": round(dec.mb_per_s, 1),
+                            "speedup": round(enc.mb_per_s / base, 2), "identical": identical})
+            print(f"workers {workers:3}  encrypt {enc.mb_per_s:8.1f} MB/s  decrypt {dec.mb_per_s:8.1f} MB/s  "
+                  f"x{enc.mb_per_s / base:.2f}  {'identical' if identical else 'MISMATCH'}")
+            os.remove(encrypted)
+            os.remove(decrypted)
+    return results
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='File encryption scaling benchmark')
+    parser.add_argument('--size', type=int, default=256, help='File size in MB')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--chunk', type=int, default=DEFAULT_CHUNK_SIZE >> 10, help='Chunk size in KB')
+    parser.add_argument('--dir', default=None, help='Directory for the temporary files')
+    parser.add_argument('--json', help='Write the results to this file')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    results = run(args)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
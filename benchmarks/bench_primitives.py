@@ -0,0 +1,211 @@
+"""
+Microbenchmarks of the modular arithmetic on the authentication hot path.
+
+Cases (per modulus size):
+  * keygen            - generate_fiat_shamir_keys(n)
+  * keygen_ffs        - generate_fiat_shamir_keys(n, k)
+  * prove_commit      - x = r^2 mod n
+  * prove_response    - y = r * s^e mod n (as in fiat_shamir_authenticate)
+  * prove_ni          - fiat_shamir_prove_noninteractive, 128-bit soundness
+  * verify            - fiat_shamir_verify, basic mode
+  * verify_ffs        - fiat_shamir_verify with k keys
+  * verify_ni         - fiat_shamir_verify_noninteractive
+  * multi_pow         - multi_pow over k bases with 64-bit exponents
+
+Every case is calibrated so one sample takes at least --min-time seconds,
+run for --warmup discarded samples and --repeat measured samples, and
+summarised as time per operation.
+
+--save stores the results as a baseline; --compare checks the current run
+against one and exits with status 1 if any median got slower by more than
+--threshold.
+
+Usage:
+    python benchmarks/bench_primitives.py --bits 1223 1024 2048 --save baseline.json
+    python benchmarks/bench_primitives.py --compare baseline.json --threshold 0.10
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+
+ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'server'))
+
+from fiatshamir.authentication import generate_fiat_shamir_keys, fiat_shamir_prove_noninteractive
+from serverAuth import fiat_shamir_verify, fiat_shamir_verify_noninteractive
+from protocols.modmath import multi_pow
+from protocols.transcript import decode_proof
+
+DEFAULT_BITS = [1223, 1024, 2048, 3072, 4096]
+
+
+def bench_modulus(size):
+    """
+    Modulus for a benchmark size.
+
+    1223 is the literal toy modulus used by the UI; other values are bit
+    lengths of a fixed odd number (the cost of the arithmetic depends only
+    on the size of n).
+    """
+    if size == 1223:
+        return 1223
+    rng = random.Random(size)
+    return rng.getrandbits(size) | (1 << (size - 1)) | 1
+
+
+def _transcript(n, s, e, keys=None):
+    """Valid (x, y, public_key, n, e) transcript for private key(s) s"""
+    r = random.randint(1, n - 1)
+    x = pow(r, 2, n)
+    if keys is None:
+        return x, (r * pow(s, e, n)) % n, pow(s, 2, n), n, e
+    y = r
+    for j, sj in enumerate(s):
+        if (e >> j) & 1:
+            y = (y * sj) % n
+    return x, y, keys, n, e
+
+
+def build_cases(n, k):
+    """Map case name -> (callable, items per call)"""
+    s, v = generate_fiat_shamir_keys(n)
+    s_vec, v_vec = generate_fiat_shamir_keys(n, k)
+    r = random.randint(1, n - 1)
+    x, y, _, _, _ = _transcript(n, s, 1)
+    ffs = _transcript(n, s_vec, random.getrandbits(k) | 1, v_vec)
+    nonce = os.urandom(16)
+    proof = decode_proof(fiat_shamir_prove_noninteractive(s_vec, n, nonce, "bench"))
+    exponents = [random.getrandbits(64) for _ in range(k)]
+
+    return {
+        "keygen": (lambda: generate_fiat_shamir_keys(n), 1),
+        "keygen_ffs": (lambda: generate_fiat_shamir_keys(n, k), 1),
+        "prove_commit": (lambda: pow(r, 2, n), 1),
+        "prove_response": (lambda: (r * pow(s, 1, n)) % n, 1),
+        "prove_ni": (lambda: fiat_shamir_prove_noninteractive(s_vec, n, nonce, "bench"), 1),
+        "verify": (lambda: fiat_shamir_verify(x, y, v, n, 1), 1),
+        "verify_ffs": (lambda: fiat_shamir_verify(*ffs), 1),
+        "verify_ni": (lambda: fiat_shamir_verify_noninteractive(
+            proof[0], proof[1], v_vec, n, nonce, "bench"), 1),
+        "multi_pow": (lambda: multi_pow(v_vec, exponents, n), 1),
+    }
+
+
+def measure(func, warmup, repeat, min_time):
+    """Per-call times (seconds) of `repeat` calibrated samples"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    samples = []
+    for i in range(warmup + repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if i >= warmup:
+            samples.append((time.perf_counter() - start) / loops)
+    return samples, loops
+
+
+def summarize(samples, items):
+    ordered = sorted(samples)
+    us = lambda value: round(value * 1e6, 3)
+    summary = {
+        "median_us": us(statistics.median(ordered)),
+        "mean_us": us(statistics.fmean(ordered)),
+        "stdev_us": us(statistics.stdev(ordered)) if len(ordered) > 1 else 0.0,
+        "min_us": us(ordered[0]),
+        "max_us": us(ordered[-1]),
+        "p95_us": us(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]),
+    }
+    if items > 1:
+        summary["items"] = items
+        summary["median_per_item_us"] = us(statistics.median(ordered) / items)
+    return summary
+
+
+def run(args):
+    results = {}
+    for size in args.bits:
+        n = bench_modulus(size)
+        cases = build_cases(n, args.keys)
+        for name, (func, items) in cases.items():
+            if args.cases and name not in args.cases:
+                continue
+            samples, loops = measure(func, args.warmup, args.repeat, args.min_time)
+            summary = summarize(samples, items)
+            summary["loops"] = loops
+            key = f"{name}@{size}"
+            results[key] = summary
+            print(f"{key:24} median {summary['median_us']:>12.3f} us  "
+                  f"stdev {summary['stdev_us']:>10.3f} us  min {summary['min_us']:>12.3f} us")
+    return {
+        "tool": "bench_primitives",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "keys": args.keys,
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """Print the change of each median against a baseline; returns the regressions"""
+    regressions = []
+    print(f"\n{'case':24} {'baseline us':>14} {'current us':>14} {'change':>9}")
+    for key, current in report["results"].items():
+        previous = baseline.get("results", {}).get(key)
+        if previous is None:
+            print(f"{key:24} {'-':>14} {current['median_us']:>14.3f} {'new':>9}")
+            continue
+        change = (current["median_us"] - previous["median_us"]) / previous["median_us"]
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:24} {previous['median_us']:>14.3f} {current['median_us']:>14.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Fiat-Shamir primitive microbenchmarks')
+    parser.add_argument('--bits', type=int, nargs='+', default=DEFAULT_BITS,
+                        help='Modulus sizes in bits (1223 - the literal toy modulus)')
+    parser.add_argument('--cases', nargs='+', default=None, help='Only run these cases')
+    parser.add_argument('--keys', type=int, default=16, help='k for the Feige-Fiat-Shamir cases')
+    parser.add_argument('--warmup', type=int, default=3, help='Discarded samples per case')
+    parser.add_argument('--repeat', type=int, default=15, help='Measured samples per case')
+    parser.add_argument('--min-time', type=float, default=0.02, help='Minimum seconds per sample')
+    parser.add_argument('--save', help='Write the results to this baseline file')
+    parser.add_argument('--compare', help='Compare against this baseline file')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative median slowdown reported as a regression (default: 0.10)')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    report = run(args)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
@@ -0,0 +1,290 @@
+"""
+Load generator: end-to-end Fiat-Shamir authentication throughput.
+
+Simulated provers (asyncio coroutines speaking the wire protocol directly)
+run complete handshakes against a ZKPServer in a closed loop: each prover
+starts its next handshake as soon as the previous one finishes. Provers
+are started gradually over --ramp seconds. The server runs in-process, in
+a child process (optionally as a prefork pool) or is an external server.
+
+Reports handshakes/sec, latency percentiles and failures per modulus size,
+and writes the results as JSON so that runs can be compared. Each size
+uses a real Blum modulus from generate_blum_modulus(); --prime-pool takes
+the primes from a PrimePool filled in advance, so large sizes do not
+spend the run generating primes.
+
+Usage:
+    python benchmarks/loadgen.py --server subprocess --bits 1024 2048 --provers 50 --duration 10
+    python benchmarks/loadgen.py --server external --port 8000 --keys 8 --rounds 4 --json run.json
+    python benchmarks/loadgen.py --bits 4096 --prime-pool primes.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import logging
+import argparse
+import platform
+import multiprocessing
+
+ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'server'))
+
+from protocols.wire import LegacyCodec, FramedCodec, byte_length, hello_request, parse_hello_reply
+from protocols.primes import generate_blum_modulus
+from fiatshamir.authentication import generate_fiat_shamir_keys
+
+
+class HandshakeFailed(Exception):
+    """The server answered AUTH_FAILED or an unexpected message"""
+
+
+def load_modulus(bits, pool=None):
+    """Blum modulus n = p*q of `bits` bits, as a real identity would use"""
+    n, _, _ = generate_blum_modulus(bits, pool=pool)
+    return n
+
+
+def make_keys(n, k):
+    """Private key(s) s and public key(s) v = s^2 mod n; k=None - basic mode"""
+    return generate_fiat_shamir_keys(n, k)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def _receive(reader, codec, pending):
+    while not pending:
+        data = await reader.read(65536)
+        if not data:
+            raise ConnectionError("Server closed the connection")
+        pending.extend(codec.feed(data))
+    return pending.pop(0)
+
+
+async def handshake(host, port, private_key, public_key, n, rounds, wire):
+    """One complete (Feige-)Fiat-Shamir handshake over a fresh connection"""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    codec = LegacyCodec()
+    pending = []
+    width = byte_length(n)
+    vector = isinstance(private_key, list)
+    try:
+        if wire == 'framed':
+            writer.write(codec.encode(hello_request()))
+            if parse_hello_reply(await _receive(reader, codec, pending)) is None:
+                raise ConnectionError("Server refused framing")
+            codec = FramedCodec()
+
+        auth_request = {"action": "auth_request", "protocol": "fiat-shamir", "n": n}
+        if vector:
+            auth_request.update(public_keys=public_key, rounds=rounds)
+        else:
+            auth_request["public_key"] = public_key
+        writer.write(codec.encode(json.dumps(auth_request)))
+        if not codec.framed:
+            # Without framing the request and x must not arrive in one recv()
+            await writer.drain()
+            await asyncio.sleep(0.005)
+
+        for _ in range(rounds if vector else 1):
+            r = random.randint(1, n - 1)
+            writer.write(codec.encode(pow(r, 2, n), width))
+            e = await _receive(reader, codec, pending)
+            if e == "AUTH_FAILED":
+                raise HandshakeFailed("rejected before the challenge")
+            e = int(e)
+            y = r
+            if vector:
+                for j, s in enumerate(private_key):
+                    if (e >> j) & 1:
+                        y = (y * s) % n
+            elif e:
+                y = (y * private_key) % n
+            writer.write(codec.encode(y, width))
+
+        result = await _receive(reader, codec, pending)
+        if result != "AUTH_SUCCESS":
+            raise HandshakeFailed(result)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, n, args):
+    """Run the provers for one modulus; returns the raw latencies and failures"""
+    private_key, public_key = make_keys(n, args.keys)
+    latencies = []
+    failures = {}
+    started = time.perf_counter()
+    deadline = started + args.duration if args.duration else None
+    budget = [args.handshakes]  # Оставшиеся рукопожатия при фиксированном объёме
+
+    def take():
+        if deadline is not None:
+            return time.perf_counter() < deadline
+        if budget[0] <= 0:
+            return False
+        budget[0] -= 1
+        return True
+
+    async def prover(index):
+        await asyncio.sleep(args.ramp * index / args.provers)
+        while take():
+            t0 = time.perf_counter()
+            try:
+                await asyncio.wait_for(
+                    handshake(host, port, private_key, public_key, n, args.rounds, args.wire),
+                    args.timeout)
+                latencies.append(time.perf_counter() - t0)
+            except asyncio.TimeoutError:
+                failures["timeout"] = failures.get("timeout", 0) + 1
+            except HandshakeFailed:
+                failures["auth_failed"] = failures.get("auth_failed", 0) + 1
+            except OSError as e:
+                kind = "refused" if isinstance(e, ConnectionRefusedError) else "connection"
+                failures[kind] = failures.get(kind, 0) + 1
+
+    await asyncio.gather(*(prover(i) for i in range(args.provers)))
+    return latencies, failures, time.perf_counter() - started
+
+
+def summarize(bits, latencies, failures, elapsed, args):
+    ordered = sorted(latencies)
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        "modulus_bits": bits,
+        "keys": args.keys,
+        "rounds": args.rounds if args.keys else 1,
+        "provers": args.provers,
+        "ok": len(ordered),
+        "failed": sum(failures.values()),
+        "failures": failures,
+        "seconds": round(elapsed, 3),
+        "handshakes_per_sec": round(len(ordered) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "mean": ms(sum(ordered) / len(ordered)) if ordered else None,
+            "p50": ms(percentile(ordered, 0.50)),
+            "p95": ms(percentile(ordered, 0.95)),
+            "p99": ms(percentile(ordered, 0.99)),
+            "max": ms(ordered[-1]) if ordered else None,
+        },
+    }
+
+
+def _serve(host, port, engine, workers, ready=None):
+    """Start a ZKPServer (or a prefork pool) and return it"""
+    logging.getLogger().setLevel(logging.WARNING)
+    if workers > 1:
+        from prefork import PreforkServer
+        server = PreforkServer(host=host, port=port, workers=workers, engine=engine)
+    else:
+        from server import ZKPServer
+        server = ZKPServer(host=host, base_port=port, num_ports=1, engine=engine)
+    server.start()
+    if ready is not None:
+        ready.set()
+    return server
+
+
+def _server_process(host, port, engine, workers, ready):
+    server = _serve(host, port, engine, workers, ready)
+    try:
+        while True:
+            time.sleep(3600)
+    finally:
+        server.stop()
+
+
+def _wait_for_port(host, port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), 0.5).close()
+            return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def run(args):
+    server = process = None
+    if args.server == 'inprocess':
+        server = _serve(args.host, args.port, args.engine, 1)
+    elif args.server == 'subprocess':
+        ctx = multiprocessing.get_context('fork')
+        ready = ctx.Event()
+        process = ctx.Process(target=_server_process,
+                              args=(args.host, args.port, args.engine, args.workers, ready), daemon=True)
+        process.start()
+        ready.wait(10)
+    if not _wait_for_port(args.host, args.port):
+        raise SystemExit(f"Server on {args.host}:{args.port} is not reachable")
+
+    report = {
+        "tool": "loadgen",
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "server": {"mode": args.server, "engine": args.engine,
+                   "workers": args.workers if args.server == 'subprocess' else 1},
+        "wire": args.wire,
+        "results": [],
+    }
+    try:
+        for bits in args.bits:
+            n = load_modulus(bits, args.prime_pool)
+            latencies, failures, elapsed = asyncio.run(run_load(args.host, args.port, n, args))
+            result = summarize(bits, latencies, failures, elapsed, args)
+            report["results"].append(result)
+            print(json.dumps(result, indent=2))
+    finally:
+        if server is not None:
+            server.stop()
+        if process is not None:
+            process.terminate()
+            process.join()
+    return report
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='ZKPServer authentication load generator')
+    parser.add_argument('--server', choices=['inprocess', 'subprocess', 'external'], default='subprocess',
+                        help='Where the server runs (default: subprocess)')
+    parser.add_argument('--engine', choices=['threads', 'asyncio'], default='asyncio')
+    parser.add_argument('--workers', type=int, default=1, help='Prefork workers (subprocess mode)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8650)
+    parser.add_argument('--bits', type=int, nargs='+', default=[1024, 2048], help='Modulus sizes in bits')
+    parser.add_argument('--prime-pool', default=None,
+                        help='PrimePool file to take the Blum primes from (see protocols/primes.py)')
+    parser.add_argument('--keys', type=int, default=None, help='Feige-Fiat-Shamir keys k (default: basic mode)')
+    parser.add_argument('--rounds', type=int, default=1, help='Feige-Fiat-Shamir rounds t')
+    parser.add_argument('--provers', type=int, default=50, help='Concurrent provers')
+    parser.add_argument('--ramp', type=float, default=1.0, help='Seconds over which provers are started')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per modulus size (0 - use --handshakes)')
+    parser.add_argument('--handshakes', type=int, default=1000, help='Handshakes per modulus size when --duration is 0')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-handshake timeout')
+    parser.add_argument('--wire', choices=['framed', 'legacy'], default='framed')
+    parser.add_argument('--label', default=None, help='Free-form label stored in the report')
+    parser.add_argument('--json', help='Write the report to this file')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    report = run(args)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,483 @@
+"""
+asyncio client for the ZKP server.
+
+The same handshakes as client.py (Fiat-Shamir, Feige-Fiat-Shamir, the
+non-interactive mode, Guillou-Quisquater and Schnorr), but all network
+I/O is non-blocking, so one event loop can run thousands of handshakes
+at once. The prover arithmetic comes from the protocol modules; with an
+executor it runs there instead of on the event loop. Python's pow()
+holds the GIL, so a ProcessPoolExecutor gives real parallelism and a
+ThreadPoolExecutor only keeps the loop responsive.
+
+    async with AsyncZKPClient('localhost', 8000, num_ports=3) as client:
+        ok = await client.authenticate('fiat-shamir', private_key=key)
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import random
+import socket
+import sys
+import os
+import time
+from collections import deque
+from typing import Optional
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from fiatshamir.authentication import (fiat_shamir_prover_commit, fiat_shamir_prover_respond,
+                                       fiat_shamir_prove_noninteractive, fiat_shamir_public_key,
+                                       FiatShamirKey)
+from guillouquisquater.authentication import gq_prover_commit, gq_prover_respond, GQKey
+from schnorr.authentication import (schnorr_prover_commit, schnorr_prover_respond,
+                                    SCHNORR_CHALLENGE_BITS, DEFAULT_GROUP)
+from protocols.wire import (LegacyCodec, FramedCodec, ProtocolError, byte_length,
+                            hello_request, parse_hello_reply)
+
+logger = logging.getLogger('ZKP-Client-Async')
+
+
+class AsyncZKPConnection:
+    """One non-blocking connection to the server, used by one task at a time"""
+
+    def __init__(self, host: str = 'localhost', port: int = 8000, executor=None):
+        """
+        Args:
+            host: Server host
+            port: Server port
+            executor: concurrent.futures executor for the prover arithmetic
+                (None - compute on the event loop)
+        """
+        self.host = host
+        self.port = port
+        self.executor = executor
+        self.codec = LegacyCodec()
+        self.nonce = None  # Одноразовый nonce сервера для неинтерактивного режима
+        self.ticket = None  # Последний билет возобновления, переживает close()
+        self.broken = False
+        self.last_used = time.monotonic()
+        self._reader = None
+        self._writer = None
+        self._pending = deque()
+
+    @property
+    def connected(self):
+        return self._writer is not None
+
+    async def connect(self, wire='auto', timeout=None):
+        """
+        Connect to the server
+
+        Args:
+            wire (str): 'auto' to negotiate the framed protocol, 'legacy' to skip it
+            timeout (float): Connect timeout in seconds
+
+        Returns:
+            bool: True on success
+        """
+        await self.close()
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            logger.error(f"Failed to connect to server at {self.host}:{self.port}: {e!r}")
+            return False
+        # asyncio включает TCP_NODELAY сам; keep-alive - нет
+        sock = self._writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+        if wire == 'auto':
+            await self.send(hello_request())
+            reply = await self.receive(timeout=5)
+            version = parse_hello_reply(reply) if reply is not None else None
+            if version is not None:
+                self.codec = FramedCodec()
+                self.nonce = json.loads(reply).get("nonce")
+        self.last_used = time.monotonic()
+        return not self.broken
+
+    async def send(self, message, width=None):
+        """Send a message (str, int or list of ints); False on error"""
+        if self._writer is None:
+            logger.error("Not connected to server")
+            return False
+        try:
+            self._writer.write(self.codec.encode(message, width))
+            await self._writer.drain()
+            return True
+        except (OSError, ConnectionError) as e:
+            logger.error(f"Error sending message: {e!r}")
+            self.broken = True
+            return False
+
+    async def receive(self, timeout=30):
+        """
+        Receive the next message
+
+        Returns:
+            str or int or list: Message, or None on timeout/disconnect
+        """
+        if self._reader is None:
+            logger.error("Not connected to server")
+            return None
+        try:
+            while not self._pending:
+                data = await asyncio.wait_for(self._reader.read(65536), timeout)
+                if not data:
+                    logger.warning("No data received from server")
+                    self.broken = True
+                    return None
+                self._pending.extend(self.codec.feed(data))
+        except asyncio.TimeoutError:
+            logger.error("Timeout waiting for server response")
+            return None
+        except (ProtocolError, UnicodeDecodeError, OSError, ConnectionError) as e:
+            logger.error(f"Error receiving message: {e!r}")
+            self.broken = True
+            return None
+        self.last_used = time.monotonic()
+        return self._pending.popleft()
+
+    def is_alive(self):
+        """Idle connection not closed by the server and with nothing unread"""
+        return (self._writer is not None and not self.broken and not self._pending
+                and not self._reader.at_eof() and not self._writer.is_closing())
+
+    async def take_nonce(self):
+        """Return the server nonce, requesting a new one if none is available"""
+        nonce, self.nonce = self.nonce, None
+        if nonce:
+            return nonce
+        await self.send(json.dumps({"action": "nonce_request"}))
+        reply = await self.receive()
+        try:
+            return json.loads(reply)["nonce"]
+        except (json.JSONDecodeError, TypeError, KeyError):
+            logger.error(f"Server did not issue a nonce: {reply}")
+            return None
+
+    async def receive_ticket(self):
+        """Read the resumption ticket the server sends after AUTH_SUCCESS"""
+        reply = await self.receive()
+        try:
+            message = json.loads(reply)
+            if message.get("action") == "ticket":
+                self.ticket = {"ticket": message["ticket"], "expires": message["expires"]}
+                return self.ticket
+        except (TypeError, ValueError, KeyError, AttributeError):
+            pass
+        logger.error(f"Server did not issue a ticket: {reply}")
+        return None
+
+    async def close(self):
+        """Close the connection"""
+        writer, self._writer, self._reader = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, ConnectionError):
+                pass
+        self.codec = LegacyCodec()
+        self.nonce = None
+        self.broken = False
+        self._pending.clear()
+
+    async def _compute(self, func, *args):
+        """Prover arithmetic, on the executor if one is set"""
+        if self.executor is None:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args))
+
+    async def _run_rounds(self, rounds, commit, respond, width, challenge_limit):
+        """
+        Interactive rounds: send commit(), read a challenge below
+        challenge_limit, send respond(r, e); then read the result
+        """
+        for round_no in range(rounds):
+            r, commitment = await self._compute(*commit)
+            if not await self.send(commitment, width=width):
+                return False
+            challenge = await self.receive()
+            if challenge is None or challenge == "":
+                logger.error("Failed to receive challenge from server")
+                return False
+            if challenge == "AUTH_FAILED":
+                logger.warning(f"Authentication failed in round {round_no}")
+                return False
+            try:
+                e = int(challenge)
+            except (ValueError, TypeError):
+                logger.error(f"Received invalid challenge: {challenge}")
+                return False
+            if not 0 <= e < challenge_limit:
+                logger.error(f"Challenge out of range: {e}")
+                return False
+            response = await self._compute(*respond, r, e)
+            if not await self.send(response, width=width):
+                return False
+
+        result = await self.receive()
+        if result == "AUTH_SUCCESS":
+            return True
+        logger.warning(f"Authentication failed: {result}")
+        return False
+
+    async def authenticate(self, protocol='fiat-shamir', **kwargs):
+        """
+        Run one handshake on this connection
+
+        Takes the keyword arguments of client.start_authentication()
+        (private_key, n, rounds, mode, context, key_id, precompute for
+        Fiat-Shamir; key for Guillou-Quisquater; private_key, group for
+        Schnorr; want_ticket).
+
+        Returns:
+            bool: True if the server accepted the proof
+        """
+        if not self.connected:
+            logger.error("Not connected to server")
+            return False
+        if kwargs.get('want_ticket') and not self.codec.framed:
+            logger.warning("Resumption tickets need the framed wire protocol, not requesting one")
+            kwargs['want_ticket'] = False
+        result = await self._handshake(protocol.lower(), **kwargs)
+        if result and kwargs.get('want_ticket'):
+            await self.receive_ticket()
+        return result
+
+    async def resume(self, ticket=None, renew=False):
+        """
+        Authenticate with a resumption ticket (default: self.ticket)
+        instead of a full handshake; see client.resume_authentication()
+        """
+        ticket = ticket or self.ticket
+        if isinstance(ticket, dict):
+            ticket = ticket.get("ticket")
+        if not self.connected or not ticket:
+            logger.error("Not connected to server or no resumption ticket")
+            return False
+        if renew and not self.codec.framed:
+            logger.warning("Resumption tickets need the framed wire protocol, not renewing")
+            renew = False
+        request = {"action": "resume", "ticket": ticket}
+        if renew:
+            request["want_ticket"] = True
+        await self.send(json.dumps(request))
+        result = await self.receive()
+        if result != "AUTH_SUCCESS":
+            logger.warning(f"Session resumption failed: {result}")
+            return False
+        if renew:
+            await self.receive_ticket()
+        return True
+
+    async def _handshake(self, protocol, **kwargs):
+        """Send the auth_request and run the handshake of the chosen protocol"""
+        rounds = kwargs.get('rounds', 1)
+        key_id = kwargs.get('key_id')
+
+        if protocol == 'fiat-shamir':
+            private_key = kwargs.get('private_key')
+            n = private_key.n if isinstance(private_key, FiatShamirKey) else kwargs.get('n')
+            precompute = kwargs.get('precompute', False)
+            if not private_key or not n:
+                logger.error("Missing required parameters for Fiat-Shamir protocol")
+                return False
+            public_key = fiat_shamir_public_key(private_key, n)
+            request = {"action": "auth_request", "protocol": "fiat-shamir", "n": n}
+            request["public_keys" if isinstance(public_key, list) else "public_key"] = public_key
+
+            if kwargs.get('mode') == 'non-interactive' and not self.codec.framed:
+                # Доказательство не помещается в одно сообщение без кадрирования
+                logger.warning("Non-interactive mode needs the framed wire protocol, falling back to interactive")
+            elif kwargs.get('mode') == 'non-interactive':
+                nonce = await self.take_nonce()
+                if not nonce:
+                    return False
+                context = kwargs.get('context', 'login')
+                proof = await self._compute(fiat_shamir_prove_noninteractive, private_key, n,
+                                            bytes.fromhex(nonce), context, None, precompute)
+                request.update(mode="non-interactive", nonce=nonce, context=context, **proof)
+                if key_id:
+                    request["key_id"] = key_id
+                if kwargs.get('want_ticket'):
+                    request["want_ticket"] = True
+                await self.send(json.dumps(request))
+                return await self.receive() == "AUTH_SUCCESS"
+
+            if isinstance(public_key, list) or rounds != 1:
+                request["rounds"] = rounds
+            if key_id:
+                request["key_id"] = key_id
+            if kwargs.get('want_ticket'):
+                request["want_ticket"] = True
+            await self.send(json.dumps(request))
+            # Вызов: бит для одного ключа, k-битная маска для вектора ключей
+            k = len(public_key) if isinstance(public_key, list) else 1
+            return await self._run_rounds(
+                rounds, (fiat_shamir_prover_commit, private_key, n, precompute),
+                (fiat_shamir_prover_respond, private_key, n), byte_length(n), 1 << k)
+
+        if protocol == 'guillou-quisquater':
+            key = kwargs.get('key')
+            if not isinstance(key, GQKey):
+                logger.error("Missing GQKey for Guillou-Quisquater protocol")
+                return False
+            request = {"action": "auth_request", "protocol": "guillou-quisquater",
+                       "n": key.n, "public_key": key.public_key, "v": key.v}
+            if rounds != 1:
+                request["rounds"] = rounds
+            if key_id:
+                request["key_id"] = key_id
+            if kwargs.get('want_ticket'):
+                request["want_ticket"] = True
+            await self.send(json.dumps(request))
+            return await self._run_rounds(
+                rounds, (gq_prover_commit, key, kwargs.get('precompute', False)),
+                (gq_prover_respond, key), byte_length(key.n), key.v)
+
+        if protocol == 'schnorr':
+            private_key = kwargs.get('private_key')
+            group = kwargs.get('group') or DEFAULT_GROUP
+            if not private_key:
+                logger.error("Missing private key for Schnorr protocol")
+                return False
+            request = {"action": "auth_request", "protocol": "schnorr", "n": group.p,
+                       "public_key": await self._compute(group.g_pow, private_key)}
+            if rounds != 1:
+                request["rounds"] = rounds
+            if key_id:
+                request["key_id"] = key_id
+            if kwargs.get('want_ticket'):
+                request["want_ticket"] = True
+            await self.send(json.dumps(request))
+            # partial, а не lambda: должно передаваться в ProcessPoolExecutor
+            respond = functools.partial(schnorr_prover_respond, group=group)
+            return await self._run_rounds(
+                rounds, (schnorr_prover_commit, group), (respond, private_key),
+                byte_length(group.p), 1 << SCHNORR_CHALLENGE_BITS)
+
+        logger.error(f"Unsupported protocol: {protocol}")
+        return False
+
+
+class AsyncZKPClient:
+    """
+    asyncio counterpart of client.ZKPClient: a bounded pool of connections
+    spread over the server's ports, reconnect with backoff, and reuse of a
+    connection only after a successful handshake.
+    """
+
+    def __init__(self, host: str = 'localhost', base_port: int = 8000, num_ports: int = 1,
+                 max_connections: int = 1000, wire: str = 'auto', executor=None,
+                 idle_timeout: Optional[float] = 60.0, connect_timeout: float = 5.0,
+                 retries: int = 5, backoff: float = 0.1, max_backoff: float = 5.0):
+        """
+        Args:
+            host: Server host
+            base_port: First server port
+            num_ports: Number of consecutive server ports
+            max_connections: Upper bound on open connections; also the
+                number of handshakes in flight
+            wire: Wire protocol for new connections ('auto' or 'legacy')
+            executor: Executor for the prover arithmetic (None - on the loop)
+            idle_timeout: Idle connections older than this are not reused
+            connect_timeout: Timeout of a single connect attempt
+            retries: Connect attempts before giving up
+            backoff: Delay before the first retry, doubled after each failure
+            max_backoff: Upper bound on the retry delay
+        """
+        self.host = host
+        self.ports = [base_port + offset for offset in range(num_ports)]
+        self.wire = wire
+        self.executor = executor
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._idle = deque()
+        self._slots = asyncio.BoundedSemaphore(max_connections)
+        self._next_port = 0
+        self._closed = False
+
+    async def _open(self):
+        delay = self.backoff
+        for attempt in range(self.retries):
+            port = self.ports[self._next_port % len(self.ports)]
+            self._next_port += 1
+            connection = AsyncZKPConnection(self.host, port, self.executor)
+            if await connection.connect(self.wire, self.connect_timeout):
+                return connection
+            await connection.close()
+            if attempt + 1 < self.retries:
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+                delay = min(delay * 2, self.max_backoff)
+        raise ConnectionError(f"Could not connect to {self.host} ports {self.ports} "
+                              f"after {self.retries} attempts")
+
+    async def acquire(self):
+        """Check out an idle connection or open a new one"""
+        if self._closed:
+            raise RuntimeError("AsyncZKPClient is closed")
+        await self._slots.acquire()
+        try:
+            now = time.monotonic()
+            while self._idle:
+                connection = self._idle.pop()
+                expired = self.idle_timeout is not None and now - connection.last_used > self.idle_timeout
+                if not expired and connection.is_alive():
+                    return connection
+                await connection.close()
+            return await self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, connection, reuse=True):
+        """Return a connection; reuse=False closes it"""
+        try:
+            if reuse and not self._closed and connection.connected and not connection.broken:
+                connection.last_used = time.monotonic()
+                self._idle.append(connection)
+            else:
+                await connection.close()
+        finally:
+            self._slots.release()
+
+    async def authenticate(self, protocol='fiat-shamir', **kwargs):
+        """
+        Run one handshake on a pooled connection (keyword arguments as in
+        AsyncZKPConnection.authenticate); retried once on a fresh
+        connection if the connection broke
+
+        Returns:
+            bool: True if the server accepted the proof
+        """
+        for _ in range(2):
+            connection = await self.acquire()
+            try:
+                result = await connection.authenticate(protocol, **kwargs)
+            except BaseException:
+                await self.release(connection, reuse=False)
+                raise
+            await self.release(connection, reuse=result)
+            if result or not connection.broken:
+                return result
+        return False
+
+    async def close(self):
+        """Close all idle connections"""
+        self._closed = True
+        idle, self._idle = list(self._idle), deque()
+        for connection in idle:
+            await connection.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -3,120 +3,722 @@ import time
 import json
 import logging
 import random
+import select
+import threading
+from collections import deque
+from contextlib import contextmanager
 from typing import Optional, Dict, Any
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
-from fiatshamir.authentication import fiat_shamir_authenticate
+from fiatshamir.authentication import (fiat_shamir_authenticate, fiat_shamir_prove_noninteractive,
+                                       fiat_shamir_public_key, FiatShamirKey)
+from guillouquisquater.authentication import gq_authenticate, GQKey
+from schnorr.authentication import schnorr_authenticate, DEFAULT_GROUP
+from protocols.wire import LegacyCodec, FramedCodec, ProtocolError, SealedMessage, hello_request, parse_hello_reply
+from protocols.channel import SecureChannel
+from guillouquisquater.key_exchange import generate_share, sign_share, shared_secret, derive_channel_keys
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('ZKP-Client')
 
-# Global socket reference
-client_socket = None
-server_host = 'localhost'
-server_port = 8000
 
-def connect_to_server(host='localhost', port=8000):
-    """Connect to the ZKP server"""
-    global client_socket, server_host, server_port
-    server_host = host
-    server_port = port
-    
-    try:
-        client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        client_socket.connect((host, port))
-        logger.info(f"Connected to server at {host}:{port}")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to connect to server: {e}")
+class ZKPConnection:
+    """
+    One connection to the server with its own wire codec, buffered
+    messages and server nonce.
+
+    A connection is used by one thread at a time; ZKPClient hands them out.
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = 8000):
+        self.host = host
+        self.port = port
+        self.socket = None
+        self.codec = LegacyCodec()
+        self.nonce = None  # Одноразовый nonce сервера для неинтерактивного режима
+        # Последний билет возобновления {"ticket", "expires"}; переживает close()
+        self.ticket = None
+        self.broken = False  # Ошибка ввода-вывода: соединение нельзя использовать повторно
+        self.channel = None  # SecureChannel после start_key_exchange()
+        self.last_used = time.monotonic()
+        # Сообщения, уже полученные, но ещё не прочитанные (при склейке кадров)
+        self._pending = deque()
+
+    @property
+    def connected(self):
+        return self.socket is not None
+
+    def connect(self, wire='auto', timeout=None):
+        """
+        Connect to the server
+
+        Args:
+            wire (str): 'auto' to negotiate the framed protocol with fallback
+                to legacy text, 'legacy' to skip negotiation
+            timeout (float): Connect timeout in seconds (None - system default)
+
+        Returns:
+            bool: True on success
+        """
+        self.close()
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=timeout)
+            # Короткие сообщения запрос-ответ: без алгоритма Нейгла
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            self.socket = sock
+            logger.info(f"Connected to server at {self.host}:{self.port}")
+        except OSError as e:
+            logger.error(f"Failed to connect to server at {self.host}:{self.port}: {e}")
+            return False
+
+        if wire == 'auto':
+            self._negotiate_wire()
+        self.last_used = time.monotonic()
+        return not self.broken
+
+    def _negotiate_wire(self, timeout=5):
+        """Offer the framed protocol; stay on legacy text if the server does not accept"""
+        self.send(hello_request())
+        reply = self.receive(timeout=timeout)
+        version = parse_hello_reply(reply) if reply is not None else None
+        if version is not None:
+            self.codec = FramedCodec()
+            self.nonce = json.loads(reply).get("nonce")
+            logger.info(f"Using framed wire protocol v{version}")
+        else:
+            logger.info("Server does not support framing, using legacy text protocol")
+
+    def send(self, message, width=None):
+        """
+        Send message to the server
+
+        Args:
+            message: str, int or list of ints
+            width (int): Fixed byte width for integers in framed mode
+                (ignored on a secure channel, where everything is sent as text)
+        """
+        if not self.socket:
+            logger.error("Not connected to server")
+            return False
+
+        try:
+            if self.channel is None:
+                self.socket.sendall(self.codec.encode(message, width))
+            else:
+                text = json.dumps(list(message)) if isinstance(message, (list, tuple)) else str(message)
+                with self.channel.lock:
+                    self.socket.sendall(self.channel.seal(text.encode('utf-8')))
+            logger.debug("Sent to server: %s", message)
+            return True
+        except Exception as e:
+            logger.error(f"Error sending message: {e}")
+            self.broken = True
+            return False
+
+    def receive(self, timeout=30):
+        """
+        Receive message from the server
+
+        Returns:
+            str or int or list: Next message (integers stay integers in framed mode,
+            everything is text on a secure channel), or None on timeout/disconnect
+        """
+        if not self.socket:
+            logger.error("Not connected to server")
+            return None
+
+        try:
+            self.socket.settimeout(timeout)
+            while not self._pending:
+                data = self.socket.recv(65536 if self.codec.framed else 1024)
+                if not data:
+                    logger.warning("No data received from server")
+                    self.broken = True
+                    return None
+                self._pending.extend(self.codec.feed(data))
+            message = self._pending.popleft()
+            if isinstance(message, SealedMessage) != (self.channel is not None):
+                raise ProtocolError("Sealed and plaintext messages mixed on one connection")
+            if self.channel is not None:
+                message = self.channel.open(message).decode('utf-8')
+            logger.debug("Received from server: %s", message)
+            self.last_used = time.monotonic()
+            return message
+        except socket.timeout:
+            logger.error("Timeout waiting for server response")
+            return None
+        except (ProtocolError, UnicodeDecodeError) as e:
+            logger.error(f"Malformed message from server: {e}")
+            self.broken = True
+            return None
+        except Exception as e:
+            logger.error(f"Error receiving message: {e}")
+            self.broken = True
+            return None
+
+    def is_alive(self):
+        """
+        Cheap check of an idle connection: the server has not closed it and
+        has sent nothing unexpected (e.g. AUTH_FAILED after an idle timeout)
+        """
+        if not self.socket or self.broken or self._pending:
+            return False
+        try:
+            readable, _, _ = select.select([self.socket], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def take_nonce(self):
+        """Return the server nonce, requesting a new one if none is available"""
+        nonce, self.nonce = self.nonce, None
+        if nonce:
+            return nonce
+        self.send(json.dumps({"action": "nonce_request"}))
+        reply = self.receive()
+        try:
+            return json.loads(reply)["nonce"]
+        except (json.JSONDecodeError, TypeError, KeyError):
+            logger.error(f"Server did not issue a nonce: {reply}")
+            return None
+
+    def receive_ticket(self):
+        """Read the resumption ticket the server sends after AUTH_SUCCESS"""
+        reply = self.receive()
+        try:
+            message = json.loads(reply)
+            if message.get("action") == "ticket":
+                self.ticket = {"ticket": message["ticket"], "expires": message["expires"]}
+                return self.ticket
+        except (TypeError, ValueError, KeyError, AttributeError):
+            pass
+        logger.error(f"Server did not issue a ticket: {reply}")
+        return None
+
+    def close(self):
+        """Close the connection"""
+        if self.socket:
+            try:
+                self.socket.close()
+                logger.info("Disconnected from server")
+            except Exception as e:
+                logger.error(f"Error disconnecting: {e}")
+        self.socket = None
+        self.codec = LegacyCodec()
+        self.nonce = None
+        self.channel = None
+        self.broken = False
+        self._pending.clear()
+
+
+class ZKPClient:
+    """
+    Authenticates many identities concurrently from one process.
+
+    Keeps a bounded pool of connections spread round-robin over the
+    server's ports. A connection is checked out by one thread at a time,
+    returned to the pool after a successful handshake and dropped after
+    any failure, since the server-side state of the session is then
+    unknown. Opening a connection is retried with exponential backoff,
+    moving on to the next port after each failure.
+    """
+
+    def __init__(self, host: str = 'localhost', base_port: int = 8000, num_ports: int = 1,
+                 max_connections: int = 8, wire: str = 'auto', idle_timeout: Optional[float] = 60.0,
+                 connect_timeout: float = 5.0, retries: int = 5, backoff: float = 0.1,
+                 max_backoff: float = 5.0):
+        """
+        Args:
+            host: Server host
+            base_port: First server port
+            num_ports: Number of consecutive server ports to spread connections over
+            max_connections: Upper bound on open connections (idle and checked out)
+            wire: Wire protocol for new connections ('auto' or 'legacy')
+            idle_timeout: Idle connections older than this are closed instead
+                of reused (None - keep forever); should be below the server's
+                idle_timeout
+            connect_timeout: Timeout of a single connect attempt
+            retries: Connect attempts before giving up
+            backoff: Delay before the first retry, doubled after each failure
+            max_backoff: Upper bound on the retry delay
+        """
+        self.host = host
+        self.ports = [base_port + offset for offset in range(num_ports)]
+        self.max_connections = max_connections
+        self.wire = wire
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._next_port = 0
+        self._closed = False
+
+    def _pick_port(self):
+        with self._lock:
+            port = self.ports[self._next_port % len(self.ports)]
+            self._next_port += 1
+        return port
+
+    def _open(self):
+        """New connection, retried with exponential backoff and jitter"""
+        delay = self.backoff
+        for attempt in range(self.retries):
+            connection = ZKPConnection(self.host, self._pick_port())
+            if connection.connect(self.wire, self.connect_timeout):
+                return connection
+            connection.close()
+            if attempt + 1 < self.retries:
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                delay = min(delay * 2, self.max_backoff)
+        raise ConnectionError(f"Could not connect to {self.host} ports {self.ports} "
+                              f"after {self.retries} attempts")
+
+    def _take_idle(self):
+        """Most recently used idle connection that is still usable, or None"""
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection = self._idle.pop()
+            expired = self.idle_timeout is not None and now - connection.last_used > self.idle_timeout
+            if not expired and connection.is_alive():
+                return connection
+            connection.close()
+
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        Check out a connection
+
+        Args:
+            timeout: Seconds to wait for a free slot (None - wait forever)
+
+        Returns:
+            ZKPConnection: Reused idle connection or a new one
+        """
+        if self._closed:
+            raise RuntimeError("ZKPClient is closed")
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("No free connection in the pool")
+        try:
+            return self._take_idle() or self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, reuse=True):
+        """
+        Return a checked out connection
+
+        Args:
+            connection: Connection from acquire()
+            reuse: Keep it for later use; False closes it
+        """
+        if reuse and not self._closed and connection.connected and not connection.broken:
+            connection.last_used = time.monotonic()
+            with self._lock:
+                self._idle.append(connection)
+        else:
+            connection.close()
+        self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Context manager around acquire()/release(); the connection is dropped on an exception"""
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        except BaseException:
+            self.release(connection, reuse=False)
+            raise
+        self.release(connection)
+
+    def authenticate(self, protocol='fiat-shamir', timeout: Optional[float] = None, **kwargs):
+        """
+        Run one authentication on a pooled connection
+
+        Takes the same keyword arguments as start_authentication(). If a
+        reused connection turns out to be dead, the handshake is retried
+        once on a fresh connection.
+
+        Returns:
+            bool: True if the server accepted the proof
+        """
+        for _ in range(2):
+            connection = self.acquire(timeout)
+            try:
+                result = start_authentication(protocol, connection=connection, **kwargs)
+            except BaseException:
+                self.release(connection, reuse=False)
+                raise
+            self.release(connection, reuse=result)
+            if result or not connection.broken:
+                return result
         return False
 
-def send_to_server(message):
-    """Send message to the server"""
-    global client_socket
+    def close(self):
+        """Close all idle connections; checked out ones are closed on release"""
+        self._closed = True
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection in idle:
+            connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Соединение модульных функций connect_to_server() / send_to_server() / ...
+_connection = ZKPConnection()
+
+
+def default_connection():
+    """Connection used by the module-level functions"""
+    return _connection
+
+
+def connect_to_server(host='localhost', port=8000, wire='auto'):
+    """
+    Connect to the ZKP server
     
-    if not client_socket:
-        logger.error("Not connected to server")
-        return False
+    Args:
+        host (str): Server host
+        port (int): Server port
+        wire (str): 'auto' to negotiate the framed protocol with fallback
+            to legacy text, 'legacy' to skip negotiation
+    """
+    _connection.host = host
+    _connection.port = port
+    return _connection.connect(wire)
+
+def send_to_server(message, width=None):
+    """
+    Send message to the server
     
-    try:
-        if isinstance(message, (int, float)):
-            message = str(message)
-        
-        client_socket.send(message.encode('utf-8'))
-        logger.info(f"Sent to server: {message}")
-        return True
-    except Exception as e:
-        logger.error(f"Error sending message: {e}")
-        return False
+    Args:
+        message: str, int or list of ints
+        width (int): Fixed byte width for integers in framed mode
+    """
+    return _connection.send(message, width)
 
 def receive_from_server(timeout=30):
-    """Receive message from the server"""
-    global client_socket
+    """
+    Receive message from the server
     
-    if not client_socket:
-        logger.error("Not connected to server")
-        return None
-    
-    try:
-        client_socket.settimeout(timeout)
-        data = client_socket.recv(1024)
-        if data:
-            message = data.decode('utf-8')
-            logger.info(f"Received from server: {message}")
-            return message
-        else:
-            logger.warning("No data received from server")
-            return None
-    except socket.timeout:
-        logger.error("Timeout waiting for server response")
-        return None
-    except Exception as e:
-        logger.error(f"Error receiving message: {e}")
-        return None
+    Returns:
+        str or int or list: Next message (integers stay integers in framed mode),
+        or None on timeout/disconnect
+    """
+    return _connection.receive(timeout)
 
 def disconnect_from_server():
     """Disconnect from the server"""
-    global client_socket
+    _connection.close()
+
+def _authenticate_noninteractive(connection, private_key, n, context='login', key_id=None,
+                                 precompute=False, want_ticket=False):
+    """Send a complete non-interactive Fiat-Shamir proof in one message"""
+    nonce = connection.take_nonce()
+    if not nonce:
+        return False
     
-    if client_socket:
-        try:
-            client_socket.close()
-            logger.info("Disconnected from server")
-        except Exception as e:
-            logger.error(f"Error disconnecting: {e}")
-        finally:
-            client_socket = None
+    proof = fiat_shamir_prove_noninteractive(private_key, n, bytes.fromhex(nonce), context,
+                                             precompute=precompute)
+    auth_request = {
+        "action": "auth_request",
+        "protocol": "fiat-shamir",
+        "mode": "non-interactive",
+        "n": n,
+        "nonce": nonce,
+        "context": context,
+        **proof
+    }
+    if key_id:
+        auth_request["key_id"] = key_id
+    if want_ticket:
+        auth_request["want_ticket"] = True
+    public_key = fiat_shamir_public_key(private_key, n)
+    if isinstance(public_key, list):
+        auth_request["public_keys"] = public_key
+    else:
+        auth_request["public_key"] = public_key
+    
+    connection.send(json.dumps(auth_request))
+    result = connection.receive()
+    if result == "AUTH_SUCCESS":
+        logger.info("Authentication successful")
+        return True
+    logger.warning(f"Authentication failed: {result}")
+    return False
 
-def start_authentication(protocol='fiat-shamir', **kwargs):
-    """Start authentication process with the server"""
-    if not client_socket:
+def start_authentication(protocol='fiat-shamir', connection=None, **kwargs):
+    """
+    Start authentication process with the server
+    
+    Args:
+        protocol (str): 'fiat-shamir', 'guillou-quisquater' or 'schnorr'
+        connection (ZKPConnection): Connection to run the handshake on
+            (default: the one opened by connect_to_server())
+    
+    Keyword Args:
+        private_key (int, list or FiatShamirKey): Secret key s or key
+            vector s_1..s_k, or key material that also carries n (and p, q)
+        key (GQKey): Key material for 'guillou-quisquater'
+        private_key (int): Secret key x for 'schnorr'
+        group (SchnorrGroup): Group for 'schnorr' (default: the built-in group)
+        n (int): Modulus (optional with FiatShamirKey)
+        rounds (int): Rounds for the interactive protocol
+        mode (str): 'interactive' (default) or 'non-interactive' -
+            the whole proof in one request/response
+        context (str): Context the non-interactive proof is bound to
+        key_id (str): Id of the key enrolled in the server's key registry
+        precompute (bool): Take commitments from a background-filled
+            CommitmentPool instead of computing them during the login
+        want_ticket (bool): Ask for a resumption ticket; it is stored in
+            connection.ticket (see resume_authentication()). Framed wire
+            protocol only
+    """
+    connection = connection or _connection
+    if not connection.connected:
         logger.error("Not connected to server")
         return False
     
+    if kwargs.get('want_ticket') and not connection.codec.framed:
+        # Сервер выдаёт билеты только при кадрировании (см. ZKPServer._finish_authentication)
+        logger.warning("Resumption tickets need the framed wire protocol, not requesting one")
+        kwargs['want_ticket'] = False
+    want_ticket = kwargs.get('want_ticket', False)
+    result = _run_authentication(protocol, connection, **kwargs)
+    if result and want_ticket:
+        connection.receive_ticket()
+    return result
+
+def _run_authentication(protocol, connection, **kwargs):
+    """Send the auth_request and run the handshake of the chosen protocol"""
+    want_ticket = kwargs.get('want_ticket', False)
     if protocol.lower() == 'fiat-shamir':
         private_key = kwargs.get('private_key')
         n = kwargs.get('n')
+        rounds = kwargs.get('rounds', 1)
+        mode = kwargs.get('mode', 'interactive')
+        key_id = kwargs.get('key_id')
+        precompute = kwargs.get('precompute', False)
+        if isinstance(private_key, FiatShamirKey):
+            n = private_key.n
         
         if not private_key or not n:
             logger.error("Missing required parameters for Fiat-Shamir protocol")
             return False
+        
+        if mode == 'non-interactive':
+            if connection.codec.framed:
+                return _authenticate_noninteractive(connection, private_key, n,
+                                                    kwargs.get('context', 'login'), key_id, precompute,
+                                                    want_ticket)
+            # Доказательство не помещается в одно сообщение без кадрирования
+            logger.warning("Non-interactive mode needs the framed wire protocol, falling back to interactive")
             
         # Отправляем запрос на аутентификацию
         auth_request = {
             "action": "auth_request",
             "protocol": "fiat-shamir",
-            "public_key": pow(private_key, 2, n),  # v = s^2 mod n
             "n": n
         }
+        public_key = fiat_shamir_public_key(private_key, n)
+        if isinstance(public_key, list):
+            # Режим Фейге-Фиата-Шамира: k ключей, t раундов
+            auth_request["public_keys"] = public_key
+            auth_request["rounds"] = rounds
+        else:
+            auth_request["public_key"] = public_key  # v = s^2 mod n
+            if rounds != 1:
+                auth_request["rounds"] = rounds
+        if key_id:
+            auth_request["key_id"] = key_id
+        if want_ticket:
+            auth_request["want_ticket"] = True
         
-        send_to_server(json.dumps(auth_request))
+        connection.send(json.dumps(auth_request))
         
         # Выполняем протокол
-        result = fiat_shamir_authenticate(private_key, n)
+        result = fiat_shamir_authenticate(private_key, n, rounds=rounds, precompute=precompute,
+                                          connection=connection)
         return result
     
+    elif protocol.lower() == 'guillou-quisquater':
+        key = kwargs.get('key')
+        rounds = kwargs.get('rounds', 1)
+        key_id = kwargs.get('key_id')
+        if not isinstance(key, GQKey):
+            logger.error("Missing GQKey for Guillou-Quisquater protocol")
+            return False
+        
+        auth_request = {
+            "action": "auth_request",
+            "protocol": "guillou-quisquater",
+            "n": key.n,
+            "public_key": key.public_key,  # J = B^-v mod n
+            "v": key.v
+        }
+        if rounds != 1:
+            auth_request["rounds"] = rounds
+        if key_id:
+            auth_request["key_id"] = key_id
+        if want_ticket:
+            auth_request["want_ticket"] = True
+        
+        connection.send(json.dumps(auth_request))
+        return gq_authenticate(key, rounds=rounds, precompute=kwargs.get('precompute', False),
+                               connection=connection)
+    
+    elif protocol.lower() == 'schnorr':
+        private_key = kwargs.get('private_key')
+        group = kwargs.get('group') or DEFAULT_GROUP
+        rounds = kwargs.get('rounds', 1)
+        key_id = kwargs.get('key_id')
+        if not private_key:
+            logger.error("Missing private key for Schnorr protocol")
+            return False
+        
+        auth_request = {
+            "action": "auth_request",
+            "protocol": "schnorr",
+            "n": group.p,
+            "public_key": group.g_pow(private_key)  # y = g^x mod p
+        }
+        if rounds != 1:
+            auth_request["rounds"] = rounds
+        if key_id:
+            auth_request["key_id"] = key_id
+        if want_ticket:
+            auth_request["want_ticket"] = True
+        
+        connection.send(json.dumps(auth_request))
+        return schnorr_authenticate(private_key, group, rounds=rounds, connection=connection)
+    
     else:
         logger.error(f"Unsupported protocol: {protocol}")
         return False
+
+def start_key_exchange(key, connection=None, key_id=None, group=None):
+    """
+    Authenticate with a Guillou-Quisquater key and open a secure channel
+    
+    The client's Diffie-Hellman share is signed with the GQ key and bound
+    to a fresh server nonce (see guillouquisquater/key_exchange.py). On
+    success every later message on the connection is encrypted and
+    authenticated; connection.send()/receive() do this transparently.
+    Needs the framed wire protocol.
+    
+    Args:
+        key (GQKey): Key material of the identity
+        connection (ZKPConnection): Connection to use (default: the one
+            opened by connect_to_server())
+        key_id (str): Id of the key enrolled in the server's key registry
+        group (SchnorrGroup): The server's Schnorr group, in which the
+            shares are computed (default: the built-in group)
+    
+    Returns:
+        bool: True if the channel is established
+    """
+    connection = connection or _connection
+    if not connection.connected:
+        logger.error("Not connected to server")
+        return False
+    if not isinstance(key, GQKey):
+        logger.error("Missing GQKey for the key exchange")
+        return False
+    if not connection.codec.framed or connection.channel is not None:
+        logger.error("Key exchange needs a framed connection without a channel")
+        return False
+    nonce = connection.take_nonce()
+    if not nonce:
+        return False
+    
+    group = group or DEFAULT_GROUP
+    secret, share = generate_share(group)
+    commitment, response = sign_share(key, bytes.fromhex(nonce), share)
+    request = {
+        "action": "key_exchange",
+        "protocol": "guillou-quisquater",
+        "n": key.n,
+        "public_key": key.public_key,
+        "v": key.v,
+        "nonce": nonce,
+        "share": share,
+        "commitment": commitment,
+        "response": response
+    }
+    if key_id:
+        request["key_id"] = key_id
+    connection.send(json.dumps(request))
+    
+    result = connection.receive()
+    if result != "AUTH_SUCCESS":
+        logger.warning(f"Key exchange failed: {result}")
+        return False
+    reply = connection.receive()
+    try:
+        server_share = int(json.loads(reply)["share"])
+        client_keys, server_keys = derive_channel_keys(
+            shared_secret(group, secret, server_share), key.n, key.public_key, key.v,
+            bytes.fromhex(nonce), share, server_share, commitment, response
+        )
+    except (TypeError, ValueError, KeyError) as e:
+        logger.error(f"Invalid key exchange reply {reply}: {e}")
+        connection.broken = True
+        return False
+    connection.channel = SecureChannel(client_keys, server_keys)
+    logger.info("Secure channel established")
+    return True
+
+def resume_authentication(ticket=None, connection=None, renew=False):
+    """
+    Authenticate with a resumption ticket instead of a full handshake
+    
+    Args:
+        ticket (str or dict): Ticket from an earlier login (default:
+            connection.ticket)
+        connection (ZKPConnection): Connection to use (default: the one
+            opened by connect_to_server())
+        renew (bool): Ask for a fresh ticket, stored in connection.ticket
+    
+    Returns:
+        bool: True if the server accepted the ticket
+    """
+    connection = connection or _connection
+    if not connection.connected:
+        logger.error("Not connected to server")
+        return False
+    ticket = ticket or connection.ticket
+    if isinstance(ticket, dict):
+        ticket = ticket.get("ticket")
+    if not ticket:
+        logger.error("No resumption ticket")
+        return False
+    
+    if renew and not connection.codec.framed:
+        logger.warning("Resumption tickets need the framed wire protocol, not renewing")
+        renew = False
+    
+    request = {"action": "resume", "ticket": ticket}
+    if renew:
+        request["want_ticket"] = True
+    connection.send(json.dumps(request))
+    result = connection.receive()
+    if result != "AUTH_SUCCESS":
+        logger.warning(f"Session resumption failed: {result}")
+        return False
+    logger.info("Session resumed")
+    if renew:
+        connection.receive_ticket()
+    return True
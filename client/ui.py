@@ -15,7 +15,11 @@ from client import (
     disconnect_from_server, 
     start_authentication
 )
-from fiatshamir.authentication import generate_fiat_shamir_keys
+from fiatshamir.authentication import generate_fiat_shamir_keys, FiatShamirKey
+from protocols.primes import generate_blum_modulus, is_probable_prime
+
+# Размер модуля n, генерируемого по умолчанию
+DEFAULT_MODULUS_BITS = 2048
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -31,7 +35,9 @@ class ZKPClientConsole:
         self.keys = {
             'private_key': None,
             'public_key': None,
-            'n': 1223  # Default modulus
+            'n': None,  # Generated with the keys unless entered
+            'rounds': 1,
+            'material': None  # FiatShamirKey with p, q when n was generated here
         }
 
     def display_menu(self):
@@ -77,19 +83,40 @@ class ZKPClientConsole:
 
     def generate_keys(self):
         """Generate keys for authentication"""
-        n = int(input("Enter modulus (n) [default=1223]: ") or "1223")
+        entered = input(f"Enter modulus (n) [default=new {DEFAULT_MODULUS_BITS}-bit Blum integer]: ")
+        p = q = None
+        if entered:
+            n = int(entered)
+            if is_probable_prime(n):
+                print("Warning: n is prime - anyone can compute square roots modulo n, "
+                      "so Fiat-Shamir proofs are not sound")
+        else:
+            print(f"Generating a {DEFAULT_MODULUS_BITS}-bit modulus n = p*q...")
+            n, p, q = generate_blum_modulus(DEFAULT_MODULUS_BITS)
         self.keys['n'] = n
         
-        print("\nGenerating Fiat-Shamir keys...")
-        private_key, public_key = generate_fiat_shamir_keys(n)
+        k = int(input("Enter number of key pairs (k) [default=1]: ") or "1")
+        
+        if k > 1:
+            rounds = int(input("Enter number of rounds (t) [default=4]: ") or "4")
+            print(f"\nGenerating Feige-Fiat-Shamir keys (k={k}, t={rounds})...")
+            private_key, public_key = generate_fiat_shamir_keys(n, k)
+        else:
+            rounds = 1
+            print("\nGenerating Fiat-Shamir keys...")
+            private_key, public_key = generate_fiat_shamir_keys(n)
         
         self.keys['private_key'] = private_key
         self.keys['public_key'] = public_key
+        self.keys['rounds'] = rounds
+        self.keys['material'] = FiatShamirKey(private_key, n, p, q)
         
         print(f"Keys generated successfully:")
         print(f"Private key (s): {private_key}")
         print(f"Public key (v): {public_key}")
         print(f"Modulus (n): {n}")
+        if k > 1:
+            print(f"Soundness error: 2^-{k * rounds}")
 
     def authenticate(self):
         """Authenticate with the server"""
@@ -108,8 +135,9 @@ class ZKPClientConsole:
         print("\nStarting Fiat-Shamir authentication...")
         result = start_authentication(
             protocol='fiat-shamir', 
-            private_key=self.keys['private_key'], 
-            n=self.keys['n']
+            private_key=self.keys['material'] or self.keys['private_key'],
+            n=self.keys['n'],
+            rounds=self.keys['rounds']
         )
         
         if result:
@@ -184,6 +212,7 @@ class ZKPClientConsole:
         print(f"Private key: {self.keys['private_key']}")
         print(f"Public key: {self.keys['public_key']}")
         print(f"Modulus (n): {self.keys['n']}")
+        print(f"Rounds (t): {self.keys['rounds']}")
 
     def run(self):
         """Run the client console UI"""
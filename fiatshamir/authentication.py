@@ -1,8 +1,13 @@
-from random import randint
+from math import gcd
+import secrets
 import logging
 import json
 import sys
 import os
+from protocols.wire import byte_length
+from protocols.transcript import NI_SECURITY_BITS, derive_challenges, encode_proof
+from protocols.modmath import CRTModulus
+from fiatshamir.precompute import get_commitment_pool
 
 # Remove this import from the top level
 # sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
@@ -10,47 +15,128 @@ import os
 
 logger = logging.getLogger('Fiat-Shamir')
 
+class FiatShamirKey:
+    """
+    Fiat-Shamir key material of an identity holder
+    
+    Besides s (or s_1..s_k) and n it can carry the factorization n = p*q
+    with precomputed CRT coefficients. The prover functions accept it
+    instead of a bare private key and route exponentiations through pow(),
+    which works modulo p and q whenever that is faster.
+    """
+    
+    __slots__ = ('private_key', 'public_key', 'n', 'crt')
+    
+    def __init__(self, private_key, n, p=None, q=None):
+        """
+        Args:
+            private_key (int or list): Закрытый ключ s или вектор s_1..s_k
+            n (int): Модуль n
+            p, q (int): Множители n, если они известны владельцу ключа
+        """
+        self.n = n
+        self.crt = CRTModulus(p, q) if p is not None and q is not None else None
+        if self.crt is not None and self.crt.n != n:
+            raise ValueError("p*q does not match the modulus")
+        if isinstance(private_key, (list, tuple)):
+            self.private_key = list(private_key)
+            self.public_key = [pow(s, 2, n) for s in private_key]
+        else:
+            self.private_key = private_key
+            self.public_key = pow(private_key, 2, n)
+    
+    def pow(self, base, exponent):
+        """base^exponent mod n, via the CRT when the factorization is known"""
+        if self.crt is not None:
+            return self.crt.pow(base, exponent)
+        return pow(base, exponent, self.n)
+
+def _unpack_key(private_key, n):
+    """(list of s_j, n, pow function) for a bare key or FiatShamirKey"""
+    if isinstance(private_key, FiatShamirKey):
+        keys = private_key.private_key
+        return (keys if isinstance(keys, list) else [keys]), private_key.n, private_key.pow
+    keys = private_key if isinstance(private_key, (list, tuple)) else [private_key]
+    return keys, n, lambda base, exponent: pow(base, exponent, n)
+
+def fiat_shamir_public_key(private_key, n=None):
+    """Открытый ключ v = s² mod n (или вектор v_1..v_k) для закрытого ключа"""
+    if isinstance(private_key, FiatShamirKey):
+        return private_key.public_key
+    if isinstance(private_key, (list, tuple)):
+        return [pow(s, 2, n) for s in private_key]
+    return pow(private_key, 2, n)
+
 # Клиент: Генерация доказательства
-def fiat_shamir_authenticate(private_key, n):
+def fiat_shamir_prover_commit(private_key, n=None, precompute=False):
+    """Шаг 1: (r, x = r² mod n); precompute - взять пару из CommitmentPool"""
+    _, n, modpow = _unpack_key(private_key, n)
+    if precompute:
+        return get_commitment_pool(n, 2, modpow=modpow).take()  # заранее вычисленные, одноразовые
+    # r должно быть непредсказуемым: при e = 0 ответ y = r уходит в сеть
+    r = 1 + secrets.randbelow(n - 1)
+    return r, modpow(r, 2)
+
+def fiat_shamir_prover_respond(private_key, n, r, e):
+    """Шаг 3: y = r * Π s_j^e_j mod n"""
+    keys, n, _ = _unpack_key(private_key, n)
+    return (r * _product_of_powers(keys, e, n)) % n
+
+def fiat_shamir_authenticate(private_key, n, rounds=1, precompute=False, connection=None):
     """
     Выполняет протокол аутентификации Фиата-Шамира со стороны клиента
     
     Args:
-        private_key (int): Закрытый ключ клиента s
-        n (int): Модуль n
+        private_key (int, list or FiatShamirKey): Закрытый ключ клиента s,
+            либо вектор ключей s_1..s_k для режима Фейге-Фиата-Шамира
+        n (int): Модуль n (None - взять из FiatShamirKey)
+        rounds (int): Число раундов t (каждый раунд - одно сообщение
+            с k-битным вектором вызовов)
+        precompute (bool): Брать пары (r, x) из фонового пула
+            CommitmentPool вместо вычисления во время входа
+        connection (ZKPConnection): Соединение с сервером (по умолчанию -
+            открытое через connect_to_server())
     
     Returns:
         bool: True если аутентификация успешна, иначе False
     """
-    # Import inside the function to avoid circular import
-    from client.client import send_to_server, receive_from_server
+    if connection is None:
+        # Import inside the function to avoid circular import
+        from client.client import default_connection
+        connection = default_connection()
+    
+    _, n, _ = _unpack_key(private_key, n)
+    width = byte_length(n)
     
     try:
-        # Шаг 1: Генерируем случайное r и вычисляем x = r² mod n
-        r = randint(1, n - 1)
-        x = pow(r, 2, n)  # x = r² mod n
-        
-        # Отправляем x серверу
-        send_to_server(x)
-        
-        # Шаг 2: Получаем случайное битовое значение e от проверяющего (сервера)
-        e_str = receive_from_server()
-        if not e_str:
-            logger.error("Failed to receive challenge (e) from server")
-            return False
+        for round_no in range(rounds):
+            # Шаг 1: Генерируем случайное r и вычисляем x = r² mod n
+            r, x = fiat_shamir_prover_commit(private_key, n, precompute)
             
-        try:
-            e = int(e_str)
-        except ValueError:
-            logger.error(f"Received invalid challenge: {e_str}")
-            return False
-        
-        # Шаг 3: Вычисляем y = r * s^e mod n и отправляем серверу
-        y = (r * pow(private_key, e, n)) % n
-        send_to_server(y)
+            # Отправляем x серверу
+            connection.send(x, width=width)
+            
+            # Шаг 2: Получаем вызов e от проверяющего (сервера):
+            # бит для одного ключа, k-битная маска для вектора ключей
+            e_str = connection.receive()
+            if e_str is None or e_str == "":
+                logger.error("Failed to receive challenge (e) from server")
+                return False
+            if e_str == "AUTH_FAILED":
+                logger.warning(f"Authentication failed in round {round_no}")
+                return False
+                
+            try:
+                e = int(e_str)
+            except (ValueError, TypeError):
+                logger.error(f"Received invalid challenge: {e_str}")
+                return False
+            
+            # Шаг 3: Вычисляем y = r * Π s_j^e_j mod n и отправляем серверу
+            connection.send(fiat_shamir_prover_respond(private_key, n, r, e), width=width)
         
         # Шаг 4: Получаем результат от сервера
-        result = receive_from_server()
+        result = connection.receive()
         
         # Проверяем результат
         if result == "AUTH_SUCCESS":
@@ -64,6 +150,71 @@ def fiat_shamir_authenticate(private_key, n):
         logger.exception(f"Error during Fiat-Shamir authentication: {e}")
         return False
 
+def fiat_shamir_prove_noninteractive(private_key, n, nonce, context="login", rounds=None,
+                                     precompute=False):
+    """
+    Строит неинтерактивное доказательство Фиата-Шамира
+    
+    Вызовы e_i не приходят от сервера, а вычисляются хэшем от модуля,
+    открытых ключей, одноразового nonce сервера, контекста и всех x_i,
+    поэтому всё доказательство отправляется одним сообщением.
+    
+    Args:
+        private_key (int, list or FiatShamirKey): Закрытый ключ s или вектор s_1..s_k
+        n (int): Модуль n (None - взять из FiatShamirKey)
+        nonce (bytes): Одноразовое значение, выданное сервером
+        context (str): Контекст применения доказательства
+        rounds (int): Число раундов t; по умолчанию k*t >= NI_SECURITY_BITS
+        precompute (bool): Брать пары (r, x) из фонового пула CommitmentPool
+    
+    Returns:
+        dict: {"commitments": [...], "responses": [...]} (числа в hex)
+    """
+    keys, n, modpow = _unpack_key(private_key, n)
+    k = len(keys)
+    if rounds is None:
+        rounds = -(-NI_SECURITY_BITS // k)
+    
+    public_keys = [pow(s, 2, n) for s in keys]
+    if precompute:
+        pairs = get_commitment_pool(n, 2, modpow=modpow).take_many(rounds)
+        rs = [r for r, _ in pairs]
+        commitments = [x for _, x in pairs]
+    else:
+        rs = [1 + secrets.randbelow(n - 1) for _ in range(rounds)]
+        commitments = [modpow(r, 2) for r in rs]
+    challenges = derive_challenges(n, public_keys, commitments, nonce, context, k)
+    responses = [(r * _product_of_powers(keys, e, n)) % n for r, e in zip(rs, challenges)]
+    
+    return encode_proof(commitments, responses)
+
+def challenge_bits(e, k):
+    """
+    Разворачивает вызов в вектор из k битов
+    
+    Args:
+        e (int or list): Битовая маска (бит j относится к ключу j) или список битов
+        k (int): Число ключей
+    
+    Returns:
+        list: Биты e_1..e_k
+    """
+    if isinstance(e, (list, tuple)):
+        if len(e) != k or any(bit not in (0, 1) for bit in e):
+            raise ValueError("Challenge vector does not match the key vector")
+        return list(e)
+    if e < 0 or e >> k:
+        raise ValueError("Challenge has more bits than there are keys")
+    return [(e >> j) & 1 for j in range(k)]
+
+def _product_of_powers(values, e, n):
+    """Π values_j^e_j mod n для битового вектора e"""
+    result = 1
+    for value, bit in zip(values, challenge_bits(e, len(values))):
+        if bit:
+            result = (result * value) % n
+    return result
+
 # Сервер: Проверка доказательства
 def fiat_shamir_verify(client_x, client_y, public_key, n, e):
     """
@@ -71,42 +222,78 @@ def fiat_shamir_verify(client_x, client_y, public_key, n, e):
     
     Args:
         client_x (int): Значение x, полученное от клиента (x = r² mod n)
-        client_y (int): Значение y, полученное от клиента (y = r * s^e mod n)
-        public_key (int): Публичный ключ клиента v (v = s² mod n)
+        client_y (int): Значение y, полученное от клиента (y = r * Π s_j^e_j mod n)
+        public_key (int or list): Публичный ключ клиента v (v = s² mod n)
+            или вектор ключей v_1..v_k
         n (int): Модуль n
-        e (int): Случайный бит, отправленный клиенту (0 или 1)
+        e (int or list): Случайный бит (0 или 1), либо k-битный вектор вызовов
         
     Returns:
         bool: True если проверка успешна, иначе False
     """
+    # x = 0, y = 0 проходит проверку при любом e
+    if not 0 < client_x < n or not 0 < client_y < n:
+        return False
+    
+    keys = public_key if isinstance(public_key, (list, tuple)) else [public_key]
+    try:
+        product = _product_of_powers(keys, e, n)
+    except ValueError:
+        return False
+    
     # Вычисляем левую часть: y² mod n
     left = pow(client_y, 2, n)
     
-    # Вычисляем правую часть: x * v^e mod n
-    right = (client_x * pow(public_key, e, n)) % n
+    # Вычисляем правую часть: x * Π v_j^e_j mod n
+    right = (client_x * product) % n
     
-    # Проверяем равенство: y² ≡ x * v^e (mod n)
+    # Проверяем равенство: y² ≡ x * Π v_j^e_j (mod n)
     return left == right
 
 # Функция генерации ключей для протокола Фиата-Шамира
-def generate_fiat_shamir_keys(n):
+def generate_fiat_shamir_keys(n, k=None):
     """
     Генерирует пару ключей для протокола Фиата-Шамира
     
     Args:
         n (int): Модуль n
+        k (int): Число пар ключей для режима Фейге-Фиата-Шамира;
+            None - одна пара скалярных ключей
     
     Returns:
-        tuple: (private_key, public_key) - пара закрытый и открытый ключи
+        tuple: (private_key, public_key) - пара закрытый и открытый ключи,
+        либо (список s_1..s_k, список v_1..v_k) если задано k
     """
+    if k is not None:
+        pairs = [generate_fiat_shamir_keys(n) for _ in range(k)]
+        return [s for s, _ in pairs], [v for _, v in pairs]
+    
     # Выбираем случайное число s, взаимно простое с n
     while True:
-        s = randint(2, n - 1)
-        # В полной реализации нужно проверять, что gcd(s, n) = 1
-        # Для простоты мы этот шаг пропускаем
-        break
+        s = 2 + secrets.randbelow(n - 2)
+        if gcd(s, n) == 1:
+            break
         
     # Вычисляем открытый ключ v = s² mod n
     v = pow(s, 2, n)
     
     return s, v
+
+def generate_fiat_shamir_key_material(bits=2048, k=None, workers=None, pool=None):
+    """
+    Генерирует модуль Блюма n = p*q и ключи для него
+    
+    Args:
+        bits (int): Размер модуля n
+        k (int): Число пар ключей (None - одна пара)
+        workers (int): Параллельные процессы поиска простых
+        pool: PrimePool или путь к файлу заранее найденных простых
+    
+    Returns:
+        FiatShamirKey: Ключи вместе с p, q для ускоренного доказательства
+    """
+    from protocols.primes import generate_blum_modulus
+    
+    n, p, q = generate_blum_modulus(bits, workers, pool)
+    private_key, _ = generate_fiat_shamir_keys(n, k)
+    return FiatShamirKey(private_key, n, p, q)
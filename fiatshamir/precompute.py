@@ -0,0 +1,160 @@
+"""
+Offline commitment precomputation for the prover.
+
+A commitment (r, x = r^e mod n) does not depend on the challenge, so it
+can be computed before the login starts. CommitmentPool keeps a stock of
+such pairs per modulus, refilled by a background thread; the online step
+only pops one. Every pair is handed out exactly once: reusing r for two
+different challenges reveals the private key.
+"""
+
+import os
+import secrets
+import threading
+import weakref
+from collections import deque, OrderedDict
+
+DEFAULT_DEPTH = 64
+# Общих пулов не больше стольких: у каждого свой поток и depth пар, а у
+# пула GQ ещё и ссылка на закрытый ключ (modpow = key.pow)
+MAX_SHARED_POOLS = 16
+
+_pools = weakref.WeakSet()
+_shared = OrderedDict()  # (n, exponent) -> CommitmentPool, от давно не использованных к свежим
+_shared_lock = threading.Lock()
+
+
+def _reset_pools_after_fork():
+    # Дочерний процесс не должен использовать те же r, что и родитель
+    for pool in list(_pools):
+        pool._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+class CommitmentPool:
+    """Thread-safe stock of single-use (r, r^exponent mod n) pairs"""
+
+    def __init__(self, n: int, depth: int = DEFAULT_DEPTH, exponent: int = 2,
+                 modpow=None, refill_threshold: float = 0.5):
+        """
+        Args:
+            n: Modulus
+            depth: Number of pairs kept ready
+            exponent: Commitment exponent (2 for Fiat-Shamir, v for
+                Guillou-Quisquater)
+            modpow: Function (base, exponent) -> base^exponent mod n, e.g.
+                FiatShamirKey.pow to use the CRT; default pow(..., n)
+            refill_threshold: Fraction of depth below which the refill
+                thread is woken up
+        """
+        self.n = n
+        self.depth = depth
+        self.exponent = exponent
+        self._modpow = modpow or (lambda base, e: pow(base, e, n))
+        self._low_water = max(1, int(depth * refill_threshold))
+        self._reset()
+        _pools.add(self)
+
+    def _reset(self):
+        """Drop all precomputed pairs (also called in a forked child)"""
+        self._lock = threading.Lock()
+        self._pairs = deque()
+        self._refill_needed = threading.Event()
+        self._thread = None
+        self._closed = False
+
+    def _new_pair(self):
+        r = 1 + secrets.randbelow(self.n - 1)
+        return r, self._modpow(r, self.exponent)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._refill_loop, daemon=True)
+            self._thread.start()
+
+    def _refill_loop(self):
+        while not self._closed:
+            self._refill_needed.wait()
+            self._refill_needed.clear()
+            while not self._closed and len(self._pairs) < self.depth:
+                pair = self._new_pair()
+                with self._lock:
+                    self._pairs.append(pair)
+
+    def fill(self):
+        """Fill the pool up to depth in the calling thread"""
+        while len(self._pairs) < self.depth:
+            pair = self._new_pair()
+            with self._lock:
+                self._pairs.append(pair)
+
+    def start(self):
+        """Start filling the pool in the background"""
+        self._ensure_thread()
+        self._refill_needed.set()
+
+    def take(self):
+        """
+        Pop one commitment pair
+
+        Returns:
+            tuple: (r, x); computed on the spot if the pool is empty
+        """
+        with self._lock:
+            pair = self._pairs.popleft() if self._pairs else None
+            remaining = len(self._pairs)
+        if remaining < self._low_water and not self._closed:
+            self._ensure_thread()
+            self._refill_needed.set()
+        return pair if pair is not None else self._new_pair()
+
+    def take_many(self, count):
+        """Pop `count` commitment pairs"""
+        return [self.take() for _ in range(count)]
+
+    def close(self):
+        """Stop refilling and forget the stored pairs"""
+        self._closed = True
+        self._refill_needed.set()
+        with self._lock:
+            self._pairs.clear()
+
+    def __len__(self):
+        return len(self._pairs)
+
+
+def get_commitment_pool(n, exponent=2, depth=DEFAULT_DEPTH, modpow=None):
+    """
+    Shared CommitmentPool for a modulus and exponent (created and started on first use)
+
+    At most MAX_SHARED_POOLS are kept: the least recently used pool is
+    closed when another one is needed, which stops its refill thread and
+    drops its pairs and modpow. A caller still holding it keeps working,
+    take() then computes the pair on the spot.
+    """
+    key = (n, exponent)
+    evicted = []
+    with _shared_lock:
+        pool = _shared.get(key)
+        if pool is None or pool._closed:
+            pool = CommitmentPool(n, depth, exponent, modpow)
+            pool.start()
+            _shared[key] = pool
+            while len(_shared) > MAX_SHARED_POOLS:
+                evicted.append(_shared.popitem(last=False)[1])
+        _shared.move_to_end(key)
+    for old in evicted:
+        old.close()
+    return pool
+
+
+def close_commitment_pools():
+    """Close all shared pools, e.g. when a gateway is done with its identities"""
+    with _shared_lock:
+        pools = list(_shared.values())
+        _shared.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,184 @@
+"""
+Протокол Гиллу-Кискатра (Guillou-Quisquater).
+
+Открытые параметры: модуль n = p*q и простой показатель v. Закрытый ключ
+B, открытый ключ J = B^-v mod n. Раунд:
+    1. Доказывающий выбирает r и отправляет T = r^v mod n
+    2. Проверяющий отправляет вызов d, 0 <= d < v
+    3. Доказывающий отправляет D = r * B^d mod n
+    4. Проверяющий принимает, если D^v * J^d ≡ T (mod n)
+Вероятность обмана за раунд 1/v, поэтому при v > 2^128 достаточно одного
+раунда вместо десятков раундов Фиата-Шамира.
+"""
+
+from math import gcd
+import secrets
+import logging
+from protocols.wire import byte_length
+from protocols.modmath import CRTModulus, multi_pow
+from fiatshamir.precompute import get_commitment_pool
+
+logger = logging.getLogger('Guillou-Quisquater')
+
+# Простой показатель v по умолчанию: 2^128 + 51, вызов d из 128 битов
+GQ_EXPONENT = (1 << 128) + 51
+
+
+def gq_challenge_bits(v):
+    """Длина вызова d: равномерно из [0, 2^bits) с 2^bits <= v"""
+    return v.bit_length() - 1
+
+
+class GQKey:
+    """
+    Ключевой материал Гиллу-Кискатра
+
+    Может хранить разложение n = p*q: тогда r^v и B^d считаются по CRT,
+    что для показателей длиной 128 бит примерно вдвое быстрее.
+    """
+
+    __slots__ = ('private_key', 'public_key', 'v', 'n', 'crt')
+
+    def __init__(self, private_key, n, v=GQ_EXPONENT, p=None, q=None):
+        """
+        Args:
+            private_key (int): Закрытый ключ B
+            n (int): Модуль n
+            v (int): Простой открытый показатель
+            p, q (int): Множители n, если они известны
+        """
+        self.private_key = private_key
+        self.n = n
+        self.v = v
+        self.public_key = pow(private_key, -v, n)  # J = B^-v mod n
+        self.crt = CRTModulus(p, q) if p is not None and q is not None else None
+        if self.crt is not None and self.crt.n != n:
+            raise ValueError("p*q does not match the modulus")
+
+    def pow(self, base, exponent):
+        """base^exponent mod n, по CRT если разложение известно"""
+        if self.crt is not None:
+            return self.crt.pow(base, exponent)
+        return pow(base, exponent, self.n)
+
+
+def generate_gq_keys(n, v=GQ_EXPONENT):
+    """
+    Генерирует пару ключей Гиллу-Кискатра
+
+    Args:
+        n (int): Модуль n
+        v (int): Простой открытый показатель
+
+    Returns:
+        tuple: (B, J) - закрытый и открытый ключи, J = B^-v mod n
+    """
+    while True:
+        b = 2 + secrets.randbelow(n - 3)
+        if gcd(b, n) == 1:
+            break
+    return b, pow(b, -v, n)
+
+
+def generate_gq_key_material(bits=2048, v=GQ_EXPONENT, workers=None, pool=None):
+    """
+    Генерирует модуль Блюма и ключи Гиллу-Кискатра для него
+
+    Returns:
+        GQKey: Ключи вместе с p, q для вычислений по CRT
+    """
+    from protocols.primes import generate_blum_modulus
+
+    n, p, q = generate_blum_modulus(bits, workers, pool)
+    b, _ = generate_gq_keys(n, v)
+    return GQKey(b, n, v, p, q)
+
+
+def gq_prover_commit(key, precompute=False):
+    """Шаг 1: (r, T = r^v mod n)"""
+    if precompute:
+        return get_commitment_pool(key.n, key.v, modpow=key.pow).take()
+    r = 1 + secrets.randbelow(key.n - 1)
+    return r, key.pow(r, key.v)
+
+
+def gq_prover_respond(key, r, d):
+    """Шаг 3: D = r * B^d mod n"""
+    return (r * key.pow(key.private_key, d)) % key.n
+
+
+def gq_authenticate(key, rounds=1, precompute=False, connection=None):
+    """
+    Выполняет протокол Гиллу-Кискатра со стороны клиента
+
+    Args:
+        key (GQKey): Ключевой материал
+        rounds (int): Число раундов
+        precompute (bool): Брать пары (r, T) из фонового пула
+        connection (ZKPConnection): Соединение с сервером (по умолчанию -
+            открытое через connect_to_server())
+
+    Returns:
+        bool: True если аутентификация успешна, иначе False
+    """
+    if connection is None:
+        from client.client import default_connection
+        connection = default_connection()
+
+    width = byte_length(key.n)
+    try:
+        for round_no in range(rounds):
+            r, t = gq_prover_commit(key, precompute)
+            connection.send(t, width=width)
+
+            d_str = connection.receive()
+            if d_str is None or d_str == "":
+                logger.error("Failed to receive challenge (d) from server")
+                return False
+            if d_str == "AUTH_FAILED":
+                logger.warning(f"Authentication failed in round {round_no}")
+                return False
+            try:
+                d = int(d_str)
+            except (ValueError, TypeError):
+                logger.error(f"Received invalid challenge: {d_str}")
+                return False
+            if not 0 <= d < key.v:
+                logger.error(f"Challenge out of range: {d}")
+                return False
+
+            connection.send(gq_prover_respond(key, r, d), width=width)
+
+        result = connection.receive()
+        if result == "AUTH_SUCCESS":
+            logger.info("Authentication successful")
+            return True
+        logger.warning(f"Authentication failed: {result}")
+        return False
+
+    except Exception as e:
+        logger.exception(f"Error during Guillou-Quisquater authentication: {e}")
+        return False
+
+
+def gq_verify(commitment, response, public_key, v, n, d):
+    """
+    Проверка доказательства Гиллу-Кискатра со стороны сервера
+
+    D^v * J^d считается одним мультивозведением в степень (метод Штрауса):
+    квадрирования для обоих показателей общие.
+
+    Args:
+        commitment (int): T = r^v mod n
+        response (int): D = r * B^d mod n
+        public_key (int): Открытый ключ J
+        v (int): Открытый показатель
+        n (int): Модуль n
+        d (int): Отправленный вызов
+
+    Returns:
+        bool: True если D^v * J^d ≡ T (mod n)
+    """
+    if not 0 < commitment < n or not 0 < response < n or not 0 <= d < v:
+        return False
+    return multi_pow([response, public_key], [v, d], n) == commitment
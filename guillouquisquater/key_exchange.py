@@ -0,0 +1,92 @@
+"""
+Обмен ключами, привязанный к личности Гиллу-Кискатра.
+
+Клиент создаёт эфемерную долю Диффи-Хеллмана A = g^a в группе Шнорра
+сервера и подписывает её неинтерактивным доказательством Гиллу-Кискатра
+(вызов d - хеш от n, J, v, одноразового nonce сервера, A и T). Сервер
+проверяет подпись открытым ключом J той же личности, что проходит
+аутентификацию, отвечает своей долей B = g^b, и обе стороны получают
+K = g^ab. Ключи канала выводятся из K через HKDF с хешем всего обмена,
+поэтому подменить A или B незаметно нельзя.
+
+Сервер в обмене своей личности не доказывает: канал защищает от
+прослушивания и подмены сообщений клиента, но не от сервера-самозванца.
+"""
+
+import hashlib
+import secrets
+from protocols.wire import int_to_bytes, byte_length
+from protocols.stream_cipher import derive_key
+from guillouquisquater.authentication import gq_challenge_bits, gq_prover_commit, gq_prover_respond, gq_verify
+
+DOMAIN = b"zkp-gq-key-exchange/v1"
+
+
+def _hash_fields(*values):
+    """SHA-256 over integers/bytes, each prefixed with its length"""
+    h = hashlib.sha256(DOMAIN)
+    for value in values:
+        data = value if isinstance(value, bytes) else int_to_bytes(value)
+        h.update(len(data).to_bytes(4, 'big') + data)
+    return h.digest()
+
+
+def kx_challenge(n, public_key, v, nonce, share, commitment):
+    """Вызов d < 2^bits <= v для подписи доли A"""
+    digest = _hash_fields(n, public_key, v, nonce, share, commitment)
+    return int.from_bytes(digest, 'big') % (1 << gq_challenge_bits(v))
+
+
+def generate_share(group):
+    """Эфемерная пара (a, A = g^a mod p)"""
+    secret = 1 + secrets.randbelow(group.q - 1)
+    return secret, group.g_pow(secret)
+
+
+def shared_secret(group, secret, peer_share):
+    """
+    K = peer_share^secret mod p
+
+    Raises:
+        ValueError: Доля собеседника не лежит в подгруппе порядка q или равна 1
+    """
+    if peer_share == 1 or not group.is_element(peer_share):
+        raise ValueError("Invalid key share")
+    return int_to_bytes(pow(peer_share, secret, group.p), byte_length(group.p))
+
+
+def sign_share(key, nonce, share):
+    """
+    Подпись доли A ключом Гиллу-Кискатра
+
+    Args:
+        key (GQKey): Ключевой материал клиента
+        nonce (bytes): Одноразовый nonce сервера
+        share (int): Доля A
+
+    Returns:
+        tuple: (T, D)
+    """
+    r, t = gq_prover_commit(key)
+    d = kx_challenge(key.n, key.public_key, key.v, nonce, share, t)
+    return t, gq_prover_respond(key, r, d)
+
+
+def verify_share(public_key, v, n, nonce, share, commitment, response):
+    """Проверка подписи доли A открытым ключом J"""
+    d = kx_challenge(n, public_key, v, nonce, share, commitment)
+    return gq_verify(commitment, response, public_key, v, n, d)
+
+
+def derive_channel_keys(secret, n, public_key, v, nonce, client_share, server_share, commitment, response):
+    """
+    Ключи канала для обоих направлений
+
+    Returns:
+        tuple: (client_keys, server_keys) - пары (enc_key, mac_key) для
+        сообщений клиента серверу и сервера клиенту
+    """
+    transcript = _hash_fields(n, public_key, v, nonce, client_share, server_share, commitment, response)
+    keys = [derive_key(secret, b"zkp-channel/" + label + transcript)
+            for label in (b"c2s-enc", b"c2s-mac", b"s2c-enc", b"s2c-mac")]
+    return (keys[0], keys[1]), (keys[2], keys[3])
@@ -0,0 +1,142 @@
+"""
+Authenticated encryption of messages on an established connection.
+
+Each direction has its own encryption key, MAC key and 64-bit sequence
+number. A sealed message is
+
+    +-----------+------------+----------+
+    | seq (8)   | ciphertext | tag (16) |
+    +-----------+------------+----------+
+
+ciphertext = plaintext XOR SHAKE-256(enc_key || seq), and tag is keyed
+BLAKE2b over seq and ciphertext (encrypt-then-MAC). The receiver accepts
+only the next expected sequence number, so replayed, dropped or reordered
+messages are rejected. Only the standard library is used.
+
+Sealing writes the whole wire frame (see protocols/wire.py, MSG_SEALED)
+into a buffer owned by the channel, which grows to the largest message
+and is then reused: header, sequence number, ciphertext and tag are
+written in place instead of being concatenated into a new frame per
+message. The returned view is valid until the next seal(); send it
+before sealing again (hold `lock` if several threads send).
+
+Only the frame is preallocated. hashlib has no way to squeeze a digest
+into an existing buffer and Python has no in-place XOR of byte buffers,
+so every message still creates short-lived temporaries: the keystream,
+the integers of the XOR and its result, and the 16-byte tag (about four
+times the message size at peak). open() returns a new bytes object.
+"""
+
+import hmac
+import struct
+import hashlib
+import threading
+from protocols.wire import ProtocolError, MSG_SEALED, FRAME_HEADER_SIZE, pack_frame_header
+
+TAG_SIZE = 16
+_SEQ = struct.Struct('>Q')
+SEAL_OVERHEAD = _SEQ.size + TAG_SIZE
+MAX_SEQUENCE = (1 << 64) - 1
+
+
+class ChannelError(ProtocolError):
+    """Message failed authentication or arrived out of sequence"""
+
+
+class _Direction:
+    """Keys and sequence number of one direction"""
+
+    __slots__ = ('stream', 'mac', 'seq')
+
+    def __init__(self, enc_key, mac_key):
+        # Ключ уже поглощён: на сообщение остаётся copy() + номер
+        self.stream = hashlib.shake_256(b"zkp-channel-stream/v1" + enc_key)
+        self.mac = hashlib.blake2b(key=mac_key, digest_size=TAG_SIZE)
+        self.seq = 0
+
+    def keystream(self, seq_bytes, length):
+        stream = self.stream.copy()
+        stream.update(seq_bytes)
+        return stream.digest(length)
+
+    def tag(self, *parts):
+        mac = self.mac.copy()
+        for part in parts:
+            mac.update(part)
+        return mac.digest()
+
+
+def _xor(data, stream):
+    length = len(data)
+    return (int.from_bytes(data, 'little') ^ int.from_bytes(stream, 'little')).to_bytes(length, 'little')
+
+
+class SecureChannel:
+    """
+    One end of an encrypted, authenticated message channel
+
+    Args:
+        send_keys (tuple): (enc_key, mac_key) for messages this end sends
+        recv_keys (tuple): (enc_key, mac_key) for messages it receives
+    """
+
+    def __init__(self, send_keys, recv_keys, buffer_size=4096):
+        self._send = _Direction(*send_keys)
+        self._recv = _Direction(*recv_keys)
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self.lock = threading.Lock()
+
+    def seal(self, plaintext):
+        """
+        Encrypt a message into a complete MSG_SEALED frame
+
+        Returns:
+            memoryview: Frame bytes in the channel buffer (valid until the next seal)
+        """
+        direction = self._send
+        if direction.seq >= MAX_SEQUENCE:
+            raise ChannelError("Sequence numbers exhausted, establish a new channel")
+        length = len(plaintext)
+        end = FRAME_HEADER_SIZE + SEAL_OVERHEAD + length
+        if end > len(self._buffer):
+            # Буфер растёт до самого длинного сообщения и дальше переиспользуется
+            self._buffer = bytearray(max(end, 2 * len(self._buffer)))
+            self._view = memoryview(self._buffer)
+        view = self._view
+
+        seq_start = FRAME_HEADER_SIZE
+        body_start = seq_start + _SEQ.size
+        tag_start = body_start + length
+        pack_frame_header(view, SEAL_OVERHEAD + length, MSG_SEALED)
+        _SEQ.pack_into(view, seq_start, direction.seq)
+        seq_bytes = view[seq_start:body_start]
+        if length:
+            view[body_start:tag_start] = _xor(plaintext, direction.keystream(seq_bytes, length))
+        view[tag_start:end] = direction.tag(seq_bytes, view[body_start:tag_start])
+        direction.seq += 1
+        return view[:end]
+
+    def open(self, payload):
+        """
+        Authenticate and decrypt the payload of a MSG_SEALED frame
+
+        Returns:
+            bytes: Plaintext
+
+        Raises:
+            ChannelError: Bad tag or unexpected sequence number
+        """
+        direction = self._recv
+        if len(payload) < SEAL_OVERHEAD:
+            raise ChannelError("Truncated sealed message")
+        payload = memoryview(payload)
+        seq_bytes = payload[:_SEQ.size]
+        body = payload[_SEQ.size:-TAG_SIZE]
+        if not hmac.compare_digest(payload[-TAG_SIZE:], direction.tag(seq_bytes, body)):
+            raise ChannelError("Sealed message failed authentication")
+        (seq,) = _SEQ.unpack(seq_bytes)
+        if seq != direction.seq:
+            raise ChannelError(f"Unexpected sequence number {seq}, expected {direction.seq}")
+        direction.seq += 1
+        return _xor(body, direction.keystream(seq_bytes, len(body))) if len(body) else b""
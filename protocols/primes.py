@@ -0,0 +1,350 @@
+"""
+Blum-integer moduli for Fiat-Shamir.
+
+n = p*q with p ≡ q ≡ 3 (mod 4). Primes are found by an incremental search:
+a window of candidates start, start+4, ... is sieved against all small
+primes at once, and only the survivors get Miller-Rabin. Several searches run in parallel on a process
+pool, and primes can be generated ahead of time into an on-disk pool.
+
+Usage:
+    python protocols/primes.py --bits 2048
+    python protocols/primes.py --bits 2048 --fill 16 --pool primes.json
+"""
+
+import os
+import sys
+import json
+import math
+import secrets
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+def _sieve(limit):
+    """Primes below limit (sieve of Eratosthenes)"""
+    flags = bytearray([1]) * limit
+    flags[0:2] = b'\x00\x00'
+    for i in range(2, math.isqrt(limit - 1) + 1):
+        if flags[i]:
+            flags[i * i::i] = bytes(len(range(i * i, limit, i)))
+    return [i for i in range(limit) if flags[i]]
+
+
+SMALL_PRIMES = _sieve(2048)
+_ODD_SMALL_PRIMES = SMALL_PRIMES[1:]
+
+
+def _miller_rabin_rounds(bits):
+    """
+    Rounds for an error probability below 2^-80 on random candidates
+    (Damgard-Landrock-Pomerance bounds, as used by OpenSSL)
+    """
+    if bits >= 1300:
+        return 2
+    if bits >= 850:
+        return 3
+    if bits >= 650:
+        return 4
+    if bits >= 350:
+        return 8
+    if bits >= 250:
+        return 12
+    if bits >= 150:
+        return 18
+    return 27
+
+
+def is_probable_prime(n, rounds=None):
+    """
+    Miller-Rabin primality test with small-prime trial division
+
+    Args:
+        n (int): Number to test
+        rounds (int): Miller-Rabin rounds with random bases
+            (default: enough for random candidates of this size)
+
+    Returns:
+        bool: False if n is composite, True if n is prime with high probability
+    """
+    if n < 2:
+        return False
+    for p in SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+    if n < SMALL_PRIMES[-1] ** 2:
+        return True
+    return _miller_rabin(n, rounds or _miller_rabin_rounds(n.bit_length()))
+
+
+def _miller_rabin(n, rounds):
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    for _ in range(rounds):
+        a = 2 + secrets.randbelow(n - 3)
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _search_blum_prime(bits, seed=None, max_steps=None):
+    """
+    Incremental search for a prime p ≡ 3 (mod 4) of exactly `bits` bits
+
+    The search starts at a random candidate with the two top bits set (so
+    a product of two such primes has exactly 2*bits bits) and walks in
+    steps of 4. The whole window of max_steps candidates is sieved at
+    once; returns None if no prime was found in it.
+    """
+    rand = int.from_bytes(seed, 'big') if seed is not None else secrets.randbits(bits)
+    start = (rand % (1 << bits)) | (3 << (bits - 2)) | 3
+    max_steps = max_steps or 4 * bits
+
+    # survivors[j] == 0: start + 4j делится на малое простое
+    survivors = bytearray([1]) * max_steps
+    for p in _ODD_SMALL_PRIMES:
+        # start + 4j ≡ 0 (mod p)  <=>  j ≡ -start * 4^-1 (mod p)
+        j = (-start * pow(4, -1, p)) % p
+        if start + 4 * j == p:
+            j += p  # Кандидат - само малое простое (модули до ~22 бит)
+        survivors[j::p] = bytes(len(range(j, max_steps, p)))
+
+    rounds = _miller_rabin_rounds(bits)
+    j = survivors.find(1)
+    while j != -1:
+        candidate = start + 4 * j
+        if candidate.bit_length() > bits:
+            return None
+        if _miller_rabin(candidate, rounds):
+            return candidate
+        j = survivors.find(1, j + 1)
+    return None
+
+
+def random_blum_prime(bits):
+    """Random prime p ≡ 3 (mod 4) of exactly `bits` bits (single process)"""
+    while True:
+        p = _search_blum_prime(bits)
+        if p is not None:
+            return p
+
+
+def generate_blum_primes(bits, count, workers=None, executor=None):
+    """
+    Find `count` distinct Blum primes of `bits` bits
+
+    Args:
+        bits (int): Size of each prime
+        count (int): Number of primes
+        workers (int): Parallel searches (default: number of CPUs; 1 - in-process)
+        executor: Existing ProcessPoolExecutor to run the searches on
+
+    Returns:
+        list: Primes
+    """
+    workers = workers or os.cpu_count() or 1
+    primes = []
+    if workers <= 1 and executor is None:
+        while len(primes) < count:
+            p = random_blum_prime(bits)
+            if p not in primes:
+                primes.append(p)
+        return primes
+
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    submit = lambda: pool.submit(_search_blum_prime, bits, secrets.token_bytes(bits // 8 + 1))
+    try:
+        pending = {submit() for _ in range(max(workers, count))}
+        while len(primes) < count:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                p = future.result()
+                if p is not None and p not in primes and len(primes) < count:
+                    primes.append(p)
+                if len(primes) < count:
+                    pending.add(submit())  # Держим все процессы занятыми
+        for future in pending:
+            future.cancel()
+    finally:
+        if executor is None:
+            pool.shutdown(wait=False, cancel_futures=True)
+    return primes
+
+
+class PrimePool:
+    """
+    On-disk stock of pre-generated Blum primes.
+
+    Primes are secret and single-use: take() removes them from the file.
+    The file is a JSON object {bits: [hex, ...]} created with mode 0600 and
+    updated under an exclusive lock where fcntl is available.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _update(self, change):
+        """Apply change(data) to the pool file under an exclusive lock"""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, 'r+') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            text = f.read()
+            data = json.loads(text) if text.strip() else {}
+            result = change(data)
+            f.seek(0)
+            f.truncate()
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        return result
+
+    def fill(self, bits, count, workers=None):
+        """Generate `count` more primes of `bits` bits into the pool"""
+        primes = generate_blum_primes(bits, count, workers)
+        self._update(lambda data: data.setdefault(str(bits), []).extend(format(p, 'x') for p in primes))
+        return len(primes)
+
+    def take(self, bits, count):
+        """Remove and return up to `count` primes of `bits` bits"""
+        def pop(data):
+            stock = data.get(str(bits), [])
+            taken, data[str(bits)] = stock[:count], stock[count:]
+            return [int(p, 16) for p in taken]
+        return self._update(pop)
+
+    def available(self, bits):
+        try:
+            with open(self.path) as f:
+                return len(json.load(f).get(str(bits), []))
+        except (OSError, ValueError):
+            return 0
+
+
+def generate_blum_modulus(bits=2048, workers=None, pool=None):
+    """
+    Generate a Blum integer n = p*q with p ≡ q ≡ 3 (mod 4)
+
+    Args:
+        bits (int): Size of n (1024-4096 in practice), even
+        workers (int): Parallel prime searches (default: number of CPUs)
+        pool (PrimePool or str): Pre-generated primes to use first
+
+    Returns:
+        tuple: (n, p, q)
+    """
+    if bits < 16 or bits % 2:
+        raise ValueError("Modulus size must be an even number of bits >= 16")
+    half = bits // 2
+    if isinstance(pool, str):
+        pool = PrimePool(pool)
+
+    primes = pool.take(half, 2) if pool is not None else []
+    while len(primes) < 2:
+        for p in generate_blum_primes(half, 2 - len(primes), workers):
+            if p not in primes:
+                primes.append(p)
+    p, q = primes
+    return p * q, p, q
+
+
+def _search_lim_lee(q, p_bits, seed=None, max_steps=None):
+    """
+    Search a window for a prime p = 2*q*h + 1 with h prime
+
+    Both h and p are sieved against the small primes over the whole
+    window before any Miller-Rabin test; p is tested first since most
+    survivors fail there. Returns (p, h) or None.
+    """
+    h_bits = p_bits - q.bit_length() - 1
+    rand = int.from_bytes(seed, 'big') if seed is not None else secrets.randbits(h_bits)
+    # Два старших бита h: тогда 2qh + 1 ровно p_bits битов, если у q они тоже есть
+    start = (rand % (1 << h_bits)) | (3 << (h_bits - 2)) | 1
+    max_steps = max_steps or 16 * p_bits
+    two_q = 2 * q
+
+    # h = start + 2j; исключаем j, при которых h или 2qh + 1 делится на малое простое
+    survivors = bytearray([1]) * max_steps
+    for ell in _ODD_SMALL_PRIMES:
+        inv2 = pow(2, -1, ell)
+        j = (-start * inv2) % ell
+        survivors[j::ell] = bytes(len(range(j, max_steps, ell)))
+        if two_q % ell:
+            j = ((-pow(two_q, -1, ell) - start) * inv2) % ell
+            survivors[j::ell] = bytes(len(range(j, max_steps, ell)))
+
+    rounds_p = _miller_rabin_rounds(p_bits)
+    rounds_h = _miller_rabin_rounds(h_bits)
+    j = survivors.find(1)
+    while j != -1:
+        h = start + 2 * j
+        p = two_q * h + 1
+        if p.bit_length() == p_bits and _miller_rabin(p, rounds_p) and _miller_rabin(h, rounds_h):
+            return p, h
+        j = survivors.find(1, j + 1)
+    return None
+
+
+def generate_lim_lee_prime(q, p_bits=2048, workers=None):
+    """
+    Prime p = 2*q*h + 1 with h prime (a Lim-Lee prime)
+
+    Apart from 2, every prime factor of p-1 is at least as large as q, so
+    Z_p* has no small subgroups except {1, -1}. Randomized batch checks in
+    the order-q subgroup rely on this.
+
+    Returns:
+        tuple: (p, h)
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        while True:
+            found = _search_lim_lee(q, p_bits)
+            if found is not None:
+                return found
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        submit = lambda: pool.submit(_search_lim_lee, q, p_bits, secrets.token_bytes(p_bits // 8))
+        pending = {submit() for _ in range(workers)}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                found = future.result()
+                if found is not None:
+                    for other in pending:
+                        other.cancel()
+                    return found
+                pending.add(submit())
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Blum modulus generator')
+    parser.add_argument('--bits', type=int, default=2048, help='Modulus size in bits (default: 2048)')
+    parser.add_argument('--workers', type=int, default=None, help='Parallel searches (default: CPU count)')
+    parser.add_argument('--pool', help='Prime pool file')
+    parser.add_argument('--fill', type=int, default=0, help='Add this many primes of bits/2 bits to the pool')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    if args.fill:
+        if not args.pool:
+            sys.exit("--fill requires --pool")
+        added = PrimePool(args.pool).fill(args.bits // 2, args.fill, args.workers)
+        print(f"Added {added} primes of {args.bits // 2} bits to {args.pool}")
+    else:
+        n, p, q = generate_blum_modulus(args.bits, args.workers, args.pool)
+        print(n)
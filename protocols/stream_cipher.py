@@ -0,0 +1,61 @@
+"""
+Stream cipher and key derivation from the standard library only.
+
+The keystream of chunk i is SHAKE-256(domain || key || nonce || i),
+squeezed to the chunk length, and is XORed with the data. Every chunk
+has its own keystream, so chunks can be processed in any order and in
+parallel. The cipher gives confidentiality only: callers must
+authenticate the ciphertext (encrypt-then-MAC, see server/file_crypto.py).
+A (key, nonce) pair must never be used for two different messages.
+"""
+
+import hmac
+import struct
+import hashlib
+
+DOMAIN = b"zkp-shake-stream/v1"
+KEY_SIZE = 32
+NONCE_SIZE = 16
+
+
+def derive_key(secret, info, length=KEY_SIZE, salt=b""):
+    """
+    HKDF-SHA256 (RFC 5869)
+
+    Args:
+        secret (bytes): Input keying material
+        info (bytes or str): Purpose of the key; different purposes give
+            independent keys
+        length (int): Output size in bytes
+        salt (bytes): Optional salt
+
+    Returns:
+        bytes: Derived key
+    """
+    if isinstance(info, str):
+        info = info.encode('utf-8')
+    prk = hmac.new(salt or bytes(32), secret, hashlib.sha256).digest()
+    output, block = b"", b""
+    for counter in range(1, -(-length // 32) + 1):
+        block = hmac.new(prk, block + info + bytes([counter]), hashlib.sha256).digest()
+        output += block
+    return output[:length]
+
+
+def keystream(key, nonce, index, length):
+    """Keystream of chunk `index`"""
+    return hashlib.shake_256(DOMAIN + key + nonce + struct.pack('>Q', index)).digest(length)
+
+
+def xor_chunk(key, nonce, index, data):
+    """
+    Encrypt or decrypt one chunk
+
+    The XOR is done on two big integers: for chunks of a few hundred KB
+    and more this is far faster than a per-byte loop.
+    """
+    length = len(data)
+    if not length:
+        return b""
+    stream = keystream(key, nonce, index, length)
+    return (int.from_bytes(data, 'little') ^ int.from_bytes(stream, 'little')).to_bytes(length, 'little')
@@ -0,0 +1,83 @@
+"""
+Hashed challenges for the non-interactive Fiat-Shamir mode.
+
+The prover cannot see the verifier's random challenges, so they are
+derived from a SHA-256 hash of everything the verifier would have known
+at that point: the modulus, the public keys, a single-use server nonce,
+an application context string and all commitments x_1..x_t.
+"""
+
+import hashlib
+import struct
+from protocols.wire import byte_length, int_to_bytes
+
+DOMAIN = b"zkp-fiat-shamir-ni/v1"
+
+# Минимальная суммарная стойкость k*t для неинтерактивного режима
+NI_SECURITY_BITS = 128
+
+
+def _field(data):
+    return struct.pack('>I', len(data)) + data
+
+
+def derive_challenges(n, public_keys, commitments, nonce, context, k):
+    """
+    Derive one k-bit challenge mask per commitment
+
+    Args:
+        n (int): Modulus
+        public_keys (list): Public keys v_1..v_k
+        commitments (list): Commitments x_1..x_t
+        nonce (bytes): Server nonce
+        context (str or bytes): Application context (e.g. "login")
+        k (int): Bits per challenge (number of keys)
+
+    Returns:
+        list: t integers, each a k-bit challenge mask
+    """
+    if isinstance(context, str):
+        context = context.encode('utf-8')
+    width = byte_length(n)
+
+    h = hashlib.sha256(DOMAIN)
+    h.update(_field(int_to_bytes(n, width)))
+    h.update(struct.pack('>I', len(public_keys)))
+    for v in public_keys:
+        h.update(int_to_bytes(v % n, width))
+    h.update(_field(nonce))
+    h.update(_field(context))
+    h.update(struct.pack('>I', len(commitments)))
+    for x in commitments:
+        h.update(int_to_bytes(x % n, width))
+    seed = h.digest()
+
+    # Расширяем хэш до t*k бит в режиме счётчика
+    total_bits = len(commitments) * k
+    stream = b''.join(
+        hashlib.sha256(seed + struct.pack('>I', counter)).digest()
+        for counter in range((total_bits + 255) // 256)
+    )
+    bits = int.from_bytes(stream, 'big')
+    mask = (1 << k) - 1
+    return [(bits >> (i * k)) & mask for i in range(len(commitments))]
+
+
+def encode_proof(commitments, responses):
+    """Proof as a JSON-friendly dict; integers are hex so large moduli stay linear-time"""
+    return {
+        "commitments": [format(x, 'x') for x in commitments],
+        "responses": [format(y, 'x') for y in responses],
+    }
+
+
+def decode_proof(data):
+    """Inverse of encode_proof; raises ValueError on malformed input"""
+    try:
+        commitments = [int(x, 16) for x in data["commitments"]]
+        responses = [int(y, 16) for y in data["responses"]]
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Malformed proof: {e}")
+    if len(commitments) != len(responses):
+        raise ValueError("Proof has mismatched commitments and responses")
+    return commitments, responses
@@ -0,0 +1,204 @@
+"""
+Wire protocol shared by the ZKP client and server.
+
+Two formats are supported on a connection:
+
+* legacy  - bare UTF-8 strings, one message per recv(); integers are sent
+            as decimal text. Kept for old clients and servers.
+* framed  - every message is a frame
+
+                +----------------+---------+------+-----------+
+                | length (4, BE) | version | type |  payload  |
+                +----------------+---------+------+-----------+
+
+            where length counts the bytes after itself. Integers are sent
+            as fixed-width big-endian bytes, so large moduli need no
+            decimal conversion.
+
+A connection always starts in legacy mode. The client offers framing with
+a legacy JSON hello; a server that understands it answers with the chosen
+version and both sides switch. Any other answer means "stay legacy".
+"""
+
+import json
+import struct
+
+WIRE_VERSION = 1
+SUPPORTED_VERSIONS = (WIRE_VERSION,)
+
+# Типы сообщений
+MSG_TEXT = 0x01        # UTF-8 строка (JSON, AUTH_SUCCESS, ...)
+MSG_INT = 0x02         # одно целое число, big-endian
+MSG_INT_VECTOR = 0x03  # вектор целых: ширина (2 байта) + числа одинаковой ширины
+MSG_SEALED = 0x04      # сообщение защищённого канала (protocols/channel.py)
+
+MAX_FRAME_SIZE = 1 << 20
+
+_HEADER = struct.Struct('>IBB')
+_WIDTH = struct.Struct('>H')
+FRAME_HEADER_SIZE = _HEADER.size
+
+
+class ProtocolError(ValueError):
+    """Malformed frame or unsupported wire version"""
+
+
+class SealedMessage(bytes):
+    """Payload of a MSG_SEALED frame, still encrypted"""
+
+
+def byte_length(n):
+    """Number of bytes needed to hold any value modulo n"""
+    return max(1, (n.bit_length() + 7) // 8)
+
+
+def int_to_bytes(value, width=None):
+    """Encode a non-negative integer as big-endian bytes of the given width"""
+    if width is None:
+        width = byte_length(value)
+    return value.to_bytes(width, 'big')
+
+
+def bytes_to_int(data):
+    """Decode big-endian bytes into an integer"""
+    return int.from_bytes(data, 'big')
+
+
+def _frame(msg_type, payload):
+    return _HEADER.pack(len(payload) + 2, WIRE_VERSION, msg_type) + payload
+
+
+def pack_frame_header(buffer, payload_length, msg_type):
+    """Write a frame header into the start of buffer (for frames built in place)"""
+    _HEADER.pack_into(buffer, 0, payload_length + 2, WIRE_VERSION, msg_type)
+
+
+
+def encode_frame(message, width=None):
+    """
+    Encode a message as a frame.
+
+    Args:
+        message: str, int or list/tuple of ints
+        width (int): Byte width for integers (e.g. byte_length(n));
+            the minimal width is used if omitted or too small
+
+    Returns:
+        bytes: Encoded frame
+    """
+    if isinstance(message, bool):
+        message = str(message)
+    if isinstance(message, int):
+        size = byte_length(message)
+        return _frame(MSG_INT, int_to_bytes(message, max(size, width or 0)))
+    if isinstance(message, (list, tuple)):
+        size = max((byte_length(v) for v in message), default=1)
+        size = max(size, width or 0)
+        payload = _WIDTH.pack(size) + b''.join(int_to_bytes(v, size) for v in message)
+        return _frame(MSG_INT_VECTOR, payload)
+    if isinstance(message, bytes):
+        message = message.decode('utf-8')
+    return _frame(MSG_TEXT, str(message).encode('utf-8'))
+
+
+def decode_payload(msg_type, payload):
+    """Decode the payload of a frame into a Python value"""
+    if msg_type == MSG_TEXT:
+        return payload.decode('utf-8')
+    if msg_type == MSG_INT:
+        return bytes_to_int(payload)
+    if msg_type == MSG_SEALED:
+        return SealedMessage(payload)
+    if msg_type == MSG_INT_VECTOR:
+        if len(payload) < _WIDTH.size:
+            raise ProtocolError("Truncated integer vector")
+        (width,) = _WIDTH.unpack_from(payload)
+        body = memoryview(payload)[_WIDTH.size:]
+        if width == 0 or len(body) % width:
+            raise ProtocolError("Bad integer vector width")
+        return [bytes_to_int(body[i:i + width]) for i in range(0, len(body), width)]
+    raise ProtocolError(f"Unknown message type: {msg_type}")
+
+
+class LegacyCodec:
+    """Legacy text format: one message per received chunk"""
+
+    framed = False
+
+    def feed(self, data):
+        """Return the messages contained in newly received data"""
+        return [data.decode('utf-8')] if data else []
+
+    def encode(self, message, width=None):
+        if isinstance(message, (list, tuple)):
+            message = json.dumps(list(message))
+        if isinstance(message, bytes):
+            return message
+        return str(message).encode('utf-8')
+
+
+class FramedCodec:
+    """Length-prefixed framing; tolerates split and merged reads"""
+
+    framed = True
+
+    def __init__(self, max_frame_size=MAX_FRAME_SIZE):
+        self._buffer = bytearray()
+        self.max_frame_size = max_frame_size
+
+    def feed(self, data):
+        """Buffer received data and return every complete message"""
+        self._buffer += data
+        messages = []
+        buffer = self._buffer
+        offset = 0
+        while len(buffer) - offset >= _HEADER.size:
+            length, version, msg_type = _HEADER.unpack_from(buffer, offset)
+            if length < 2 or length > self.max_frame_size:
+                raise ProtocolError(f"Invalid frame length: {length}")
+            if version not in SUPPORTED_VERSIONS:
+                raise ProtocolError(f"Unsupported wire version: {version}")
+            end = offset + 4 + length
+            if end > len(buffer):
+                break
+            messages.append(decode_payload(msg_type, bytes(buffer[offset + _HEADER.size:end])))
+            offset = end
+        if offset:
+            del buffer[:offset]
+        return messages
+
+    def encode(self, message, width=None):
+        return encode_frame(message, width)
+
+
+def hello_request():
+    """Legacy-format message a client sends to offer framing"""
+    return json.dumps({"action": "hello", "wire_versions": list(SUPPORTED_VERSIONS)})
+
+
+def hello_reply(offered, **extra):
+    """
+    Server reply to a hello.
+
+    Args:
+        offered (list): Versions offered by the client
+        **extra: Additional fields for the reply (e.g. a nonce)
+
+    Returns:
+        tuple: (reply text, chosen version or None)
+    """
+    common = [v for v in SUPPORTED_VERSIONS if v in (offered or [])]
+    version = max(common) if common else None
+    return json.dumps({"action": "hello", "wire_version": version, **extra}), version
+
+
+def parse_hello_reply(message):
+    """Return the version chosen by the server, or None to stay legacy"""
+    try:
+        data = json.loads(message)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    if not isinstance(data, dict) or data.get("action") != "hello":
+        return None
+    version = data.get("wire_version")
+    return version if version in SUPPORTED_VERSIONS else None
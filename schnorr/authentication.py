@@ -0,0 +1,339 @@
+"""
+Протокол идентификации Шнорра (Schnorr).
+
+Открытые параметры: простое p, простое q | p-1 и генератор g подгруппы
+порядка q. Закрытый ключ x, открытый ключ y = g^x mod p. Раунд:
+    1. Доказывающий выбирает r и отправляет t = g^r mod p
+    2. Проверяющий отправляет вызов c из 128 битов
+    3. Доказывающий отправляет s = r + c*x mod q
+    4. Проверяющий принимает, если g^s ≡ t * y^c (mod p)
+
+Каждая проверка возводит в степень одно и то же g, поэтому g^s считается
+по таблице фиксированного основания (только умножения, без квадрирований),
+которая строится один раз на группу. Много проверок сразу можно
+объединить в одну случайную линейную комбинацию (schnorr_verify_batch).
+"""
+
+import secrets
+import logging
+import threading
+from protocols.wire import byte_length
+from protocols.modmath import multi_pow
+
+logger = logging.getLogger('Schnorr')
+
+# Длина вызова c: вероятность обмана 2^-128 за один раунд
+SCHNORR_CHALLENGE_BITS = 128
+# Вероятность принять пакет с неверной проверкой не больше 2^-BATCH_SECURITY_BITS
+BATCH_SECURITY_BITS = 64
+DEFAULT_TABLE_WINDOW = 6
+
+
+class FixedBaseTable:
+    """
+    Таблица степеней фиксированного основания
+
+    rows[i][d] = base^(d * 2^(window*i)) mod modulus, поэтому base^e для
+    e < 2^max_bits - произведение не более ceil(max_bits/window) элементов
+    таблицы. Для 256-битных показателей и окна 6 это 43 умножения вместо
+    ~300 умножений и квадрирований pow().
+    """
+
+    __slots__ = ('base', 'modulus', 'window', 'max_bits', '_rows')
+
+    def __init__(self, base, modulus, max_bits, window=DEFAULT_TABLE_WINDOW):
+        """
+        Args:
+            base (int): Фиксированное основание
+            modulus (int): Модуль
+            max_bits (int): Максимальная длина показателя
+            window (int): Ширина окна в битах (память - 2^window чисел на строку)
+        """
+        self.base = base % modulus
+        self.modulus = modulus
+        self.window = window
+        self.max_bits = max_bits
+        rows = []
+        b = self.base
+        for _ in range(-(-max_bits // window)):
+            row = [1, b]
+            for _ in range((1 << window) - 2):
+                row.append(row[-1] * b % modulus)
+            rows.append(row)
+            b = row[-1] * b % modulus  # b^(2^window)
+        self._rows = rows
+
+    def pow(self, exponent):
+        """base^exponent mod modulus"""
+        if exponent < 0 or exponent.bit_length() > self.max_bits:
+            return pow(self.base, exponent, self.modulus)
+        modulus = self.modulus
+        mask = (1 << self.window) - 1
+        result = 1
+        for row in self._rows:
+            if not exponent:
+                break
+            digit = exponent & mask
+            if digit:
+                result = result * row[digit] % modulus
+            exponent >>= self.window
+        return result
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def fixed_base_table(base, modulus, max_bits, window=DEFAULT_TABLE_WINDOW):
+    """Общая таблица FixedBaseTable для (base, modulus), строится при первом обращении"""
+    key = (base, modulus, max_bits, window)
+    table = _tables.get(key)
+    if table is None:
+        with _tables_lock:
+            table = _tables.get(key)
+            if table is None:
+                table = FixedBaseTable(base, modulus, max_bits, window)
+                _tables[key] = table
+    return table
+
+
+class SchnorrGroup:
+    """Параметры группы (p, q, g): g порождает подгруппу порядка q в Z_p*"""
+
+    __slots__ = ('p', 'q', 'g')
+
+    def __init__(self, p, q, g):
+        if (p - 1) % q or not 1 < g < p or pow(g, q, p) != 1:
+            raise ValueError("g does not generate a subgroup of order q")
+        self.p = p
+        self.q = q
+        self.g = g
+
+    def table(self):
+        """Таблица фиксированного основания для g"""
+        return fixed_base_table(self.g, self.p, self.q.bit_length())
+
+    def g_pow(self, exponent):
+        """g^exponent mod p по таблице"""
+        return self.table().pow(exponent % self.q)
+
+    def is_element(self, y):
+        """y лежит в подгруппе порядка q"""
+        return 1 < y < self.p and pow(y, self.q, self.p) == 1
+
+    def __eq__(self, other):
+        return isinstance(other, SchnorrGroup) and (self.p, self.q, self.g) == (other.p, other.q, other.g)
+
+    def __hash__(self):
+        return hash((self.p, self.q, self.g))
+
+
+# 2048-битное простое Лима-Ли p = 2*q*h + 1 (q и h простые), q из 256 битов.
+# Кроме {1, -1} в Z_p* нет подгрупп малого порядка, что нужно для пакетной проверки.
+DEFAULT_GROUP = SchnorrGroup(
+    p=int(
+        '9f20a2a99220a9629514c63356c775a2bba1355d651c35b22b4191c5ac4fb2fe'
+        '5d61b66f8c007c5c3b337fdc647701585a47de4c3dba6c4b8f304adc1d89abd6'
+        '97cc67576325c15d915d0fa60fb4e927f8eb73c5e8ede7f3aaaefb4500fbbdbc'
+        '128e9e39091fcc6f4523f47f4ab59b928c359f7f9997d847f9eee0e721f43120'
+        '3b02cb9fe8b895ad7f763b0176003016bf3ba9842a2c5440ec3a2a005bb80579'
+        'bebbe5278f9e76467fa9d327b801ec6aa0fbb97ce4997fc167045a5b3bdcebc0'
+        '12821c3ac115a5b8dd3b05286e0cdd385d56d75c7f3222b67043531e13a5ba95'
+        'e8c30cce33670d604e9738ce975f4add50659214bbba891b5d5badc4e58b1f4f', 16),
+    q=0xf572e9667eb1d7f486ecaaf5e2a9a5ffa137bdc163cda534a2c1e6e7f094bac7,
+    g=int(
+        '20b347a2f468e2671b70259b16761272aee9d95bab84fab834c08d04f65c9df7'
+        'fbcb68cb8b1a36b601b3b4a866a7b0acb445809e51fedfae2e18639e9a189348'
+        'e3c1f65b54d33c3e6da5f38d8216a1b397bcbd364601e49d9bc3fde4ee0e1712'
+        '7da5d63c46d2395ee2796df75a4e1b61bcd56cc609f1b07eeb9066a7ec3fbd85'
+        '684fdafa92e6da13901f297a92862b16aa7a130913d40d4f3c551a436672932b'
+        '1b1ec829d05e63d8fee5ac29cb849a16359c430b589762a0986e35eb218f7269'
+        '9d1f1d9c6c5003a0e8c03d16f234a9d7217dac0f717ae5e127f8e6397ecb58f9'
+        '53a6c4e9fe51cd428a7f4c16d6a6901ff38a99c009418c9b596dcb187675121f', 16),
+)
+
+
+def generate_schnorr_group(p_bits=2048, q_bits=256, workers=None):
+    """
+    Генерирует новую группу Шнорра на простом Лима-Ли
+
+    Returns:
+        SchnorrGroup: Группа с g порядка q
+    """
+    from protocols.primes import random_blum_prime, generate_lim_lee_prime
+
+    q = random_blum_prime(q_bits)
+    p, h = generate_lim_lee_prime(q, p_bits, workers)
+    while True:
+        g = pow(2 + secrets.randbelow(p - 3), 2 * h, p)
+        if g != 1:
+            return SchnorrGroup(p, q, g)
+
+
+def generate_schnorr_keys(group=DEFAULT_GROUP):
+    """
+    Генерирует пару ключей Шнорра
+
+    Returns:
+        tuple: (x, y) - закрытый и открытый ключи, y = g^x mod p
+    """
+    x = 1 + secrets.randbelow(group.q - 1)
+    return x, group.g_pow(x)
+
+
+def schnorr_prover_commit(group=DEFAULT_GROUP):
+    """Шаг 1: (r, t = g^r mod p)"""
+    r = 1 + secrets.randbelow(group.q - 1)
+    return r, group.g_pow(r)
+
+
+def schnorr_prover_respond(private_key, r, c, group=DEFAULT_GROUP):
+    """Шаг 3: s = r + c*x mod q"""
+    return (r + c * private_key) % group.q
+
+
+def schnorr_authenticate(private_key, group=DEFAULT_GROUP, rounds=1, connection=None):
+    """
+    Выполняет протокол Шнорра со стороны клиента
+
+    Args:
+        private_key (int): Закрытый ключ x
+        group (SchnorrGroup): Параметры группы
+        rounds (int): Число раундов
+        connection (ZKPConnection): Соединение с сервером (по умолчанию -
+            открытое через connect_to_server())
+
+    Returns:
+        bool: True если аутентификация успешна, иначе False
+    """
+    if connection is None:
+        from client.client import default_connection
+        connection = default_connection()
+
+    width = byte_length(group.p)
+    try:
+        for round_no in range(rounds):
+            r, t = schnorr_prover_commit(group)
+            connection.send(t, width=width)
+
+            c_str = connection.receive()
+            if c_str is None or c_str == "":
+                logger.error("Failed to receive challenge (c) from server")
+                return False
+            if c_str == "AUTH_FAILED":
+                logger.warning(f"Authentication failed in round {round_no}")
+                return False
+            try:
+                c = int(c_str)
+            except (ValueError, TypeError):
+                logger.error(f"Received invalid challenge: {c_str}")
+                return False
+            if not 0 <= c < 1 << SCHNORR_CHALLENGE_BITS:
+                logger.error(f"Challenge out of range: {c}")
+                return False
+
+            connection.send(schnorr_prover_respond(private_key, r, c, group), width=byte_length(group.q))
+
+        result = connection.receive()
+        if result == "AUTH_SUCCESS":
+            logger.info("Authentication successful")
+            return True
+        logger.warning(f"Authentication failed: {result}")
+        return False
+
+    except Exception as e:
+        logger.exception(f"Error during Schnorr authentication: {e}")
+        return False
+
+
+def _in_range(commitment, response, challenge, group):
+    return 0 < commitment < group.p and 0 <= response < group.q and 0 <= challenge < 1 << SCHNORR_CHALLENGE_BITS
+
+
+def schnorr_verify(commitment, response, public_key, challenge, group=DEFAULT_GROUP):
+    """
+    Проверка доказательства Шнорра со стороны сервера
+
+    Открытый ключ должен быть заранее проверен на принадлежность
+    подгруппе (SchnorrGroup.is_element).
+
+    Args:
+        commitment (int): t = g^r mod p
+        response (int): s = r + c*x mod q
+        public_key (int): Открытый ключ y
+        challenge (int): Отправленный вызов c
+        group (SchnorrGroup): Параметры группы
+
+    Returns:
+        bool: True если g^s ≡ t * y^c (mod p)
+    """
+    if not _in_range(commitment, response, challenge, group):
+        return False
+    p = group.p
+    return group.g_pow(response) == commitment * pow(public_key, challenge, p) % p
+
+
+def _batch_holds(items, group, security_bits):
+    """
+    Случайная линейная комбинация проверок:
+        g^(sum a_i*s_i) ≡ prod t_i^a_i * y_i^(a_i*c_i)   (mod p)
+    Обе части возводятся в квадрат, чтобы убрать компоненту порядка 2:
+    в группе Лима-Ли других подгрупп малого порядка нет, поэтому пакет
+    с неверным (с точностью до знака t) элементом проходит с вероятностью
+    не больше 2^-security_bits.
+    """
+    p, q = group.p, group.q
+    total = 0
+    bases, exponents = [], []
+    y_exponents = {}
+    for commitment, response, public_key, challenge in items:
+        a = secrets.randbits(security_bits) | 1
+        total += a * response
+        bases.append(commitment)
+        exponents.append(a)
+        # Показатели одного и того же y складываются: одна база вместо многих
+        y_exponents[public_key] = y_exponents.get(public_key, 0) + a * challenge
+    bases.extend(y_exponents)
+    exponents.extend(y_exponents.values())
+    left = group.g_pow(total % q)
+    right = multi_pow(bases, exponents, p)
+    return left * left % p == right * right % p
+
+
+def schnorr_verify_batch(transcripts, group=DEFAULT_GROUP, security_bits=BATCH_SECURITY_BITS):
+    """
+    Пакетная проверка доказательств Шнорра
+
+    Все проверки объединяются в одно мультивозведение в степень; при
+    неудаче пакет делится пополам, чтобы найти неверные элементы.
+    Результат совпадает с schnorr_verify с точностью до знака t
+    (t и -t принимаются одинаково, что не даёт доказывающему
+    преимущества больше чем вдвое при подборе c).
+
+    Args:
+        transcripts (list): Кортежи (t, s, y, c); y проверены на
+            принадлежность подгруппе
+        group (SchnorrGroup): Параметры группы
+        security_bits (int): Длина случайных коэффициентов
+
+    Returns:
+        list: bool для каждого кортежа
+    """
+    results = [False] * len(transcripts)
+    pending = [i for i, (t, s, _, c) in enumerate(transcripts) if _in_range(t, s, c, group)]
+
+    stack = [pending] if pending else []
+    while stack:
+        indices = stack.pop()
+        if len(indices) == 1:
+            i = indices[0]
+            results[i] = schnorr_verify(*transcripts[i], group)
+            continue
+        if _batch_holds([transcripts[i] for i in indices], group, security_bits):
+            for i in indices:
+                results[i] = True
+            continue
+        middle = len(indices) // 2
+        stack.append(indices[middle:])
+        stack.append(indices[:middle])
+    return results
@@ -0,0 +1,175 @@
+import asyncio
+import threading
+import logging
+import functools
+
+logger = logging.getLogger('ZKP-Server-Async')
+
+
+class StreamSocket:
+    """
+    Socket-like adapter over an asyncio StreamWriter.
+
+    ZKPServer callbacks and send_to_client() work with objects exposing
+    send()/close(), so the asyncio engine hands them this adapter instead
+    of a real socket. Calls from foreign threads (e.g. the GUI) are
+    marshalled onto the event loop.
+    """
+
+    def __init__(self, writer, loop, loop_thread_id):
+        self._writer = writer
+        self._loop = loop
+        self._loop_thread_id = loop_thread_id
+
+    def _call(self, func, *args):
+        if self._loop.is_closed():
+            raise OSError("Event loop is closed")
+        if threading.get_ident() == self._loop_thread_id:
+            func(*args)
+        else:
+            self._loop.call_soon_threadsafe(func, *args)
+
+    def send(self, data):
+        self._call(self._writer.write, bytes(data))
+        return len(data)
+
+    def sendall(self, data):
+        self.send(data)
+
+    def close(self):
+        self._call(self._writer.close)
+
+    def getpeername(self):
+        return self._writer.get_extra_info('peername')
+
+    def fileno(self):
+        sock = self._writer.get_extra_info('socket')
+        return sock.fileno() if sock else -1
+
+
+class AsyncioEngine:
+    """
+    Runs all listening ports and client connections of a ZKPServer on one
+    asyncio event loop in a background thread.
+
+    The authentication state machine and callbacks are the ones of the
+    owning ZKPServer, so both engines behave identically on the wire.
+    """
+
+    def __init__(self, server, backlog: int = 1024):
+        """
+        Args:
+            server: Owning ZKPServer instance
+            backlog: listen() backlog for each port
+        """
+        self.server = server
+        self.backlog = backlog
+        self.loop = None
+        self._thread = None
+        self._thread_id = None
+        self._listeners = []
+        self._ready = threading.Event()
+
+    def start(self):
+        """Start the event loop thread and wait until all ports listen"""
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self):
+        """Close listeners and stop the event loop"""
+        if not self.loop or self.loop.is_closed():
+            return
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+        try:
+            future.result(timeout=5)
+        except Exception as e:
+            logger.error(f"Error stopping asyncio engine: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+    def _run_loop(self):
+        self._thread_id = threading.get_ident()
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._listen_all())
+        finally:
+            self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    async def _listen_all(self):
+        if self.server._listen_sockets:
+            # Сокеты уже привязаны родительским процессом
+            listeners = [(sock.getsockname()[1], sock) for sock in self.server._listen_sockets]
+        else:
+            listeners = [(self.server.base_port + port_offset, None)
+                         for port_offset in range(self.server.num_ports)]
+
+        for port, sock in listeners:
+            try:
+                if sock is not None:
+                    listener = await asyncio.start_server(
+                        functools.partial(self._handle_client, port=port),
+                        sock=sock,
+                        backlog=self.backlog
+                    )
+                else:
+                    listener = await asyncio.start_server(
+                        functools.partial(self._handle_client, port=port),
+                        self.server.host,
+                        port,
+                        backlog=self.backlog,
+                        reuse_address=True,
+                        reuse_port=self.server.reuse_port or None
+                    )
+                self._listeners.append(listener)
+                logger.info(f"Listening on {self.server.host}:{port}")
+            except Exception as e:
+                logger.error(f"Failed to start server on port {port}: {e}")
+
+    async def _shutdown(self):
+        for listener in self._listeners:
+            listener.close()
+        for listener in self._listeners:
+            await listener.wait_closed()
+        self._listeners.clear()
+
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _handle_client(self, reader, writer, port):
+        """Coroutine equivalent of ZKPServer._handle_client"""
+        address = writer.get_extra_info('peername')[:2]
+        client_socket = StreamSocket(writer, self.loop, self._thread_id)
+        logger.info(f"Client connected from {address} on port {port}")
+
+        server = self.server
+        client_id = None
+        try:
+            client_id = server._open_session(client_socket, address, port)
+
+            while server.running:
+                data = await reader.read(1024)
+                if not data:
+                    logger.info(f"Client {address} disconnected")
+                    break
+
+                server._process_data(client_id, data)
+                await writer.drain()
+
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error handling client {address} on port {port}: {e}")
+        finally:
+            if client_id is not None:
+                server._close_session(client_id, client_socket)
+            writer.close()
+            logger.info(f"Connection closed with {address} on port {port}")
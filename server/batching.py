@@ -0,0 +1,84 @@
+import threading
+import logging
+import time
+
+logger = logging.getLogger('ZKP-Batch')
+
+
+class BatchVerifier:
+    """
+    Collects pending stage-2 verifications for a short window and checks
+    them with one batch verification call, e.g. schnorr_verify_batch().
+
+    Results are delivered through the callback given to submit(), on the
+    verifier thread.
+    """
+
+    def __init__(self, verify_batch, window: float = 0.005, max_batch: int = 1024):
+        """
+        Args:
+            verify_batch: Function list of transcripts -> list of bools
+            window: Seconds to wait for more transcripts after the first one
+            max_batch: Flush immediately once this many transcripts are queued
+        """
+        self.window = window
+        self.max_batch = max_batch
+        self.verify_batch = verify_batch
+        self._pending = []
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def submit(self, transcript, callback):
+        """
+        Queue a transcript for verification.
+
+        Args:
+            transcript: Transcript accepted by verify_batch, e.g. a
+                (t, s, public_key, c) tuple for Schnorr
+            callback: Called as callback(is_verified) once the batch is checked
+        """
+        with self._condition:
+            self._pending.append((transcript, callback))
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._pending:
+                    self._condition.wait()
+                if not self._running and not self._pending:
+                    return
+                deadline = time.monotonic() + self.window
+                while self._running and len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch, self._pending = self._pending, []
+
+            try:
+                results = self.verify_batch([transcript for transcript, _ in batch])
+            except Exception as e:
+                logger.error(f"Batch verification failed: {e}")
+                results = [False] * len(batch)
+
+            for (_, callback), is_verified in zip(batch, results):
+                try:
+                    callback(is_verified)
+                except Exception as e:
+                    logger.error(f"Error delivering verification result: {e}")
@@ -0,0 +1,113 @@
+"""
+Pre-generated challenge randomness.
+
+Challenges are sliced out of large os.urandom() blocks instead of calling
+the (non-cryptographic, shared) random module per handshake. A background
+thread prepares the next block before the current one runs out.
+"""
+
+import os
+import threading
+import weakref
+
+_pools = weakref.WeakSet()
+
+
+def _reset_pools_after_fork():
+    # Дочерний процесс не должен выдавать те же вызовы, что и родитель
+    for pool in list(_pools):
+        pool._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+class ChallengePool:
+    """Thread-safe CSPRNG buffer for challenge bits and vectors"""
+
+    def __init__(self, block_size: int = 1 << 16, refill_threshold: float = 0.25):
+        """
+        Args:
+            block_size: Bytes fetched from os.urandom per block
+            refill_threshold: Fraction of the block left when the next block
+                is requested from the refill thread
+        """
+        self.block_size = block_size
+        self._low_water = int(block_size * refill_threshold)
+        self._reset()
+        _pools.add(self)
+
+    def _reset(self):
+        """Drop all buffered randomness (also called in a forked child)"""
+        self._lock = threading.Lock()
+        self._refill_needed = threading.Event()
+        self._thread = None
+        self._buffer = b''
+        self._offset = 0
+        self._next = None
+        self._word = 0
+        self._word_bits = 0
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._refill_loop, daemon=True)
+            self._thread.start()
+
+    def _refill_loop(self):
+        while True:
+            self._refill_needed.wait()
+            self._refill_needed.clear()
+            block = os.urandom(self.block_size)
+            with self._lock:
+                if self._next is None:
+                    self._next = block
+
+    def _take(self, count):
+        """Take count fresh bytes; caller must hold the lock"""
+        if len(self._buffer) - self._offset < count:
+            block = self._next if self._next is not None else os.urandom(max(self.block_size, count))
+            self._next = None
+            self._buffer = self._buffer[self._offset:] + block
+            self._offset = 0
+        data = self._buffer[self._offset:self._offset + count]
+        self._offset += count
+        if self._next is None and len(self._buffer) - self._offset < self._low_water:
+            self._ensure_thread()
+            self._refill_needed.set()
+        return data
+
+    def bits(self, k: int) -> int:
+        """
+        Uniformly random k-bit integer
+
+        Args:
+            k: Number of bits (1 for a basic Fiat-Shamir challenge,
+               the number of keys for a Feige-Fiat-Shamir vector)
+        """
+        with self._lock:
+            if k <= 64:
+                if self._word_bits < k:
+                    self._word = int.from_bytes(self._take(8), 'big')
+                    self._word_bits = 64
+                value = self._word & ((1 << k) - 1)
+                self._word >>= k
+                self._word_bits -= k
+                return value
+            return int.from_bytes(self._take((k + 7) // 8), 'big') >> (-k % 8)
+
+    def bit(self) -> int:
+        """Single random challenge bit"""
+        with self._lock:
+            if not self._word_bits:
+                self._word = int.from_bytes(self._take(8), 'big')
+                self._word_bits = 64
+            value = self._word & 1
+            self._word >>= 1
+            self._word_bits -= 1
+            return value
+
+    def token(self, nbytes: int = 16) -> bytes:
+        """Random bytes, e.g. for nonces"""
+        with self._lock:
+            return self._take(nbytes)
@@ -0,0 +1,312 @@
+"""
+Streaming file encryption.
+
+Files are processed in fixed-size chunks read through mmap, so memory
+use does not depend on the file size, and the output is written as it
+is produced. Encryption is the SHAKE-256 stream cipher of
+protocols/stream_cipher.py followed by HMAC-SHA256 over the header and
+the whole ciphertext (encrypt-then-MAC).
+
+File format:
+    header  "ZKPF", version, chunk size, plaintext size, nonce, key id
+    body    ciphertext, same length as the plaintext
+    trailer HMAC-SHA256 tag (32 bytes)
+
+Decrypted data is written to a temporary file that only replaces the
+destination after the tag has been checked.
+
+With workers > 1 the chunks are processed on a process pool. Workers map
+the input and the pre-sized output file themselves and get only chunk
+offsets, so no file data goes through pipes. The parent feeds the
+ciphertext to the HMAC in chunk order as chunks complete; the output is
+byte-for-byte the same as in single-process mode.
+"""
+
+import os
+import sys
+import hmac
+import mmap
+import time
+import struct
+import hashlib
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from protocols.stream_cipher import derive_key, xor_chunk, KEY_SIZE, NONCE_SIZE
+
+MAGIC = b"ZKPF"
+VERSION = 1
+# magic, version, chunk size, plaintext size, nonce, key id
+HEADER = struct.Struct(f'>4sB3xIQ{NONCE_SIZE}s8s')
+TAG_SIZE = 32
+DEFAULT_CHUNK_SIZE = 1 << 20
+MAX_CHUNK_SIZE = 1 << 30
+# Меньше стольких кусков на процесс запуск пула не окупается
+MIN_CHUNKS_PER_WORKER = 4
+
+
+class FileCryptoError(ValueError):
+    """Malformed or tampered file, or a wrong key"""
+
+
+class CryptoStats(namedtuple('CryptoStats', 'bytes seconds')):
+    """Amount of data processed and the time it took"""
+
+    @property
+    def mb_per_s(self):
+        return self.bytes / (1 << 20) / self.seconds if self.seconds > 0 else 0.0
+
+
+def key_id(key):
+    """Short public identifier of a file key, stored in the header"""
+    return hashlib.sha256(b"zkp-file-key-id\0" + key).digest()[:8]
+
+
+def load_key(path):
+    """
+    Read a file key saved by save_key()
+
+    Returns:
+        bytes: The key, or None if the file does not exist
+    """
+    try:
+        with open(path, 'rb') as f:
+            key = f.read()
+    except FileNotFoundError:
+        return None
+    if len(key) < KEY_SIZE:
+        raise FileCryptoError(f"Key file {path} is truncated")
+    return key
+
+
+def save_key(path, key):
+    """Store a file key, readable only by the owner, replacing the file atomically"""
+    tmp_path = _temp_path(path)
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(key)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        _discard(tmp_path)
+        raise
+
+
+def _subkeys(key):
+    if len(key) < KEY_SIZE:
+        raise ValueError(f"File key must be at least {KEY_SIZE} bytes")
+    return derive_key(key, "zkp-file/encrypt"), derive_key(key, "zkp-file/mac")
+
+
+def _chunks(path, chunk_size, offset=0, length=None):
+    """Yield (index, data) for consecutive chunks of a file region, read through mmap"""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        end = size if length is None else offset + length
+        if end <= offset:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for index, start in enumerate(range(offset, end, chunk_size)):
+                yield index, mapped[start:min(start + chunk_size, end)]
+
+
+def _map_file(path, write=False):
+    """mmap of a whole file (the descriptor can be closed afterwards)"""
+    with open(path, 'r+b' if write else 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if write else mmap.ACCESS_READ)
+
+
+# Состояние процесса пула: отображения входа и выхода, ключ и nonce
+_worker_state = None
+
+
+def _init_worker(src_path, dst_path, enc_key, nonce):
+    global _worker_state
+    _worker_state = (_map_file(src_path), _map_file(dst_path, write=True), enc_key, nonce)
+
+
+def _xor_task(index, src_offset, dst_offset, length):
+    """Pool task: transform chunk `index` from the input map into the output map"""
+    src_map, dst_map, enc_key, nonce = _worker_state
+    dst_map[dst_offset:dst_offset + length] = xor_chunk(
+        enc_key, nonce, index, src_map[src_offset:src_offset + length])
+    return length
+
+
+def _use_pool(workers, total, chunk_size):
+    return workers is not None and workers > 1 and total >= MIN_CHUNKS_PER_WORKER * workers * chunk_size
+
+
+def _xor_parallel(src_path, src_offset, dst_path, dst_offset, total, chunk_size,
+                  enc_key, nonce, workers, on_chunk):
+    """
+    Transform [src_offset, src_offset + total) of src_path into dst_path at
+    dst_offset on a process pool. on_chunk(index, start, length) is called
+    in chunk order as soon as each chunk and all before it are written;
+    start is relative to the region.
+    """
+    # spawn, а не fork: процесс может быть GUI с запущенным Tk
+    context = multiprocessing.get_context('spawn')
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                               initargs=(src_path, dst_path, enc_key, nonce))
+    try:
+        futures = [
+            pool.submit(_xor_task, index, src_offset + start, dst_offset + start,
+                        min(chunk_size, total - start))
+            for index, start in enumerate(range(0, total, chunk_size))
+        ]
+        for index, future in enumerate(futures):
+            on_chunk(index, index * chunk_size, future.result())
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _temp_path(dst_path):
+    """Output is written here and renamed to dst_path only on success"""
+    return f"{dst_path}.part"
+
+
+def _discard(tmp_path):
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+
+
+def encrypt_file(src_path, dst_path, key, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, workers=None):
+    """
+    Encrypt a file
+
+    Args:
+        src_path (str): Plaintext file
+        dst_path (str): Encrypted file to create
+        key (bytes): File key (at least 32 bytes)
+        chunk_size (int): Bytes processed per step
+        progress (callable): progress(done_bytes, total_bytes) after each chunk
+        workers (int): Processes for large files (None or 1 - this process only)
+
+    Returns:
+        CryptoStats: Bytes processed and elapsed time
+    """
+    if not 0 < chunk_size <= MAX_CHUNK_SIZE:
+        raise ValueError("Invalid chunk size")
+    enc_key, mac_key = _subkeys(key)
+    total = os.path.getsize(src_path)
+    nonce = os.urandom(NONCE_SIZE)
+    header = HEADER.pack(MAGIC, VERSION, chunk_size, total, nonce, key_id(key))
+    mac = hmac.new(mac_key, header, hashlib.sha256)
+
+    started = time.perf_counter()
+    tmp_path = _temp_path(dst_path)
+    try:
+        if _use_pool(workers, total, chunk_size):
+            with open(tmp_path, 'wb') as out:
+                out.write(header)
+                out.truncate(HEADER.size + total + TAG_SIZE)
+            with _map_file(tmp_path) as written:
+                def on_chunk(index, start, length):
+                    mac.update(written[HEADER.size + start:HEADER.size + start + length])
+                    if progress:
+                        progress(start + length, total)
+                _xor_parallel(src_path, 0, tmp_path, HEADER.size, total, chunk_size,
+                              enc_key, nonce, workers, on_chunk)
+            with open(tmp_path, 'r+b') as out:
+                out.seek(HEADER.size + total)
+                out.write(mac.digest())
+        else:
+            with open(tmp_path, 'wb') as out:
+                out.write(header)
+                done = 0
+                for index, data in _chunks(src_path, chunk_size):
+                    ciphertext = xor_chunk(enc_key, nonce, index, data)
+                    mac.update(ciphertext)
+                    out.write(ciphertext)
+                    done += len(data)
+                    if progress:
+                        progress(done, total)
+                out.write(mac.digest())
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        _discard(tmp_path)
+        raise
+    return CryptoStats(total, time.perf_counter() - started)
+
+
+def read_header(path):
+    """
+    Parse the header of an encrypted file
+
+    Returns:
+        tuple: (chunk_size, plaintext_size, nonce, key_id, header bytes)
+    """
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+        size = os.fstat(f.fileno()).st_size
+    if len(header) < HEADER.size:
+        raise FileCryptoError("File is too short to be encrypted")
+    magic, version, chunk_size, total, nonce, file_key_id = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise FileCryptoError("Not an encrypted file or unsupported version")
+    if not 0 < chunk_size <= MAX_CHUNK_SIZE or size != HEADER.size + total + TAG_SIZE:
+        raise FileCryptoError("Corrupted header or truncated file")
+    return chunk_size, total, nonce, file_key_id, header
+
+
+def decrypt_file(src_path, dst_path, key, progress=None, workers=None):
+    """
+    Decrypt and authenticate a file written by encrypt_file()
+
+    Args:
+        src_path (str): Encrypted file
+        dst_path (str): Plaintext file to create; only written if the tag matches
+        key (bytes): File key
+        progress (callable): progress(done_bytes, total_bytes) after each chunk
+        workers (int): Processes for large files (None or 1 - this process only)
+
+    Returns:
+        CryptoStats: Bytes processed and elapsed time
+
+    Raises:
+        FileCryptoError: Wrong key, malformed or modified file
+    """
+    chunk_size, total, nonce, file_key_id, header = read_header(src_path)
+    if not hmac.compare_digest(file_key_id, key_id(key)):
+        raise FileCryptoError("File was encrypted with a different key")
+    enc_key, mac_key = _subkeys(key)
+    mac = hmac.new(mac_key, header, hashlib.sha256)
+
+    started = time.perf_counter()
+    tmp_path = _temp_path(dst_path)
+    try:
+        if _use_pool(workers, total, chunk_size):
+            with open(tmp_path, 'wb') as out:
+                out.truncate(total)
+            with _map_file(src_path) as encrypted:
+                def on_chunk(index, start, length):
+                    mac.update(encrypted[HEADER.size + start:HEADER.size + start + length])
+                    if progress:
+                        progress(start + length, total)
+                _xor_parallel(src_path, HEADER.size, tmp_path, 0, total, chunk_size,
+                              enc_key, nonce, workers, on_chunk)
+        else:
+            with open(tmp_path, 'wb') as out:
+                done = 0
+                for index, ciphertext in _chunks(src_path, chunk_size, HEADER.size, total):
+                    mac.update(ciphertext)
+                    out.write(xor_chunk(enc_key, nonce, index, ciphertext))
+                    done += len(ciphertext)
+                    if progress:
+                        progress(done, total)
+        with open(src_path, 'rb') as f:
+            f.seek(HEADER.size + total)
+            tag = f.read(TAG_SIZE)
+        if not hmac.compare_digest(tag, mac.digest()):
+            raise FileCryptoError("Authentication failed: the file was modified")
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        _discard(tmp_path)
+        raise
+    return CryptoStats(total, time.perf_counter() - started)
@@ -3,12 +3,38 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
 import os
+import queue
 import threading
 import time
 import json
 import random
 from datetime import datetime
 from server import ZKPServer
+from widgets import UIEventQueue, VirtualTable, LogView, REMOVED, make_log_record
+from key_registry import KeyRegistry
+from file_crypto import encrypt_file, decrypt_file, key_id, load_key, save_key, FileCryptoError
+from protocols.primes import generate_blum_modulus, is_probable_prime
+from protocols.stream_cipher import derive_key
+from protocols.wire import int_to_bytes
+from guillouquisquater.authentication import GQ_EXPONENT
+from schnorr.authentication import DEFAULT_GROUP
+
+# Хранилище зарегистрированных открытых ключей
+KEY_REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'keys.db')
+# Ключ шифрования файлов: без него файлы не расшифровать после перезапуска
+FILE_KEY_PATH = os.environ.get('ZKP_FILE_KEY',
+                               os.path.join(os.path.dirname(os.path.abspath(__file__)), 'file.key'))
+# Размер модуля Блюма, генерируемого по умолчанию
+DEFAULT_MODULUS_BITS = 2048
+# Период разбора очереди событий от потоков сервера, мс
+UI_TICK_MS = 100
+# Строк журнала в памяти; файл журнала с ротацией (None - не писать)
+LOG_CAPACITY = 5000
+LOG_FILE_PATH = os.environ.get('ZKP_SERVER_LOG')
+# Ключ очереди событий для прогресса шифрования (не совпадает с id клиентов)
+PROGRESS_EVENT = ('progress',)
+# Процессы для шифрования больших файлов
+FILE_CRYPTO_WORKERS = os.cpu_count() or 1
 
 class ZeroKnowledgeServer:
     def __init__(self, root):
@@ -24,24 +50,48 @@ class ZeroKnowledgeServer:
         self.progress_var = tk.DoubleVar()
         self.status_text = tk.StringVar(value="Ready")
         self.clients = {}  # Dictionary to store client information
+        # События от потоков сервера; Tk читает их раз в UI_TICK_MS
+        self.events = UIEventQueue()
+        # Результаты фоновых задач GUI: функции, которые process_events
+        # вызывает в потоке Tk (root.after из других потоков небезопасен)
+        self.ui_calls = queue.Queue()
+        # Ключ шифрования файлов: выводится из множителей p, q первого модуля
+        # Фиата-Шамира и сохраняется в FILE_KEY_PATH (см. generate_modulus)
+        self.file_key = None
+        self._crypto_thread = None
         
         # Authentication variables
         self.auth_configs = {
             "Fiat-Shamir": {
-                "n": 1223, # A simple default prime for testing
-                "public_keys": {}  # Will store public keys for clients
+                "n": None,  # Blum modulus p*q, generated in the background
+            },
+            "Guillou-Quisquater": {
+                "n": None,
+                "v": GQ_EXPONENT,  # Prime public exponent
+            },
+            "Schnorr": {
+                "n": DEFAULT_GROUP.p,  # Fixed group (p, q, g) shared with the server
+                "group": DEFAULT_GROUP,
             }
         }
+        self.key_registry = KeyRegistry(KEY_REGISTRY_PATH)
         
         # Create UI elements
         self.create_widgets()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.root.after(UI_TICK_MS, self.process_events)
         
         # Initialize server
-        self.server = ZKPServer(host='localhost', base_port=8000, num_ports=20)
+        self.server = ZKPServer(host='localhost', base_port=8000, num_ports=20,
+                                key_registry=self.key_registry,
+                                schnorr_group=self.auth_configs["Schnorr"]["group"])
         self.server.on_client_connected = self.on_client_connected
         self.server.on_message_received = self.on_message_received
         self.server.on_auth_result = self.on_auth_result
+        self.server.on_client_disconnected = self.on_client_disconnected
+        
+        self.load_file_key()
+        self.generate_modulus()
         
     def create_widgets(self):
         # Main frame
@@ -109,13 +159,9 @@ class ZeroKnowledgeServer:
         log_frame = ttk.LabelFrame(left_panel, text="Server Log", padding="10")
         log_frame.pack(fill=tk.BOTH, expand=True, pady=5)
         
-        # Create log text widget with scrollbar
-        log_scroll = ttk.Scrollbar(log_frame)
-        log_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        self.log_text = tk.Text(log_frame, height=8, yscrollcommand=log_scroll.set)
-        self.log_text.pack(fill=tk.BOTH, expand=True)
-        log_scroll.config(command=self.log_text.yview)
+        # Log panel over a ring buffer with level/client filters
+        self.log_view = LogView(log_frame, capacity=LOG_CAPACITY, spill_path=LOG_FILE_PATH)
+        self.log_view.pack(fill=tk.BOTH, expand=True)
         
         # Connected clients (right panel)
         right_panel = ttk.Frame(main_frame)
@@ -124,27 +170,13 @@ class ZeroKnowledgeServer:
         clients_frame = ttk.LabelFrame(right_panel, text="Connected Clients", padding="10")
         clients_frame.pack(fill=tk.BOTH, expand=True)
         
-        # Create Treeview for displaying clients
-        columns = ('id', 'ip', 'connected_time', 'status', 'auth')
-        self.clients_tree = ttk.Treeview(clients_frame, columns=columns, show='headings')
-        
-        # Configure columns
-        self.clients_tree.heading('id', text='ID')
-        self.clients_tree.column('id', width=50)
-        self.clients_tree.heading('ip', text='IP Address')
-        self.clients_tree.column('ip', width=120)
-        self.clients_tree.heading('connected_time', text='Connected At')
-        self.clients_tree.column('connected_time', width=150)
-        self.clients_tree.heading('status', text='Status')
-        self.clients_tree.column('status', width=80)
-        self.clients_tree.heading('auth', text='Auth')
-        self.clients_tree.column('auth', width=80)
-        
-        # Add scrollbar
-        clients_scroll_y = ttk.Scrollbar(clients_frame, orient=tk.VERTICAL, command=self.clients_tree.yview)
-        self.clients_tree.configure(yscroll=clients_scroll_y.set)
-        
-        clients_scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
+        # Virtualized table: only the visible rows exist in the Treeview
+        self.clients_tree = VirtualTable(
+            clients_frame,
+            columns=('id', 'ip', 'connected_time', 'status', 'auth'),
+            headings=('ID', 'IP Address', 'Connected At', 'Status', 'Auth'),
+            widths=(50, 120, 150, 80, 80)
+        )
         self.clients_tree.pack(fill=tk.BOTH, expand=True)
         
         # Add client control buttons
@@ -157,15 +189,86 @@ class ZeroKnowledgeServer:
         ttk.Button(client_actions, text="Authenticate", command=self.request_authentication).pack(side=tk.LEFT, padx=5)
         
     # Authentication methods (new)
+    def generate_modulus(self, protocol=None, on_done=None, button=None):
+        """
+        Generate a new modulus without blocking the UI (for all protocols if none given)
+        
+        button is disabled while the modulus is generated and re-enabled
+        when it is ready or the generation failed.
+        """
+        # Модуль Шнорра - простое p группы, оно не генерируется здесь
+        protocols = [protocol] if protocol else [name for name, config in self.auth_configs.items()
+                                                 if "group" not in config]
+        
+        def worker():
+            try:
+                # Один процесс: не форкаем процесс с запущенным Tk
+                n, p, q = generate_blum_modulus(DEFAULT_MODULUS_BITS, workers=1)
+            except Exception as e:
+                self.ui_calls.put(lambda: failed(e))
+                return
+            self.ui_calls.put(lambda: finished(n, p, q))
+        
+        def release():
+            if button is not None and button.winfo_exists():
+                button.state(['!disabled'])
+        
+        def failed(error):
+            release()
+            self.status_text.set("Modulus generation failed")
+            self.log(f"Modulus generation for {', '.join(protocols)} failed: {error}", "ERROR")
+        
+        def finished(n, p, q):
+            release()
+            self.status_text.set("Ready")
+            for name in protocols:
+                self.auth_configs[name]["n"] = n
+            self.log(f"Generated {DEFAULT_MODULUS_BITS}-bit modulus n for {', '.join(protocols)}")
+            if "Fiat-Shamir" in protocols and self.file_key is None:
+                # Множители известны только серверу: секрет для ключа файлов.
+                # Новый модуль ключ не меняет, иначе старые файлы не расшифровать
+                key = derive_key(int_to_bytes(p) + int_to_bytes(q), "zkp-gui/file-key")
+                try:
+                    save_key(FILE_KEY_PATH, key)
+                except OSError as e:
+                    self.log(f"Could not save the file key to {FILE_KEY_PATH}: {e}; "
+                             "files encrypted now cannot be decrypted after a restart", "WARNING")
+                self.file_key = key
+                self.log(f"File encryption key {key_id(key).hex()} derived from the new modulus")
+            if on_done:
+                on_done(n)
+        
+        if button is not None:
+            button.state(['disabled'])
+        self.status_text.set("Generating modulus...")
+        self.log(f"Generating {DEFAULT_MODULUS_BITS}-bit modulus...")
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def load_file_key(self):
+        """Load the file encryption key saved by an earlier run, if any"""
+        try:
+            self.file_key = load_key(FILE_KEY_PATH)
+        except (OSError, FileCryptoError) as e:
+            self.log(f"Could not load the file key from {FILE_KEY_PATH}: {e}", "ERROR")
+            return
+        if self.file_key is not None:
+            self.log(f"Loaded file encryption key {key_id(self.file_key).hex()} from {FILE_KEY_PATH}")
+    
     def show_auth_settings(self):
         """Show authentication settings dialog"""
         protocol = self.selected_protocol.get()
         
-        if protocol == "Fiat-Shamir":
-            # Create a popup dialog for Fiat-Shamir settings
+        if protocol == "Schnorr":
+            group = self.auth_configs[protocol]["group"]
+            messagebox.showinfo("Schnorr Settings",
+                                f"Built-in group: {group.p.bit_length()}-bit p, "
+                                f"{group.q.bit_length()}-bit subgroup order q")
+        elif protocol in self.auth_configs:
+            config = self.auth_configs[protocol]
+            # Create a popup dialog for the protocol settings
             dialog = tk.Toplevel(self.root)
             dialog.title(f"{protocol} Settings")
-            dialog.geometry("400x200")
+            dialog.geometry("400x240")
             dialog.transient(self.root)
             dialog.grab_set()
             
@@ -173,21 +276,46 @@ class ZeroKnowledgeServer:
             ttk.Label(dialog, text="Modulus (n):").grid(row=0, column=0, padx=10, pady=10, sticky=tk.W)
             n_entry = ttk.Entry(dialog, width=30)
             n_entry.grid(row=0, column=1, padx=10, pady=10)
-            n_entry.insert(0, str(self.auth_configs[protocol]["n"]))
+            n_entry.insert(0, str(config["n"] or ""))
+            
+            v_entry = None
+            if "v" in config:
+                ttk.Label(dialog, text="Exponent (v):").grid(row=2, column=0, padx=10, pady=10, sticky=tk.W)
+                v_entry = ttk.Entry(dialog, width=30)
+                v_entry.grid(row=2, column=1, padx=10, pady=10)
+                v_entry.insert(0, str(config["v"]))
+            
+            def show_generated(n):
+                if n_entry.winfo_exists():
+                    n_entry.delete(0, tk.END)
+                    n_entry.insert(0, str(n))
             
             def save_settings():
                 try:
                     n = int(n_entry.get())
+                    v = int(v_entry.get()) if v_entry else None
                     if n < 2:
                         messagebox.showerror("Error", "Modulus must be at least 2")
                         return
-                    self.auth_configs[protocol]["n"] = n
-                    self.log(f"Updated {protocol} settings: n={n}")
+                    if is_probable_prime(n) and not messagebox.askyesno(
+                            "Warning", f"n is prime, so {protocol} proofs are not sound. Use it anyway?"):
+                        return
+                    if v is not None and not is_probable_prime(v):
+                        messagebox.showerror("Error", "Exponent v must be prime")
+                        return
+                    config["n"] = n
+                    if v is not None:
+                        config["v"] = v
+                    self.log(f"Updated {protocol} settings: n={n}" + (f", v={v}" if v is not None else ""))
                     dialog.destroy()
                 except ValueError:
                     messagebox.showerror("Error", "Invalid input. Please enter integers only.")
             
-            ttk.Button(dialog, text="Save", command=save_settings).grid(row=2, column=0, columnspan=2, pady=20)
+            generate_button = ttk.Button(dialog, text="Generate")
+            generate_button.configure(
+                command=lambda: self.generate_modulus(protocol, show_generated, generate_button))
+            generate_button.grid(row=1, column=1, padx=10, sticky=tk.W)
+            ttk.Button(dialog, text="Save", command=save_settings).grid(row=3, column=0, columnspan=2, pady=20)
         
         else:
             messagebox.showinfo("Info", f"Settings for {protocol} are not yet implemented")
@@ -205,37 +333,93 @@ class ZeroKnowledgeServer:
             return
             
         protocol = self.selected_protocol.get()
-        if protocol == "Fiat-Shamir":
-            # For Fiat-Shamir, we need to register client's public key
-            public_key = simpledialog.askinteger("Input", "Enter client's public key (v):", parent=self.root)
+        if protocol in self.auth_configs:
+            config = self.auth_configs[protocol]
+            if config["n"] is None:
+                messagebox.showinfo("Info", "The modulus is still being generated")
+                return
+            # We need to register client's public key
+            if protocol == "Fiat-Shamir":
+                public_key = simpledialog.askinteger("Input", "Enter client's public key (v):", parent=self.root)
+                enrolled = public_key
+            elif protocol == "Schnorr":
+                public_key = simpledialog.askinteger("Input", "Enter client's public key (y):", parent=self.root)
+                enrolled = public_key
+                if public_key is not None and not config["group"].is_element(public_key):
+                    messagebox.showerror("Error", "y is not an element of the Schnorr group")
+                    return
+            else:
+                public_key = simpledialog.askinteger("Input", "Enter client's public key (J):", parent=self.root)
+                enrolled = [public_key, config["v"]]
             if public_key is None:  # User cancelled
                 return
                 
             # Store the public key for this client
-            self.auth_configs[protocol]["public_keys"][client_id] = public_key
-            self.log(f"Registered public key {public_key} for client {client_id}")
+            wire_protocol = protocol.lower()
+            key_id = self.key_registry.enroll(enrolled, config["n"], label=client_id, protocol=wire_protocol)
+            self.log(f"Registered public key {public_key} for client {client_id} (key id {key_id[:16]})")
             
             # Send authentication request message
             client_socket = self.clients[client_id].get("socket")
             if client_socket:
                 auth_request = {
                     "action": "authenticate",
-                    "protocol": "fiat-shamir",
-                    "n": self.auth_configs[protocol]["n"]
+                    "protocol": wire_protocol,
+                    "n": config["n"]
                 }
+                if "v" in config:
+                    auth_request["v"] = config["v"]
                 self.server.send_to_client(client_socket, json.dumps(auth_request))
                 self.update_client_status(client_id, "Auth pending...")
         else:
             messagebox.showinfo("Info", f"Authentication with {protocol} not yet implemented")
     
     def on_auth_result(self, client_id, success):
-        """Handle authentication result"""
-        if client_id in self.clients:
-            auth_status = "Authenticated" if success else "Auth failed"
-            self.update_client_auth_status(client_id, auth_status)
-            self.log(f"Client {client_id}: {auth_status}")
+        """Handle authentication result (called from server threads)"""
+        auth_status = "Authenticated" if success else "Auth failed"
+        self.events.update(client_id, auth=auth_status)
+        self.log(f"Client {client_id}: {auth_status}", "INFO" if success else "WARNING", client_id)
     
-    # Client management methods
+    def process_events(self):
+        """
+        Apply the events queued by server threads, then re-arm the tick
+        
+        Repeated updates of one client arrive here already merged, so each
+        changed client costs one table update per tick.
+        """
+        while True:
+            try:
+                call = self.ui_calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                call()
+            except Exception as e:
+                self.log(f"UI update failed: {e}", "ERROR")
+        
+        rows, records, dropped = self.events.drain()
+        progress = rows.pop(PROGRESS_EVENT, None)
+        if progress:
+            if progress.get('total'):
+                self.progress_var.set(100.0 * progress['done'] / progress['total'])
+            if 'status' in progress:
+                self.status_text.set(progress['status'])
+        for client_id, change in rows.items():
+            if change.pop(REMOVED, False):
+                self.remove_client(client_id)
+            if 'ip' in change:
+                self.add_client(client_id, change.pop('ip'), change.pop('socket', None))
+            if change and client_id in self.clients:
+                self.clients[client_id].update(change)
+                self._show_client(client_id)
+        
+        if dropped:
+            records.insert(0, make_log_record(f"... {dropped} log messages dropped", "WARNING"))
+        if records:
+            self.log_view.append(records)
+        self.root.after(UI_TICK_MS, self.process_events)
+    
+    # Client management methods (Tk thread only)
     def add_client(self, client_id, ip_address, client_socket=None, status="Connected"):
         """Add new client to the table"""
         if client_id not in self.clients:
@@ -247,45 +431,31 @@ class ZeroKnowledgeServer:
                 'status': status,
                 'auth': 'Not auth'
             }
-            
-            self.clients_tree.insert('', tk.END, iid=client_id, values=(
-                client_id, ip_address, connected_time, status, 'Not auth'
-            ))
-            
-            self.log(f"Client {client_id} ({ip_address}) connected")
+            self._show_client(client_id)
+    
+    def _show_client(self, client_id):
+        client = self.clients[client_id]
+        self.clients_tree.set_row(client_id, (
+            client_id, client['ip'], client['connected_time'], client['status'], client['auth']
+        ))
     
     def update_client_status(self, client_id, new_status):
         """Update client status"""
         if client_id in self.clients:
             self.clients[client_id]['status'] = new_status
-            self.clients_tree.item(client_id, values=(
-                client_id, 
-                self.clients[client_id]['ip'],
-                self.clients[client_id]['connected_time'],
-                new_status,
-                self.clients[client_id]['auth']
-            ))
+            self._show_client(client_id)
     
     def update_client_auth_status(self, client_id, auth_status):
         """Update client authentication status"""
         if client_id in self.clients:
             self.clients[client_id]['auth'] = auth_status
-            self.clients_tree.item(client_id, values=(
-                client_id, 
-                self.clients[client_id]['ip'],
-                self.clients[client_id]['connected_time'],
-                self.clients[client_id]['status'],
-                auth_status
-            ))
+            self._show_client(client_id)
     
     def remove_client(self, client_id):
         """Удаляет клиента из таблицы"""
         if client_id in self.clients:
-            ip = self.clients[client_id]['ip']
-            self.clients_tree.delete(client_id)
+            self.clients_tree.delete_row(client_id)
             del self.clients[client_id]
-            
-            self.log(f"Client {client_id} ({ip}) disconnected")
     
     def refresh_clients(self):
         """Обновляет список клиентов"""
@@ -304,7 +474,7 @@ class ZeroKnowledgeServer:
             # Имитация процесса отключения
             def simulate_disconnect():
                 time.sleep(1)
-                self.root.after(0, lambda: self.remove_client(client_id))
+                self.events.remove(client_id)
             
             threading.Thread(target=simulate_disconnect).start()
         else:
@@ -338,35 +508,56 @@ class ZeroKnowledgeServer:
             self.output_file_path.set(filename)
             self.log("Output file selected: " + filename)
     
-    def log(self, message):
-        self.log_text.insert(tk.END, f"{time.strftime('%H:%M:%S')} - {message}\n")
-        self.log_text.see(tk.END)
+    def log(self, message, level="INFO", client=None):
+        """Add a line to the log (from any thread)"""
+        self.events.log(make_log_record(message, level, client))
     
     def encrypt(self):
-        # Placeholder for encryption functionality
-        if not self.input_file_path.get() or not self.output_file_path.get():
-            messagebox.showerror("Error", "Please select both input and output files")
-            return
-            
-        protocol = self.selected_protocol.get()
-        self.log(f"Starting encryption with {protocol} protocol...")
-        self.status_text.set(f"Encrypting with {protocol}...")
-        
-        # Simulate progress with a thread (will be replaced with actual implementation)
-        threading.Thread(target=self.simulate_progress, args=("Encryption complete!",)).start()
+        self.run_file_crypto(encrypt_file, "Encrypting", "Encryption")
     
     def decrypt(self):
-        # Placeholder for decryption functionality
-        if not self.input_file_path.get() or not self.output_file_path.get():
+        self.run_file_crypto(decrypt_file, "Decrypting", "Decryption")
+    
+    def run_file_crypto(self, operation, verb, noun):
+        """Run encrypt_file/decrypt_file in a worker thread with byte-based progress"""
+        src, dst = self.input_file_path.get(), self.output_file_path.get()
+        if not src or not dst:
             messagebox.showerror("Error", "Please select both input and output files")
             return
-            
-        protocol = self.selected_protocol.get()
-        self.log(f"Starting decryption with {protocol} protocol...")
-        self.status_text.set(f"Decrypting with {protocol}...")
+        if os.path.abspath(src) == os.path.abspath(dst):
+            messagebox.showerror("Error", "Input and output must be different files")
+            return
+        if self.file_key is None:
+            messagebox.showinfo("Info", "The file key is derived from the modulus, which is still being generated")
+            return
+        if self._crypto_thread is not None and self._crypto_thread.is_alive():
+            messagebox.showinfo("Info", "Another file operation is in progress")
+            return
         
-        # Simulate progress with a thread (will be replaced with actual implementation)
-        threading.Thread(target=self.simulate_progress, args=("Decryption complete!",)).start()
+        key = self.file_key
+        self.progress_var.set(0)
+        self.status_text.set(f"{verb} {os.path.basename(src)}...")
+        self.log(f"{verb} {src} -> {dst}")
+        
+        def report(done, total):
+            self.events.update(PROGRESS_EVENT, done=done, total=total)
+        
+        def worker():
+            try:
+                stats = operation(src, dst, key, progress=report, workers=FILE_CRYPTO_WORKERS)
+            except Exception as e:
+                # FileCryptoError: неверный ключ или изменённый файл;
+                # BrokenProcessPool (RuntimeError): упал процесс-обработчик
+                level = "WARNING" if isinstance(e, FileCryptoError) else "ERROR"
+                self.events.update(PROGRESS_EVENT, done=0, total=1, status=f"{noun} failed: {e}")
+                self.log(f"{noun} of {src} failed: {e}", level)
+                return
+            summary = f"{noun} complete: {stats.bytes / (1 << 20):.1f} MB in {stats.seconds:.2f} s ({stats.mb_per_s:.1f} MB/s)"
+            self.events.update(PROGRESS_EVENT, done=1, total=1, status=summary)
+            self.log(summary)
+        
+        self._crypto_thread = threading.Thread(target=worker, daemon=True)
+        self._crypto_thread.start()
     
     def start_server(self):
         protocol = self.selected_protocol.get()
@@ -390,19 +581,23 @@ class ZeroKnowledgeServer:
         self.log_message("Server stopped")
         
         # Отключаем всех клиентов при остановке сервера
-        for client_id in list(self.clients.keys()):
-            self.remove_client(client_id)
+        self.clients.clear()
+        self.clients_tree.clear()
     
     def on_client_connected(self, client_socket, address, port):
-        client_id = f"{address[0]}:{address[1]}"
-        self.log_message(f"Client connected from {address} on port {port}")
+        client_id = self.server.client_id_for(client_socket) or f"{address[0]}:{address[1]}"
+        self.log_message(f"Client connected from {address} on port {port}", client_id)
         
-        # Add client to the UI
-        self.root.after(0, lambda: self.add_client(client_id, address[0], client_socket))
+        # Add client to the UI on the next tick
+        self.events.update(client_id, ip=address[0], socket=client_socket)
+    
+    def on_client_disconnected(self, client_id):
+        self.log_message(f"Client {client_id} disconnected", client_id)
+        self.events.remove(client_id)
     
     def on_message_received(self, message, client_socket, address, port):
-        client_id = f"{address[0]}:{address[1]}"
-        self.log_message(f"Message from {address} on port {port}: {message}")
+        client_id = self.server.client_id_for(client_socket) or f"{address[0]}:{address[1]}"
+        self.log_message(f"Message from {address} on port {port}: {message}", client_id)
         
         # Try to parse JSON messages
         try:
@@ -414,8 +609,7 @@ class ZeroKnowledgeServer:
                 
                 if protocol and result:
                     success = (result == "success")
-                    self.root.after(0, lambda: self.update_client_auth_status(
-                        client_id, "Authenticated" if success else "Auth failed"))
+                    self.events.update(client_id, auth="Authenticated" if success else "Auth failed")
                     
                     return json.dumps({"status": "ok"})
         except (json.JSONDecodeError, TypeError):
@@ -424,27 +618,17 @@ class ZeroKnowledgeServer:
         # Default response
         return "Message received"
     
-    def log_message(self, message):
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
-    
-    def simulate_progress(self, completion_message):
-        # This is just a placeholder to simulate progress
-        # Will be replaced with actual implementation later
-        self.progress_var.set(0)
-        for i in range(101):
-            time.sleep(0.05)  # Simulating work
-            self.progress_var.set(i)
-            if i % 10 == 0:
-                self.log(f"Progress: {i}%")
-        self.status_text.set(completion_message)
-        self.log(completion_message)
+    def log_message(self, message, client=None):
+        """Log a server event (from any thread)"""
+        self.log(message, client=client)
     
     def on_closing(self):
         # Handle window closing
         if messagebox.askokcancel("Quit", "Do you want to quit?"):
             if hasattr(self, 'server'):
                 self.server.stop()
+            self.key_registry.close()
+            self.log_view.close()
             self.root.destroy()
 
 if __name__ == "__main__":
@@ -0,0 +1,192 @@
+"""
+Persistent registry of enrolled public keys.
+
+Keys live in an SQLite file indexed by a fingerprint of (n, public key).
+Nothing is read at startup: the database is opened on first use and each
+lookup goes through a bounded LRU cache. Cached entries keep the
+validation that the auth path would otherwise redo per handshake
+(keys reduced mod n, gcd(v, n) = 1).
+"""
+
+import os
+import json
+import math
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from protocols.wire import byte_length, int_to_bytes
+
+logger = logging.getLogger('ZKP-KeyRegistry')
+
+
+def key_fingerprint(public_key, n, protocol='fiat-shamir'):
+    """
+    Stable identifier of a public key
+
+    Args:
+        public_key (int or list): Public key v or vector v_1..v_k
+        n (int): Modulus
+        protocol (str): Protocol the key belongs to
+
+    Returns:
+        str: Hex SHA-256 fingerprint
+    """
+    keys = public_key if isinstance(public_key, (list, tuple)) else [public_key]
+    width = byte_length(n)
+    h = hashlib.sha256(protocol.encode('utf-8') + b'\0')
+    h.update(int_to_bytes(n, width))
+    for v in keys:
+        h.update(int_to_bytes(v % n, width))
+    return h.hexdigest()
+
+
+class RegisteredKey:
+    """Cached registry entry with precomputed validation state"""
+
+    __slots__ = ('key_id', 'protocol', 'public_key', 'n', 'label', 'valid')
+
+    def __init__(self, key_id, protocol, public_key, n, label=None):
+        self.key_id = key_id
+        self.protocol = protocol
+        self.n = n
+        self.label = label
+        # Ключи приводятся по модулю n один раз, при загрузке в кэш
+        if isinstance(public_key, (list, tuple)):
+            self.public_key = [v % n for v in public_key]
+            keys = self.public_key
+        else:
+            self.public_key = public_key % n
+            keys = [self.public_key]
+        self.valid = n > 2 and all(v > 1 and math.gcd(v, n) == 1 for v in keys)
+
+
+class KeyRegistry:
+    """SQLite-backed public key store with an in-memory LRU cache"""
+
+    def __init__(self, path: str, cache_size: int = 100000):
+        """
+        Args:
+            path: SQLite database file (created on first use)
+            cache_size: Maximum number of cached entries
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self):
+        """Open the database lazily; caller must hold _db_lock"""
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS keys ("
+                " key_id TEXT PRIMARY KEY,"
+                " protocol TEXT NOT NULL,"
+                " n TEXT NOT NULL,"
+                " public_key TEXT NOT NULL,"
+                " label TEXT,"
+                " created REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _cache_get(self, key_id):
+        with self._cache_lock:
+            entry = self._cache.get(key_id)
+            if entry is not None:
+                self._cache.move_to_end(key_id)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def _cache_put(self, entry):
+        with self._cache_lock:
+            self._cache[entry.key_id] = entry
+            self._cache.move_to_end(entry.key_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def enroll(self, public_key, n, label=None, protocol='fiat-shamir'):
+        """
+        Add (or replace) a public key
+
+        Returns:
+            str: key_id of the enrolled key
+        """
+        key_id = key_fingerprint(public_key, n, protocol)
+        if isinstance(public_key, (list, tuple)):
+            stored = json.dumps([format(v, 'x') for v in public_key])
+        else:
+            stored = format(public_key, 'x')
+        with self._db_lock:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO keys (key_id, protocol, n, public_key, label, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key_id, protocol, format(n, 'x'), stored, label, time.time())
+            )
+            db.commit()
+        self._cache_put(RegisteredKey(key_id, protocol, public_key, n, label))
+        logger.info(f"Enrolled {protocol} key {key_id[:16]}... ({label or 'no label'})")
+        return key_id
+
+    def revoke(self, key_id):
+        """Remove a key; returns True if it existed"""
+        with self._db_lock:
+            cursor = self._connection().execute("DELETE FROM keys WHERE key_id = ?", (key_id,))
+            self._db.commit()
+        with self._cache_lock:
+            self._cache.pop(key_id, None)
+        return cursor.rowcount > 0
+
+    def get(self, key_id):
+        """
+        Look up a key by its id
+
+        Returns:
+            RegisteredKey or None
+        """
+        entry = self._cache_get(key_id)
+        if entry is not None:
+            return entry
+
+        with self._db_lock:
+            row = self._connection().execute(
+                "SELECT protocol, n, public_key, label FROM keys WHERE key_id = ?", (key_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        protocol, n_hex, stored, label = row
+        if stored.startswith('['):
+            public_key = [int(v, 16) for v in json.loads(stored)]
+        else:
+            public_key = int(stored, 16)
+        entry = RegisteredKey(key_id, protocol, public_key, int(n_hex, 16), label)
+        self._cache_put(entry)
+        return entry
+
+    def lookup(self, public_key, n, protocol='fiat-shamir'):
+        """Look up a key by its value; returns RegisteredKey or None"""
+        return self.get(key_fingerprint(public_key, n, protocol))
+
+    def __len__(self):
+        with self._db_lock:
+            return self._connection().execute("SELECT COUNT(*) FROM keys").fetchone()[0]
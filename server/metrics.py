@@ -0,0 +1,256 @@
+"""
+Built-in server instrumentation.
+
+Counters, gauges and fixed-bucket latency histograms that are cheap enough
+to stay enabled: recording is a bisect plus a couple of integer updates
+under a per-metric lock. Metrics are exposed as a Python snapshot and in
+the Prometheus text format over a small HTTP endpoint.
+"""
+
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger('ZKP-Metrics')
+
+# Границы корзин гистограмм задержки, секунды
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonically increasing counter"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+    def snapshot(self):
+        return self._value
+
+    def render(self):
+        return [f"{self.name} {self._value}"]
+
+
+class Gauge:
+    """Value that can go up and down, or is computed at read time"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, function=None):
+        self.name = name
+        self.documentation = documentation
+        self._value = 0
+        self._function = function
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        self._value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    @property
+    def value(self):
+        return self._function() if self._function else self._value
+
+    def snapshot(self):
+        return self.value
+
+    def render(self):
+        return [f"{self.name} {_format_value(self.value)}"]
+
+
+class Histogram:
+    """Latency histogram with fixed bucket boundaries"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {"count": count, "sum": total, "buckets": cumulative}
+
+    def quantile(self, q):
+        """Approximate quantile: upper bound of the bucket holding it"""
+        data = self.snapshot()
+        if not data["count"]:
+            return None
+        target = q * data["count"]
+        for bound, running in data["buckets"]:
+            if running >= target:
+                return bound
+        return float('inf')
+
+    def render(self):
+        data = self.snapshot()
+        lines = [
+            f'{self.name}_bucket{{le="{_format_value(bound)}"}} {running}'
+            for bound, running in data["buckets"]
+        ]
+        lines.append(f"{self.name}_sum {data['sum']!r}")
+        lines.append(f"{self.name}_count {data['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics"""
+
+    def __init__(self, prefix='zkp_'):
+        self.prefix = prefix
+        self._metrics = {}
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation):
+        return self._add(Counter(self.prefix + name, documentation))
+
+    def gauge(self, name, documentation, function=None):
+        return self._add(Gauge(self.prefix + name, documentation, function))
+
+    def histogram(self, name, documentation, buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(self.prefix + name, documentation, buckets))
+
+    def snapshot(self):
+        """Dict of metric name -> current value (histograms as dicts)"""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def render_prometheus(self):
+        """Prometheus text exposition format"""
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class ServerMetrics:
+    """Metrics recorded by ZKPServer"""
+
+    def __init__(self, active_sessions=None, handshakes_in_progress=None):
+        """
+        Args:
+            active_sessions: Callable returning the number of open sessions
+            handshakes_in_progress: Callable returning sessions mid-handshake
+        """
+        self.registry = MetricsRegistry()
+        r = self.registry
+        self.connections = r.counter("connections_total", "Accepted client connections")
+        self.messages = r.counter("messages_total", "Messages received from clients")
+        self.auth_requests = r.counter("auth_requests_total", "Authentication requests")
+        self.auth_success = r.counter("auth_success_total", "Successful authentications")
+        self.auth_failure = r.counter("auth_failure_total", "Failed authentications")
+        self.resume_requests = r.counter("resume_requests_total", "Session resumptions by ticket")
+        self.key_exchanges = r.counter("key_exchanges_total", "Secure channels established")
+        self.sessions_expired = r.counter("sessions_expired_total", "Sessions closed by stage timeout")
+        self.active_sessions = r.gauge("active_sessions", "Open client sessions", active_sessions)
+        self.handshakes_in_progress = r.gauge(
+            "handshakes_in_progress", "Sessions in the middle of a handshake", handshakes_in_progress)
+
+        self.accept_latency = r.histogram(
+            "accept_seconds", "Time to register an accepted connection")
+        self.auth_request_latency = r.histogram(
+            "auth_request_seconds", "Time to process an auth_request message")
+        self.challenge_latency = r.histogram(
+            "challenge_seconds", "Time from receiving x to sending the challenge e")
+        self.verify_latency = r.histogram(
+            "verify_seconds", "Time from receiving y to the verification result")
+        self.result_send_latency = r.histogram(
+            "result_send_seconds", "Time to send the authentication result")
+        self.handshake_latency = r.histogram(
+            "handshake_seconds", "Time from auth_request to the authentication result")
+
+    def snapshot(self):
+        return self.registry.snapshot()
+
+
+class MetricsHTTPServer:
+    """Serves GET /metrics in the Prometheus text format from a daemon thread"""
+
+    def __init__(self, registry, host='localhost', port=9100):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._httpd = None
+        self._thread = None
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Не засоряем лог сервера запросами Prometheus
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Metrics endpoint on http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
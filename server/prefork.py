@@ -0,0 +1,190 @@
+"""
+Prefork mode: N worker processes serve one port.
+
+Each worker runs its own ZKPServer (accept loop, auth state machine and
+verifier) in a separate process, so modular arithmetic is no longer
+limited to one core by the GIL. Workers share the port through
+SO_REUSEPORT, or - where it is unavailable - through a listening socket
+bound once by the parent and inherited by the workers. The parent only
+supervises: it restarts workers that exit and stops them on SIGTERM/SIGINT.
+
+Usage:
+    python server/prefork.py --port 8000 --workers 4
+"""
+
+import os
+import sys
+import time
+import socket
+import signal
+import logging
+import argparse
+import multiprocessing
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from tickets import TICKET_KEY_ENV
+
+logger = logging.getLogger('ZKP-Prefork')
+
+HAS_REUSEPORT = hasattr(socket, 'SO_REUSEPORT')
+
+
+def _worker_main(host, port, engine, listen_socket, server_options):
+    """Entry point of a worker process"""
+    from server import ZKPServer
+
+    stop = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.append(signum))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    server = ZKPServer(
+        host=host,
+        base_port=port,
+        num_ports=1,
+        engine=engine,
+        reuse_port=listen_socket is None,
+        **server_options
+    )
+    server.start(listen_sockets=[listen_socket] if listen_socket is not None else None)
+    logger.info(f"Worker {os.getpid()} serving {host}:{port}")
+
+    while not stop:
+        time.sleep(0.5)
+    server.stop()
+
+
+class PreforkServer:
+    """Supervisor of a pool of ZKPServer worker processes sharing one port"""
+
+    def __init__(self, host: str = 'localhost', port: int = 8000, workers: int = None,
+                 engine: str = 'asyncio', server_options: dict = None,
+                 use_reuseport: bool = HAS_REUSEPORT, backlog: int = 1024,
+                 restart_delay: float = 1.0):
+        """
+        Args:
+            host: Host address to bind to
+            port: Port shared by all workers
+            workers: Number of worker processes (default: number of CPUs)
+            engine: ZKPServer engine used inside each worker
+            server_options: Extra keyword arguments for ZKPServer; without a
+                ticket_key (or $ZKP_TICKET_KEY) the workers share a random one
+            use_reuseport: Let workers bind with SO_REUSEPORT instead of
+                inheriting a socket bound by the parent
+            backlog: listen() backlog of the shared socket
+            restart_delay: Minimum delay before restarting a crashed worker
+        """
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.engine = engine
+        self.server_options = dict(server_options or {})
+        if self.server_options.get('ticket_key') is None and not os.environ.get(TICKET_KEY_ENV):
+            # Один ключ на все процессы: билет, выданный одним worker'ом, принимают остальные
+            self.server_options['ticket_key'] = os.urandom(32)
+        self.use_reuseport = use_reuseport and HAS_REUSEPORT
+        self.backlog = backlog
+        self.restart_delay = restart_delay
+        self.running = False
+        self._processes = {}  # slot -> Process
+        self._last_start = {}  # slot -> start time
+        self._listen_socket = None
+        self._ctx = multiprocessing.get_context()
+
+    def start(self):
+        """Bind (if needed) and start all workers"""
+        self.running = True
+        if not self.use_reuseport:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.host, self.port))
+            sock.listen(self.backlog)
+            self._listen_socket = sock
+
+        for slot in range(self.workers):
+            self._spawn(slot)
+        mode = "SO_REUSEPORT" if self.use_reuseport else "shared socket"
+        logger.info(f"Prefork server on {self.host}:{self.port} with {self.workers} workers ({mode})")
+
+    def _spawn(self, slot):
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(self.host, self.port, self.engine, self._listen_socket, self.server_options),
+            name=f"zkp-worker-{slot}",
+            daemon=True
+        )
+        process.start()
+        self._processes[slot] = process
+        self._last_start[slot] = time.monotonic()
+
+    def supervise_once(self):
+        """Restart workers that have exited; returns the number restarted"""
+        restarted = 0
+        for slot, process in list(self._processes.items()):
+            if process.is_alive() or not self.running:
+                continue
+            if time.monotonic() - self._last_start[slot] < self.restart_delay:
+                continue  # Не перезапускаем упавший воркер чаще restart_delay
+            logger.warning(f"Worker {process.pid} exited with code {process.exitcode}, restarting")
+            process.join()
+            self._spawn(slot)
+            restarted += 1
+        return restarted
+
+    def serve_forever(self, interval: float = 0.5):
+        """Supervise workers until SIGTERM/SIGINT"""
+        def _request_stop(signum, frame):
+            self.running = False
+
+        signal.signal(signal.SIGTERM, _request_stop)
+        signal.signal(signal.SIGINT, _request_stop)
+        if not self.running:
+            self.start()
+        try:
+            while self.running:
+                self.supervise_once()
+                time.sleep(interval)
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float = 5.0):
+        """Terminate all workers and close the shared socket"""
+        self.running = False
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in self._processes.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+        self._processes.clear()
+        if self._listen_socket:
+            self._listen_socket.close()
+            self._listen_socket = None
+        logger.info("Prefork server stopped")
+
+    def worker_pids(self):
+        return [p.pid for p in self._processes.values() if p.is_alive()]
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='ZKP prefork server')
+    parser.add_argument('-H', '--host', default='localhost', help='Host to bind (default: localhost)')
+    parser.add_argument('-p', '--port', type=int, default=8000, help='Port shared by all workers (default: 8000)')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--engine', choices=['threads', 'asyncio'], default='asyncio', help='Engine inside each worker')
+    parser.add_argument('--no-reuseport', action='store_true', help='Share one socket bound by the parent instead')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    args = parse_arguments()
+    PreforkServer(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        engine=args.engine,
+        use_reuseport=not args.no_reuseport
+    ).serve_forever()
@@ -5,16 +5,66 @@ import os
 import socket
 import threading
 import logging
-import random
 import json
+import time
+import itertools
+from functools import lru_cache
 from typing import List, Optional, Callable
-from serverAuth import fiat_shamir_verify  # Исправлен импорт path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from protocols.wire import LegacyCodec, FramedCodec, ProtocolError, SealedMessage, hello_reply
+from protocols.channel import SecureChannel, ChannelError
+from serverAuth import fiat_shamir_verify, fiat_shamir_verify_noninteractive  # Исправлен импорт path
+from protocols.transcript import decode_proof
+from protocols.primes import is_probable_prime
+from guillouquisquater.authentication import gq_verify, gq_challenge_bits, GQ_EXPONENT
+from guillouquisquater.key_exchange import verify_share, generate_share, shared_secret, derive_channel_keys
+from schnorr.authentication import DEFAULT_GROUP, SCHNORR_CHALLENGE_BITS, schnorr_verify, schnorr_verify_batch
+from async_engine import AsyncioEngine
+from batching import BatchVerifier
+from key_registry import KeyRegistry, RegisteredKey, key_fingerprint
+from tickets import TicketIssuer, DEFAULT_TICKET_LIFETIME
+from challenges import ChallengePool
+from metrics import ServerMetrics, MetricsHTTPServer
+from sessions import (ClientSession, SessionTable, TimingWheel, STAGE_IDLE,
+                      STAGE_AWAIT_COMMITMENT, STAGE_AWAIT_RESPONSE, STAGE_VERIFYING)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('ZKP-Server')
 
+ENGINES = ('threads', 'asyncio')
+
+# Ограничения для режима Фейге-Фиата-Шамира
+MAX_FFS_KEYS = 256
+MAX_FFS_ROUNDS = 64
+NI_MAX_ROUNDS = 1024
+
+# Протоколы интерактивной аутентификации
+AUTH_PROTOCOLS = ('fiat-shamir', 'guillou-quisquater', 'schnorr')
+
+# Допустимая длина открытого показателя v протокола Гиллу-Кискатра
+GQ_MIN_EXPONENT_BITS = 17
+GQ_MAX_EXPONENT_BITS = 1024
+
+
+@lru_cache(maxsize=64)
+def _valid_gq_exponent(v):
+    """v must be a prime of a sane size, otherwise d < v gives no soundness"""
+    return GQ_MIN_EXPONENT_BITS <= v.bit_length() <= GQ_MAX_EXPONENT_BITS and is_probable_prime(v)
+
+
+@lru_cache(maxsize=4096)
+def _valid_schnorr_key(y, group):
+    """y must lie in the order-q subgroup, otherwise y^c leaks nothing useful to check"""
+    return group.is_element(y)
+
 class ZKPServer:
-    def __init__(self, host: str = 'localhost', base_port: int = 8000, num_ports: int = 3):
+    def __init__(self, host: str = 'localhost', base_port: int = 8000, num_ports: int = 3,
+                 engine: str = 'threads', batch_window: Optional[float] = None,
+                 reuse_port: bool = False, handshake_timeout: Optional[float] = 30.0,
+                 idle_timeout: Optional[float] = None, timer_tick: float = 0.5,
+                 key_registry: Optional[KeyRegistry] = None, require_registered_keys: bool = True,
+                 metrics_port: Optional[int] = None, schnorr_group=None,
+                 ticket_key: Optional[bytes] = None, ticket_lifetime: float = DEFAULT_TICKET_LIFETIME):
         """
         Initialize the ZKP server
         
@@ -22,28 +72,118 @@ class ZKPServer:
             host: Host address to bind to
             base_port: Starting port number
             num_ports: Number of consecutive ports to listen on
+            engine: Connection engine - 'threads' (thread per connection)
+                or 'asyncio' (single event loop for all connections)
+            batch_window: If set, Schnorr stage-2 verifications are collected
+                for this many seconds and checked together with
+                schnorr_verify_batch (Fiat-Shamir rounds are always checked
+                one by one: a single check is cheaper than any batch)
+            reuse_port: Set SO_REUSEPORT so several processes can listen on
+                the same port (see prefork.py)
+            handshake_timeout: Seconds a client may spend in each stage of a
+                handshake before its connection is closed (None - no limit)
+            idle_timeout: Seconds an idle, non-authenticating connection may
+                stay open (None - no limit)
+            timer_tick: Resolution of the session expiry timing wheel
+            key_registry: Registry of enrolled public keys; without it the
+                server trusts the public key sent in the auth_request
+            require_registered_keys: With a registry, reject keys that are
+                not enrolled (otherwise they are only validated)
+            metrics_port: If set, serve the metrics in Prometheus text format
+                on http://host:metrics_port/metrics (0 - any free port)
+            schnorr_group: SchnorrGroup for Schnorr identification
+                (default: the built-in 2048-bit group)
+            ticket_key: Secret key for session resumption tickets; servers
+                that share it accept each other's tickets (default:
+                $ZKP_TICKET_KEY, otherwise a random per-process key)
+            ticket_lifetime: Seconds a resumption ticket stays valid
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown server engine: {engine}")
         self.host = host
         self.base_port = base_port
         self.num_ports = num_ports
+        self.engine = engine
+        self._async_engine = None
+        self.batch_window = batch_window
+        self._batch_verifiers = {}  # protocol -> BatchVerifier
+        self._verify_lock = threading.Lock()  # Передача отложенных сообщений потоку проверки
+        self.schnorr_group = schnorr_group or DEFAULT_GROUP
+        self.reuse_port = reuse_port
+        self.key_registry = key_registry
+        self.require_registered_keys = require_registered_keys
+        self.tickets = TicketIssuer(ticket_key, ticket_lifetime)
+        self._challenges = ChallengePool()
+        self._listen_sockets: List[socket.socket] = []
         self.servers: List[socket.socket] = []
         self.client_handlers: List[threading.Thread] = []
         self.running = False
+        # Id сессии в этих двух callback'ах - client_id_for(socket)
         self.on_client_connected: Optional[Callable] = None
         self.on_message_received: Optional[Callable] = None
         self.on_auth_result: Optional[Callable] = None  # Добавлен callback для результатов аутентификации
-        self.client_sessions = {}  # Store session data for clients
+        self.on_client_disconnected: Optional[Callable] = None  # client_id закрытой сессии
+        self.client_sessions = SessionTable()  # client_id -> ClientSession
+        self._session_ids = itertools.count(1)
+        self.handshake_timeout = handshake_timeout
+        self.idle_timeout = idle_timeout
+        self._timers = TimingWheel(tick=timer_tick)
+        self._timer_thread = None
+        self._socket_clients = {}  # socket -> client_id, for send_to_client()
         self.auth_challenges = {}  # Store authentication challenges
+        self.metrics = ServerMetrics(
+            active_sessions=lambda: len(self.client_sessions),
+            handshakes_in_progress=lambda: sum(
+                1 for s in self.client_sessions.values() if s.auth_stage != STAGE_IDLE)
+        )
+        self.metrics_port = metrics_port
+        self._metrics_server = None
         
-    def start(self):
-        """Start the server on multiple ports"""
+    def start(self, listen_sockets: Optional[List[socket.socket]] = None):
+        """
+        Start the server on multiple ports
+        
+        Args:
+            listen_sockets: Already listening sockets to serve instead of binding
+                base_port..base_port+num_ports-1 (e.g. inherited from a
+                prefork parent process)
+        """
         self.running = True
+        self._listen_sockets = list(listen_sockets or [])
+        
+        if self.batch_window is not None:
+            group = self.schnorr_group
+            self._batch_verifiers = {
+                "schnorr": BatchVerifier(
+                    lambda transcripts: schnorr_verify_batch(transcripts, group),
+                    window=self.batch_window
+                ),
+            }
+            for verifier in self._batch_verifiers.values():
+                verifier.start()
+        
+        self._timer_thread = threading.Thread(target=self._expire_sessions, daemon=True)
+        self._timer_thread.start()
+        
+        if self.metrics_port is not None:
+            self._metrics_server = MetricsHTTPServer(self.metrics.registry, self.host, self.metrics_port)
+            self._metrics_server.start()
+        
+        if self.engine == 'asyncio':
+            self._async_engine = AsyncioEngine(self)
+            self._async_engine.start()
+            logger.info(f"Server is running on {self.host} with {self.num_ports} ports starting from {self.base_port} (asyncio engine)")
+            return
+        
+        if self._listen_sockets:
+            listeners = [(sock.getsockname()[1], sock) for sock in self._listen_sockets]
+        else:
+            listeners = [(self.base_port + port_offset, None) for port_offset in range(self.num_ports)]
         
-        for port_offset in range(self.num_ports):
-            port = self.base_port + port_offset
+        for port, sock in listeners:
             server_thread = threading.Thread(
                 target=self._run_server, 
-                args=(port,),
+                args=(port, sock),
                 daemon=True
             )
             server_thread.start()
@@ -51,14 +191,25 @@ class ZKPServer:
         
         logger.info(f"Server is running on {self.host} with {self.num_ports} ports starting from {self.base_port}")
     
-    def _run_server(self, port):
-        """Run server on specific port"""
+    def _create_listener(self, port):
+        """Create a listening socket bound to a port"""
         server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        
+        if self.reuse_port:
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         try:
             server.bind((self.host, port))
             server.listen(5)
+        except Exception:
+            server.close()
+            raise
+        return server
+    
+    def _run_server(self, port, server=None):
+        """Run server on specific port, or on an already bound socket"""
+        try:
+            if server is None:
+                server = self._create_listener(port)
             self.servers.append(server)
             
             logger.info(f"Listening on {self.host}:{port}")
@@ -68,10 +219,6 @@ class ZKPServer:
                     client_socket, address = server.accept()
                     logger.info(f"Client connected from {address} on port {port}")
                     
-                    # Notify about connection if callback is set
-                    if self.on_client_connected:
-                        self.on_client_connected(client_socket, address, port)
-                    
                     # Start client handler
                     client_thread = threading.Thread(
                         target=self._handle_client,
@@ -93,15 +240,7 @@ class ZKPServer:
     
     def _handle_client(self, client_socket, address, port):
         """Handle communication with a connected client"""
-        client_id = f"{address[0]}:{address[1]}"
-        self.client_sessions[client_id] = {
-            "socket": client_socket,
-            "address": address,
-            "port": port,
-            "authenticated": False,
-            "auth_stage": 0,
-            "auth_data": {}
-        }
+        client_id = self._open_session(client_socket, address, port)
         
         try:
             while self.running:
@@ -109,111 +248,549 @@ class ZKPServer:
                 if not data:
                     logger.info(f"Client {address} disconnected")
                     break
-                    
-                message = data.decode('utf-8')
-                logger.info(f"Received from {address} on port {port}: {message}")
-                
-                # Handle Fiat-Shamir authentication protocol messages
-                if self.client_sessions[client_id]["auth_stage"] > 0:
-                    self._handle_auth_message(client_id, message)
-                    continue
-                
-                # Try to parse message as JSON
-                try:
-                    msg_data = json.loads(message)
-                    if msg_data.get("action") == "auth_request" and msg_data.get("protocol") == "fiat-shamir":
-                        # Initialize Fiat-Shamir authentication
-                        self._start_fiat_shamir_auth(client_id, msg_data)
-                        continue
-                except (json.JSONDecodeError, TypeError):
-                    pass  # Not JSON or not properly formatted
                 
-                # Process message if callback is set
-                if self.on_message_received:
-                    response = self.on_message_received(message, client_socket, address, port)
-                    if response:
-                        client_socket.send(response.encode('utf-8'))
+                self._process_data(client_id, data)
                 
         except Exception as e:
             logger.error(f"Error handling client {address} on port {port}: {e}")
         finally:
-            if client_id in self.client_sessions:
-                del self.client_sessions[client_id]
+            self._close_session(client_id, client_socket)
             client_socket.close()
             logger.info(f"Connection closed with {address} on port {port}")
     
-    def _start_fiat_shamir_auth(self, client_id, msg_data):
-        """Start Fiat-Shamir authentication process"""
+    def _open_session(self, client_socket, address, port):
+        """Register a new client session and return its id"""
+        started = time.perf_counter()
+        client_id = f"{address[0]}:{address[1]}"
+        if client_id in self.client_sessions:
+            # Тот же адрес и порт клиента уже занят: соединение с другим портом
+            # сервера или ещё не закрытое старое соединение
+            client_id = f"{client_id}#{next(self._session_ids)}"
+        session = ClientSession(client_id, client_socket, address, port, LegacyCodec())
+        self.client_sessions.add(client_id, session)
+        self._socket_clients[client_socket] = client_id
+        self._set_stage(session, STAGE_IDLE)
+        self.metrics.connections.inc()
+        self.metrics.accept_latency.observe(time.perf_counter() - started)
+        
+        # Notify about connection if callback is set
+        if self.on_client_connected:
+            try:
+                self.on_client_connected(client_socket, address, port)
+            except Exception as e:
+                logger.error(f"Error in on_client_connected for client {client_id}: {e}")
+        return client_id
+    
+    def _close_session(self, client_id, client_socket=None):
+        """
+        Forget the session of a disconnected client
+        
+        With client_socket, only the session of that connection is removed:
+        a new connection from the same address and port (reused quickly on
+        loopback) may already own the client id.
+        """
+        session = self.client_sessions.get(client_id)
+        if session is None or (client_socket is not None and session.socket is not client_socket):
+            return
+        if self.client_sessions.discard(client_id, session):
+            self._timers.cancel(session.timer)
+            self._socket_clients.pop(session.socket, None)
+            if self.on_client_disconnected:
+                self.on_client_disconnected(client_id)
+    
+    def _set_stage(self, session, stage):
+        """Move a session to an auth stage and re-arm its deadline"""
+        session.auth_stage = stage
+        timeout = self.idle_timeout if stage == STAGE_IDLE else self.handshake_timeout
+        self._timers.cancel(session.timer)
+        session.timer = self._timers.schedule(session.client_id, timeout) if timeout else None
+    
+    def _expire_sessions(self):
+        """Timer thread: close connections whose current stage ran out of time"""
+        while self.running:
+            time.sleep(self._timers.tick)
+            for client_id in self._timers.advance():
+                session = self.client_sessions.get(client_id)
+                if session is None:
+                    continue
+                logger.warning(f"Session {client_id} timed out in auth stage {session.auth_stage}")
+                self.metrics.sessions_expired.inc()
+                if session.auth_stage != STAGE_IDLE:
+                    self.metrics.auth_failure.inc()
+                    self._send(session, "AUTH_FAILED")
+                self._close_session(client_id, session.socket)
+                self._disconnect(session.socket)
+    
+    def _disconnect(self, client_socket):
+        """Close a client connection so its handler exits"""
+        try:
+            if isinstance(client_socket, socket.socket):
+                # Прерывает блокирующий recv() в потоке клиента
+                client_socket.shutdown(socket.SHUT_RDWR)
+            client_socket.close()
+        except OSError:
+            pass
+    
+    def _process_data(self, client_id, data):
+        """Decode received bytes with the session codec and process each message"""
+        session = self.client_sessions.get(client_id)
+        if session is None:
+            raise ConnectionError(f"Session {client_id} has expired")
+        try:
+            messages = session.codec.feed(data)
+        except (ProtocolError, UnicodeDecodeError) as e:
+            raise ConnectionError(f"Protocol error from client {client_id}: {e}")
+        for message in messages:
+            self._process_message(client_id, message)
+    
+    def _process_message(self, client_id, message):
+        """
+        Process one message from a client.
+        
+        Shared by all engines: runs the authentication state machine and
+        falls back to the on_message_received callback.
+        """
+        session = self.client_sessions[client_id]
+        client_socket = session.socket
+        address = session.address
+        port = session.port
+        logger.debug("Received from %s on port %s: %s", address, port, message)
+        self.metrics.messages.inc()
+        
+        # После обмена ключами принимаются только сообщения защищённого канала
+        if session.channel is not None:
+            if not isinstance(message, SealedMessage):
+                raise ConnectionError(f"Plaintext message from client {client_id} on a secure channel")
+            try:
+                message = session.channel.open(message).decode('utf-8')
+            except (ChannelError, UnicodeDecodeError) as e:
+                raise ConnectionError(f"Secure channel error from client {client_id}: {e}")
+        elif isinstance(message, SealedMessage):
+            raise ConnectionError(f"Sealed message from client {client_id} without a secure channel")
+        
+        # Handle Fiat-Shamir authentication protocol messages
+        if session.auth_stage != STAGE_IDLE:
+            self._handle_auth_message(client_id, message)
+            return
+        
+        # Try to parse message as JSON
+        try:
+            msg_data = json.loads(message)
+            if msg_data.get("action") == "hello":
+                self._negotiate_wire(client_id, msg_data)
+                return
+            if msg_data.get("action") == "nonce_request":
+                self._send(session, json.dumps({"action": "nonce", "nonce": self._issue_nonce(session)}))
+                return
+            if msg_data.get("action") == "auth_request" and msg_data.get("protocol") in AUTH_PROTOCOLS:
+                started = time.perf_counter()
+                self.metrics.auth_requests.inc()
+                if msg_data["protocol"] == "fiat-shamir" and msg_data.get("mode") == "non-interactive":
+                    # Whole proof in one message
+                    self._verify_fiat_shamir_proof(client_id, msg_data, started)
+                else:
+                    # Initialize Fiat-Shamir / Guillou-Quisquater / Schnorr authentication
+                    self._start_interactive_auth(client_id, msg_data, started)
+                self.metrics.auth_request_latency.observe(time.perf_counter() - started)
+                return
+            if msg_data.get("action") == "resume":
+                self._resume_session(client_id, msg_data)
+                return
+            if msg_data.get("action") == "key_exchange":
+                self._exchange_keys(client_id, msg_data)
+                return
+        except (json.JSONDecodeError, TypeError, AttributeError):
+            pass  # Not JSON or not properly formatted
+        
+        # Process message if callback is set
+        if self.on_message_received:
+            response = self.on_message_received(message, client_socket, address, port)
+            if response:
+                self.send_to_client(client_socket, response)
+    
+    def _negotiate_wire(self, client_id, msg_data):
+        """Answer a client hello and switch the session to framing if agreed"""
+        session = self.client_sessions[client_id]
+        if session.codec.framed:
+            return
+        reply, version = hello_reply(msg_data.get("wire_versions"), nonce=self._issue_nonce(session))
+        # Ответ отправляется ещё в старом формате
+        self._send(session, reply)
+        if version is not None:
+            session.codec = FramedCodec()
+            logger.info(f"Client {client_id} switched to framed wire protocol v{version}")
+    
+    def _issue_nonce(self, session):
+        """Issue a fresh single-use nonce for non-interactive proofs"""
+        nonce = self._challenges.token(16)
+        session.nonce = nonce
+        return nonce.hex()
+    
+    def _verify_fiat_shamir_proof(self, client_id, msg_data, started=None):
+        """Verify a non-interactive Fiat-Shamir proof sent in a single auth_request"""
+        session = self.client_sessions[client_id]
+        # Nonce одноразовый: сбрасываем его до проверки
+        nonce, session.nonce = session.nonce, None
+        
+        is_verified = False
+        try:
+            commitments, responses = decode_proof(msg_data)
+            resolved = self._resolve_public_key(client_id, msg_data)
+            if (nonce is None or msg_data.get("nonce") != nonce.hex()
+                    or len(commitments) > NI_MAX_ROUNDS):
+                logger.error(f"Rejected non-interactive proof from client {client_id}: bad nonce or parameters")
+            elif resolved is not None:
+                public_key, n = resolved
+                is_verified = fiat_shamir_verify_noninteractive(
+                    commitments, responses, public_key, n, nonce, str(msg_data.get("context", ""))
+                )
+        except (ValueError, TypeError) as e:
+            logger.error(f"Malformed non-interactive proof from client {client_id}: {e}")
+        
+        ticket = None
+        if is_verified and msg_data.get("want_ticket"):
+            ticket = ("fiat-shamir", key_fingerprint(public_key, n, "fiat-shamir"))
+        self._finish_authentication(client_id, is_verified, started, ticket)
+    
+    def _exchange_keys(self, client_id, msg_data):
+        """
+        Establish a secure channel bound to a Guillou-Quisquater identity
+        
+        The request carries the client's key share A, a GQ signature (T, D)
+        over A and the session nonce, and the public key (or key_id) as in
+        an auth_request. A valid signature also authenticates the client.
+        The server answers AUTH_SUCCESS and its share B in plaintext; every
+        later message in either direction is sealed (protocols/channel.py).
+        """
+        started = time.perf_counter()
         session = self.client_sessions[client_id]
-        session["auth_stage"] = 1
-        session["auth_data"] = {
-            "public_key": msg_data.get("public_key"),
-            "n": msg_data.get("n")
+        self.metrics.auth_requests.inc()
+        # Nonce одноразовый: сбрасываем его до проверки
+        nonce, session.nonce = session.nonce, None
+        
+        established = None
+        try:
+            share, commitment, response = (int(msg_data[field]) for field in ("share", "commitment", "response"))
+            resolved = self._resolve_public_key(client_id, msg_data, "guillou-quisquater")
+            if not session.codec.framed or session.channel is not None:
+                logger.error(f"Rejected key exchange from client {client_id}: needs a framed connection without a channel")
+            elif nonce is None or msg_data.get("nonce") != nonce.hex():
+                logger.error(f"Rejected key exchange from client {client_id}: bad nonce")
+            elif resolved is not None:
+                (public_key, v), n = resolved
+                if verify_share(public_key, v, n, nonce, share, commitment, response):
+                    group = self.schnorr_group
+                    secret, server_share = generate_share(group)
+                    client_keys, server_keys = derive_channel_keys(
+                        shared_secret(group, secret, share), n, public_key, v, nonce,
+                        share, server_share, commitment, response
+                    )
+                    established = server_share, SecureChannel(server_keys, client_keys)
+        except (KeyError, ValueError, TypeError) as e:
+            logger.error(f"Malformed key exchange from client {client_id}: {e}")
+        
+        self._finish_authentication(client_id, established is not None, started)
+        if established is not None:
+            server_share, channel = established
+            self._send(session, json.dumps({"action": "key_exchange", "share": server_share}))
+            session.channel = channel
+            self.metrics.key_exchanges.inc()
+            logger.info(f"Secure channel established with client {client_id}")
+    
+    def _resolve_public_key(self, client_id, msg_data, protocol="fiat-shamir"):
+        """
+        Determine the public key and modulus for an auth_request
+        
+        The client either names an enrolled key by "key_id" or sends
+        "public_key"/"public_keys" and "n". With a key registry the values
+        used for verification always come from the registry entry.
+        A Guillou-Quisquater public key is the pair [J, v] ("public_key"
+        and "v" in the request). A Schnorr public key is y in the server's
+        group; "n" may be omitted and otherwise must equal p.
+        
+        Returns:
+            tuple: (public_key, n), or None if the request must be rejected
+        """
+        key_id = msg_data.get("key_id")
+        public_key = msg_data.get("public_keys", msg_data.get("public_key"))
+        n = msg_data.get("n")
+        if protocol == "guillou-quisquater" and key_id is None:
+            public_key = [public_key, msg_data.get("v", GQ_EXPONENT)]
+        elif protocol == "schnorr" and n is None:
+            n = self.schnorr_group.p
+        
+        if key_id is None:
+            keys = public_key if isinstance(public_key, list) else [public_key]
+            # n <= 1 ломает арифметику проверки (деление на ноль в derive_challenges)
+            if (not isinstance(n, int) or n <= 1 or not 1 <= len(keys) <= MAX_FFS_KEYS
+                    or not all(isinstance(v, int) and not isinstance(v, bool) for v in keys)):
+                logger.error(f"Invalid public key or modulus from client {client_id}")
+                return None
+        
+        if self.key_registry is None:
+            if key_id is not None:
+                logger.error(f"Client {client_id} sent a key_id but no key registry is configured")
+                return None
+            if protocol == "fiat-shamir":
+                return public_key, n
+            entry = RegisteredKey(None, protocol, public_key, n)
+        elif key_id is not None:
+            entry = self.key_registry.get(str(key_id))
+        else:
+            entry = self.key_registry.lookup(public_key, n, protocol)
+        
+        if entry is None:
+            if self.require_registered_keys or key_id is not None:
+                logger.error(f"Rejected unregistered public key from client {client_id}")
+                return None
+            entry = RegisteredKey(None, protocol, public_key, n)
+        
+        if entry.protocol != protocol or not entry.valid:
+            logger.error(f"Public key of client {client_id} failed validation")
+            return None
+        if protocol == "guillou-quisquater" and (
+                len(entry.public_key) != 2 or not _valid_gq_exponent(entry.public_key[1])):
+            logger.error(f"Invalid Guillou-Quisquater exponent from client {client_id}")
+            return None
+        if protocol == "schnorr" and (
+                entry.n != self.schnorr_group.p or not _valid_schnorr_key(entry.public_key, self.schnorr_group)):
+            logger.error(f"Schnorr public key of client {client_id} is not in the server group")
+            return None
+        return entry.public_key, entry.n
+    
+    def _start_interactive_auth(self, client_id, msg_data, started=None):
+        """
+        Start Fiat-Shamir, Guillou-Quisquater or Schnorr authentication process
+        
+        A Fiat-Shamir request with "public_keys" (list of v_1..v_k) and
+        "rounds" (t) selects the parallel Feige-Fiat-Shamir mode: every
+        round carries a k-bit challenge vector, giving 2^-kt soundness.
+        A Guillou-Quisquater round has a challenge d < v, so one round
+        already gives about 2^-log2(v) soundness, a Schnorr round with a
+        128-bit challenge c gives 2^-128.
+        """
+        session = self.client_sessions[client_id]
+        protocol = msg_data["protocol"]
+        rounds = msg_data.get("rounds", 1)
+        
+        resolved = self._resolve_public_key(client_id, msg_data, protocol)
+        if resolved is None:
+            self.metrics.auth_failure.inc()
+            self._send(session, "AUTH_FAILED")
+            return
+        public_key, n = resolved
+        if not isinstance(rounds, int) or not 1 <= rounds <= MAX_FFS_ROUNDS:
+            logger.error(f"Invalid number of rounds from client {client_id}: {rounds}")
+            self.metrics.auth_failure.inc()
+            self._send(session, "AUTH_FAILED")
+            return
+        
+        self._set_stage(session, STAGE_AWAIT_COMMITMENT)
+        session.auth_data = {
+            "protocol": protocol,
+            "public_key": public_key,
+            "n": n,
+            "rounds": rounds,
+            "round": 0,
+            "want_ticket": bool(msg_data.get("want_ticket")),
+            "started": started if started is not None else time.perf_counter()
         }
         
-        logger.info(f"Starting Fiat-Shamir authentication for client {client_id}")
-        # Waiting for client to send 'x' value
+        logger.info(f"Starting {protocol} authentication for client {client_id}")
+        # Waiting for client to send 'x' (or T) value
 
     def _handle_auth_message(self, client_id, message):
         """Handle authentication protocol messages"""
         session = self.client_sessions[client_id]
         
-        if session["auth_stage"] == 1:
+        if session.auth_stage == STAGE_AWAIT_COMMITMENT:
             # Received x from client, send challenge e
+            received = time.perf_counter()
             try:
                 x = int(message)
-                session["auth_data"]["x"] = x
-                session["auth_stage"] = 2
+                session.auth_data["x"] = x
+                self._set_stage(session, STAGE_AWAIT_RESPONSE)
                 
-                # Generate random challenge (0 or 1 for basic Fiat-Shamir)
-                e = random.randint(0, 1)
-                session["auth_data"]["e"] = e
+                # Generate random challenge (0 or 1 for basic Fiat-Shamir,
+                # k-bit vector as a bit mask for Feige-Fiat-Shamir,
+                # d < v for Guillou-Quisquater, 128-bit c for Schnorr)
+                public_key = session.auth_data["public_key"]
+                protocol = session.auth_data["protocol"]
+                if protocol == "guillou-quisquater":
+                    e = self._challenges.bits(gq_challenge_bits(public_key[1]))
+                elif protocol == "schnorr":
+                    e = self._challenges.bits(SCHNORR_CHALLENGE_BITS)
+                elif isinstance(public_key, list):
+                    e = self._challenges.bits(len(public_key))
+                else:
+                    e = self._challenges.bit()
+                session.auth_data["e"] = e
                 
                 # Send challenge to client
-                self.send_to_client(session["socket"], str(e))
-                logger.info(f"Sent challenge e={e} to client {client_id}")
-            except ValueError:
+                self._send(session, e)
+                self.metrics.challenge_latency.observe(time.perf_counter() - received)
+                logger.debug("Sent challenge e=%s to client %s", e, client_id)
+            except (ValueError, TypeError):
                 logger.error(f"Invalid x value from client {client_id}: {message}")
-                session["auth_stage"] = 0
+                self._set_stage(session, STAGE_IDLE)
                 
-        elif session["auth_stage"] == 2:
+        elif session.auth_stage == STAGE_AWAIT_RESPONSE:
             # Received y from client, verify proof
             try:
                 y = int(message)
-                auth_data = session["auth_data"]
-                
-                # Verify using Fiat-Shamir verification function
-                is_verified = fiat_shamir_verify(
+                auth_data = session.auth_data
+                auth_data["y_received"] = time.perf_counter()
+                transcript = (
                     auth_data["x"], 
                     y, 
                     auth_data["public_key"], 
                     auth_data["n"], 
                     auth_data["e"]
                 )
-                
-                # Send verification result to client
-                result = "AUTH_SUCCESS" if is_verified else "AUTH_FAILED"
-                self.send_to_client(session["socket"], result)
-                
-                # Update session state
-                session["authenticated"] = is_verified
-                session["auth_stage"] = 0
-                
-                logger.info(f"Authentication {result} for client {client_id}")
-                
-                # Notify any listeners
-                if self.on_auth_result:
-                    self.on_auth_result(client_id, is_verified)
-                    
-            except ValueError:
+            except (ValueError, TypeError):
                 logger.error(f"Invalid y value from client {client_id}: {message}")
-                session["auth_stage"] = 0
-                self.send_to_client(session["socket"], "AUTH_FAILED")
+                self._set_stage(session, STAGE_IDLE)
+                self.metrics.auth_failure.inc()
+                self._send(session, "AUTH_FAILED")
+                return
+            
+            protocol = auth_data["protocol"]
+            if protocol == "guillou-quisquater":
+                # D^v * J^d ≡ T (mod n)
+                x, y, (j, v), n, d = transcript
+                self._complete_auth_round(client_id, gq_verify(x, y, j, v, n, d))
+                return
+            if protocol == "schnorr":
+                # g^s ≡ t * y^c (mod p), p задано группой сервера
+                t, s, public_key, _, c = transcript
+                transcript = (t, s, public_key, c)
+            
+            verifier = self._batch_verifiers.get(protocol)
+            if verifier:
+                # Проверка отложена до конца окна пакетной проверки
+                self._set_stage(session, STAGE_VERIFYING)
+                verifier.submit(
+                    transcript,
+                    lambda is_verified: self._complete_auth_round(client_id, is_verified)
+                )
+                return
+            
+            if protocol == "schnorr":
+                self._complete_auth_round(client_id, schnorr_verify(*transcript, self.schnorr_group))
+                return
+            # Verify using Fiat-Shamir verification function
+            self._complete_auth_round(client_id, fiat_shamir_verify(*transcript))
+        
+        elif session.auth_stage == STAGE_VERIFYING:
+            # Клиент не ждёт результата раунда и уже прислал следующее x:
+            # оно обрабатывается после проверки текущего раунда
+            with self._verify_lock:
+                if session.auth_stage == STAGE_VERIFYING:
+                    session.auth_data.setdefault("queued", []).append(message)
+                    return
+            self._handle_auth_message(client_id, message)
+    
+    def _complete_auth_round(self, client_id, is_verified):
+        """Advance to the next round or report the result of a verified round"""
+        session = self.client_sessions.get(client_id)
+        if session is None:
+            return  # Client disconnected while waiting for the batch
+        auth_data = session.auth_data
+        self.metrics.verify_latency.observe(time.perf_counter() - auth_data["y_received"])
+        
+        auth_data["round"] += 1
+        if is_verified and auth_data["round"] < auth_data["rounds"]:
+            # Раунд пройден, ждём следующее x
+            with self._verify_lock:
+                self._set_stage(session, STAGE_AWAIT_COMMITMENT)
+                queued = auth_data.pop("queued", [])
+            for message in queued:
+                self._handle_auth_message(client_id, message)
+            return
+        
+        ticket = None
+        if is_verified and auth_data["want_ticket"]:
+            protocol = auth_data["protocol"]
+            ticket = (protocol, key_fingerprint(auth_data["public_key"], auth_data["n"], protocol))
+        self._finish_authentication(client_id, is_verified, auth_data["started"], ticket)
+    
+    def _resume_session(self, client_id, msg_data):
+        """
+        Authenticate a reconnecting client by a resumption ticket
+        
+        The ticket is checked statelessly (signature and expiry). With a
+        key registry the key must still be enrolled, so revoking a key also
+        invalidates its outstanding tickets. "want_ticket" renews the
+        ticket, but not past the ticket max_age from the original proof.
+        """
+        started = time.perf_counter()
+        self.metrics.resume_requests.inc()
+        claims = self.tickets.verify(msg_data.get("ticket"))
+        if claims is None:
+            logger.warning(f"Rejected invalid or expired ticket from client {client_id}")
+        elif self.key_registry is not None:
+            entry = self.key_registry.get(claims["fp"])
+            if entry is None and self.require_registered_keys:
+                logger.warning(f"Rejected ticket of a revoked key from client {client_id}")
+                claims = None
+            elif entry is not None and (entry.protocol != claims.get("proto") or not entry.valid):
+                claims = None
+        
+        ticket = None
+        if claims is not None and msg_data.get("want_ticket"):
+            ticket = (claims.get("proto"), claims["fp"], claims["auth"])
+        self._finish_authentication(client_id, claims is not None, started, ticket)
+    
+    def _finish_authentication(self, client_id, is_verified, started=None, ticket=None):
+        """
+        Send the authentication result and update the session
+        
+        ticket: (protocol, key fingerprint[, time of the original proof]) -
+            issue a resumption ticket right after AUTH_SUCCESS. Framed
+            connections only: on the legacy text wire the two messages could
+            arrive merged in one read
+        """
+        session = self.client_sessions[client_id]
+        metrics = self.metrics
+        (metrics.auth_success if is_verified else metrics.auth_failure).inc()
+        
+        # Update session state before the client can see the result
+        session.authenticated = is_verified
+        self._set_stage(session, STAGE_IDLE)
+        
+        # Send verification result to client
+        result = "AUTH_SUCCESS" if is_verified else "AUTH_FAILED"
+        sending = time.perf_counter()
+        self._send(session, result)
+        if is_verified and ticket is not None and session.codec.framed:
+            self._send(session, json.dumps({"action": "ticket", **self.tickets.issue(*ticket)}))
+        finished = time.perf_counter()
+        metrics.result_send_latency.observe(finished - sending)
+        if started is not None:
+            metrics.handshake_latency.observe(finished - started)
+        
+        logger.info(f"Authentication {result} for client {client_id}")
+        
+        # Notify any listeners
+        if self.on_auth_result:
+            self.on_auth_result(client_id, is_verified)
     
     def stop(self):
         """Stop the server and all client handlers"""
         self.running = False
         
+        if self._async_engine:
+            self._async_engine.stop()
+            self._async_engine = None
+        
+        for verifier in self._batch_verifiers.values():
+            verifier.stop()
+        self._batch_verifiers = {}
+        
+        if self._metrics_server:
+            self._metrics_server.stop()
+            self._metrics_server = None
+        
         # Close all server sockets
         for server in self.servers[:]:
             try:
@@ -225,17 +802,51 @@ class ZKPServer:
         self.client_handlers.clear()
         logger.info("Server stopped")
     
+    def _send(self, session, message, width=None):
+        """Send message to a session using its wire codec (sealed on a secure channel)"""
+        try:
+            channel = session.channel
+            if channel is None:
+                session.socket.sendall(session.codec.encode(message, width))
+                return True
+            text = json.dumps(list(message)) if isinstance(message, (list, tuple)) else str(message)
+            # Кадр собирается в буфере канала: отправить до следующего seal()
+            with channel.lock:
+                session.socket.sendall(channel.seal(text.encode('utf-8')))
+            return True
+        except Exception as e:
+            logger.error(f"Error sending message to client: {e}")
+            return False
+    
+    def client_id_for(self, client_socket):
+        """
+        Id of the session on a client socket, or None once it is closed
+        
+        The id is "ip:port", or "ip:port#n" if that was already taken;
+        on_auth_result and on_client_disconnected report the same id.
+        """
+        return self._socket_clients.get(client_socket)
+    
     def send_to_client(self, client_socket, message):
         """Send message to a specific client"""
+        client_id = self._socket_clients.get(client_socket)
+        session = self.client_sessions.get(client_id) if client_id else None
+        if session:
+            return self._send(session, message)
         try:
-            client_socket.send(message.encode('utf-8'))
+            client_socket.sendall(LegacyCodec().encode(message))
             return True
         except Exception as e:
             logger.error(f"Error sending message to client: {e}")
             return False
         
+    def metrics_snapshot(self):
+        """Current values of all server metrics (histograms as dicts)"""
+        return self.metrics.snapshot()
+    
     def get_client_auth_status(self, client_id):
         """Get authentication status for a client"""
-        if client_id in self.client_sessions:
-            return self.client_sessions[client_id].get("authenticated", False)
+        session = self.client_sessions.get(client_id)
+        if session:
+            return session.authenticated
         return False
\ No newline at end of file
@@ -1,22 +1,32 @@
-def fiat_shamir_verify(client_x, client_y, public_key, n, e):
+from protocols.transcript import NI_SECURITY_BITS, derive_challenges
+# Проверка одного раунда общая с клиентом, здесь только серверные обёртки
+from fiatshamir.authentication import _product_of_powers, fiat_shamir_verify
+
+def fiat_shamir_verify_noninteractive(commitments, responses, public_key, n, nonce, context,
+                                     min_security_bits=NI_SECURITY_BITS):
     """
-    Проверка доказательства для протокола Фиата-Шамира со стороны сервера
+    Проверка неинтерактивного доказательства Фиата-Шамира
     
     Args:
-        client_x (int): Значение x, полученное от клиента (x = r² mod n)
-        client_y (int): Значение y, полученное от клиента (y = r * s^e mod n)
-        public_key (int): Публичный ключ клиента v (v = s² mod n)
+        commitments (list): Значения x_1..x_t
+        responses (list): Значения y_1..y_t
+        public_key (int or list): Публичный ключ v или вектор v_1..v_k
         n (int): Модуль n
-        e (int): Случайный бит, отправленный клиенту (0 или 1)
+        nonce (bytes): Одноразовое значение, выданное этому клиенту
+        context (str): Контекст, к которому привязано доказательство
+        min_security_bits (int): Минимально допустимое k*t
         
     Returns:
-        bool: True если проверка успешна, иначе False
+        bool: True если все t раундов проходят проверку
     """
-    # Вычисляем левую часть: y² mod n
-    left = pow(client_y, 2, n)
+    keys = public_key if isinstance(public_key, (list, tuple)) else [public_key]
+    if not commitments or len(commitments) != len(responses):
+        return False
+    if len(keys) * len(commitments) < min_security_bits:
+        return False
     
-    # Вычисляем правую часть: x * v^e mod n
-    right = (client_x * pow(public_key, e, n)) % n
-    
-    # Проверяем равенство: y² ≡ x * v^e (mod n)
-    return left == right
\ No newline at end of file
+    challenges = derive_challenges(n, keys, commitments, nonce, context, len(keys))
+    return all(
+        fiat_shamir_verify(x, y, keys, n, e)
+        for x, y, e in zip(commitments, responses, challenges)
+    )
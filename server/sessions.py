@@ -0,0 +1,171 @@
+"""
+Client session state for ZKPServer.
+
+* ClientSession - compact per-connection state (__slots__, no per-instance dict)
+* SessionTable  - sharded session map: writes lock one shard, reads take no lock
+* TimingWheel   - hashed timing wheel that expires stale handshakes in O(1) per tick
+"""
+
+import threading
+import time
+
+# auth_stage values
+STAGE_IDLE = 0           # no handshake in progress
+STAGE_AWAIT_COMMITMENT = 1  # waiting for x
+STAGE_AWAIT_RESPONSE = 2    # challenge sent, waiting for y
+STAGE_VERIFYING = 3         # y queued for batch verification
+
+
+class ClientSession:
+    """State of one connected client"""
+
+    __slots__ = (
+        'client_id', 'socket', 'address', 'port', 'authenticated',
+        'auth_stage', 'auth_data', 'codec', 'nonce', 'timer', 'channel', '__weakref__'
+    )
+
+    def __init__(self, client_id, client_socket, address, port, codec):
+        self.client_id = client_id
+        self.socket = client_socket
+        self.address = address
+        self.port = port
+        self.authenticated = False
+        self.auth_stage = STAGE_IDLE
+        self.auth_data = {}
+        self.codec = codec
+        self.nonce = None
+        self.timer = None
+        self.channel = None  # SecureChannel после обмена ключами
+
+
+class SessionTable:
+    """
+    Session map split into shards.
+
+    Each shard has its own lock for inserts and deletes, so connection
+    threads rarely contend. Lookups read the shard dict without locking,
+    which is safe because single dict operations are atomic in CPython.
+    """
+
+    def __init__(self, shards: int = 16):
+        self._shards = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def _index(self, key):
+        return hash(key) % len(self._shards)
+
+    def add(self, key, session):
+        index = self._index(key)
+        with self._locks[index]:
+            self._shards[index][key] = session
+
+    def pop(self, key, default=None):
+        index = self._index(key)
+        with self._locks[index]:
+            return self._shards[index].pop(key, default)
+
+    def discard(self, key, session):
+        """Remove key only if it still maps to session; returns True if removed"""
+        index = self._index(key)
+        with self._locks[index]:
+            if self._shards[index].get(key) is session:
+                del self._shards[index][key]
+                return True
+            return False
+
+    def get(self, key, default=None):
+        return self._shards[self._index(key)].get(key, default)
+
+    def __getitem__(self, key):
+        return self._shards[self._index(key)][key]
+
+    def __contains__(self, key):
+        return key in self._shards[self._index(key)]
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
+
+    def values(self):
+        """Snapshot of all sessions"""
+        result = []
+        for shard in self._shards:
+            result.extend(list(shard.values()))
+        return result
+
+    def keys(self):
+        result = []
+        for shard in self._shards:
+            result.extend(list(shard.keys()))
+        return result
+
+
+class _Timer:
+    __slots__ = ('key', 'rounds', 'slot')
+
+    def __init__(self, key, rounds, slot):
+        self.key = key
+        self.rounds = rounds
+        self.slot = slot
+
+
+class TimingWheel:
+    """
+    Hashed timing wheel.
+
+    schedule() and cancel() are O(1); each tick only visits the timers in
+    the current slot. Delays longer than one revolution are kept with a
+    remaining-rounds counter.
+    """
+
+    def __init__(self, tick: float = 0.5, slots: int = 512):
+        """
+        Args:
+            tick: Seconds per slot (expiry resolution)
+            slots: Number of slots in the wheel
+        """
+        self.tick = tick
+        self._slots = [set() for _ in range(slots)]
+        self._current = 0
+        self._lock = threading.Lock()
+        self._last_tick = time.monotonic()
+
+    def schedule(self, key, delay):
+        """Schedule key to expire after delay seconds; returns a handle for cancel()"""
+        ticks = max(1, int(-(-delay // self.tick)))
+        size = len(self._slots)
+        with self._lock:
+            slot = (self._current + ticks) % size
+            timer = _Timer(key, (ticks - 1) // size, slot)
+            self._slots[slot].add(timer)
+        return timer
+
+    def cancel(self, timer):
+        if timer is None:
+            return
+        with self._lock:
+            self._slots[timer.slot].discard(timer)
+
+    def advance(self, now=None):
+        """
+        Move the wheel forward to `now`.
+
+        Returns:
+            list: Keys of the timers that expired
+        """
+        now = time.monotonic() if now is None else now
+        expired = []
+        with self._lock:
+            while now - self._last_tick >= self.tick:
+                self._last_tick += self.tick
+                self._current = (self._current + 1) % len(self._slots)
+                bucket = self._slots[self._current]
+                for timer in list(bucket):
+                    if timer.rounds:
+                        timer.rounds -= 1
+                    else:
+                        bucket.discard(timer)
+                        expired.append(timer.key)
+        return expired
+
+    def __len__(self):
+        return sum(len(slot) for slot in self._slots)
@@ -0,0 +1,121 @@
+"""
+Session resumption tickets.
+
+After a successful handshake the server can hand the client a ticket:
+an HMAC-SHA256-signed record of the authenticated public key (its
+registry fingerprint) and an expiry time. A client that reconnects sends
+the ticket in one "resume" message instead of redoing the proof. Nothing
+is stored on the server: any worker that knows the ticket key can check
+a ticket, so all workers of a prefork pool (or of several hosts) must
+share the key.
+
+A ticket is a bearer credential until it expires, so lifetimes are
+short; renewing a ticket never extends it past max_age from the original
+proof.
+"""
+
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+
+TICKET_VERSION = 1
+DEFAULT_TICKET_LIFETIME = 900.0
+DEFAULT_TICKET_MAX_AGE = 86400.0
+# Общий ключ билетов для нескольких процессов/хостов, hex
+TICKET_KEY_ENV = 'ZKP_TICKET_KEY'
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class TicketIssuer:
+    """Issues and checks resumption tickets with a shared secret key"""
+
+    def __init__(self, key: bytes = None, lifetime: float = DEFAULT_TICKET_LIFETIME,
+                 max_age: float = DEFAULT_TICKET_MAX_AGE, previous_keys=()):
+        """
+        Args:
+            key: Secret signing key (default: $ZKP_TICKET_KEY, otherwise a
+                random key valid only in this process)
+            lifetime: Seconds a ticket stays valid
+            max_age: Seconds after the original proof after which a ticket
+                is no longer renewed
+            previous_keys: Old keys still accepted for verification (key rotation)
+        """
+        if key is None:
+            env_key = os.environ.get(TICKET_KEY_ENV)
+            key = bytes.fromhex(env_key) if env_key else os.urandom(32)
+        if len(key) < 16:
+            raise ValueError("Ticket key must be at least 16 bytes")
+        self.lifetime = lifetime
+        self.max_age = max_age
+        self._key = key
+        # Короткий идентификатор ключа в билете: проверка без перебора ключей
+        self._keys = {self._key_id(k): k for k in (key, *previous_keys)}
+
+    @staticmethod
+    def _key_id(key):
+        return hashlib.sha256(b'zkp-ticket-key\0' + key).hexdigest()[:8]
+
+    def _sign(self, key, payload):
+        return hmac.new(key, payload, hashlib.sha256).digest()
+
+    def issue(self, protocol, fingerprint, authenticated_at=None):
+        """
+        Issue a ticket for an authenticated public key
+
+        Args:
+            protocol (str): Protocol of the proof
+            fingerprint (str): key_fingerprint() of the proven public key
+            authenticated_at (float): Time of the original proof (for renewals)
+
+        Returns:
+            dict: {"ticket": str, "expires": unix time}
+        """
+        now = time.time()
+        authenticated_at = now if authenticated_at is None else authenticated_at
+        expires = min(now + self.lifetime, authenticated_at + self.max_age)
+        claims = {
+            "v": TICKET_VERSION,
+            "kid": self._key_id(self._key),
+            "fp": fingerprint,
+            "proto": protocol,
+            "auth": int(authenticated_at),
+            "exp": int(expires),
+        }
+        payload = json.dumps(claims, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        ticket = f"{_b64encode(payload)}.{_b64encode(self._sign(self._key, payload))}"
+        return {"ticket": ticket, "expires": claims["exp"]}
+
+    def verify(self, ticket):
+        """
+        Check a ticket's signature and expiry
+
+        Returns:
+            dict: Claims ("fp" - key fingerprint, "proto", "auth", "exp"),
+            or None if the ticket is invalid or expired
+        """
+        try:
+            payload_text, signature_text = ticket.split('.')
+            payload = _b64decode(payload_text)
+            signature = _b64decode(signature_text)
+            claims = json.loads(payload)
+            key = self._keys.get(claims.get("kid"))
+        except (AttributeError, ValueError, TypeError, UnicodeDecodeError):
+            return None
+        if key is None or not hmac.compare_digest(signature, self._sign(key, payload)):
+            return None
+        if (claims.get("v") != TICKET_VERSION or not isinstance(claims.get("fp"), str)
+                or not isinstance(claims.get("exp"), int) or not isinstance(claims.get("auth"), int)):
+            return None
+        if claims["exp"] <= time.time():
+            return None
+        return claims
@@ -0,0 +1,352 @@
+"""
+Tk helpers for a GUI fed by server threads.
+
+Tk may only be touched from the thread running mainloop(). Server
+callbacks therefore do not call root.after() per event: they post to a
+UIEventQueue, and the Tk loop drains it on a fixed tick. Updates to the
+same row between two ticks are merged into one, so the cost per tick
+depends on the number of changed rows, not on the event rate.
+
+VirtualTable shows a large table through a Treeview that only holds the
+rows currently visible; scrolling re-fills those rows from the model.
+LogView keeps the last lines of the log in a ring buffer of fixed size.
+"""
+
+import time
+import logging
+import threading
+import tkinter as tk
+from tkinter import ttk
+from collections import deque, namedtuple
+from logging.handlers import RotatingFileHandler
+
+# Пометка удаления строки в объединённом обновлении
+REMOVED = object()
+
+
+class UIEventQueue:
+    """
+    Thread-safe queue of GUI updates with per-key coalescing
+
+    update(key, **fields) from any thread merges fields into the pending
+    change of that row; remove(key) replaces it. Log records are kept in a
+    bounded deque: under a flood the oldest ones are dropped and counted.
+    """
+
+    def __init__(self, max_log_lines=1000):
+        self._lock = threading.Lock()
+        self._rows = {}  # key -> dict of changed fields (insertion order = arrival order)
+        self._log = deque(maxlen=max_log_lines)
+        self._dropped = 0
+
+    def update(self, key, **fields):
+        with self._lock:
+            change = self._rows.get(key)
+            if change is None:
+                self._rows[key] = fields
+            else:
+                change.update(fields)
+
+    def remove(self, key):
+        with self._lock:
+            self._rows.pop(key, None)
+            # Строка, добавленная и удалённая за один тик, не доходит до таблицы
+            self._rows[key] = {REMOVED: True}
+
+    def log(self, record):
+        with self._lock:
+            if len(self._log) == self._log.maxlen:
+                self._dropped += 1
+            self._log.append(record)
+
+    def drain(self):
+        """
+        Take all pending events
+
+        Returns:
+            tuple: (rows, log_records, dropped) - {key: fields} with REMOVED
+            set for removed rows, new log records, number of records dropped
+        """
+        with self._lock:
+            rows, self._rows = self._rows, {}
+            lines = list(self._log)
+            self._log.clear()
+            dropped, self._dropped = self._dropped, 0
+        return rows, lines, dropped
+
+
+class VirtualTable(ttk.Frame):
+    """
+    Table of any size that renders only the visible rows
+
+    The model is a dict key -> tuple of column values in insertion order.
+    The Treeview holds one item per visible line ("row0", "row1", ...);
+    rendering copies the window [offset, offset + visible) of the model
+    into them and skips items whose values did not change.
+    """
+
+    def __init__(self, parent, columns, headings, widths, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.columns = columns
+        self._rows = {}  # key -> values
+        self._keys = []  # display order
+        self._index = {}  # key -> position in _keys
+        self._stale = False  # _keys contains removed keys
+        self._offset = 0
+        self._visible = 0
+        self._shown = []  # values currently in each Treeview item
+        self._selected_key = None
+        self._render_pending = False
+
+        self.tree = ttk.Treeview(self, columns=columns, show='headings', selectmode='browse', height=1)
+        for column, heading, width in zip(columns, headings, widths):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+        self._row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll(-event.delta // 120 * 3))
+        self.tree.bind('<Button-4>', lambda event: self.scroll(-3))  # X11
+        self.tree.bind('<Button-5>', lambda event: self.scroll(3))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    # Модель
+
+    def set_row(self, key, values):
+        """Insert a row at the end or replace its values"""
+        if key not in self._rows:
+            if self._stale and key in self._index:
+                self._compact()  # Ключ удалён и добавлен снова до перерисовки
+            self._index[key] = len(self._keys)
+            self._keys.append(key)
+        self._rows[key] = tuple(values)
+        self._schedule_render()
+
+    def delete_row(self, key):
+        if self._rows.pop(key, None) is not None:
+            self._stale = True
+            if key == self._selected_key:
+                self._selected_key = None
+            self._schedule_render()
+
+    def clear(self):
+        self._rows.clear()
+        self._keys.clear()
+        self._index.clear()
+        self._stale = False
+        self._selected_key = None
+        self._schedule_render()
+
+    def get_row(self, key):
+        return self._rows.get(key)
+
+    def selection(self):
+        """Selected row keys, like Treeview.selection()"""
+        return (self._selected_key,) if self._selected_key in self._rows else ()
+
+    def _compact(self):
+        """Drop removed keys from the display order (once per render)"""
+        self._keys = [key for key in self._keys if key in self._rows]
+        self._index = {key: i for i, key in enumerate(self._keys)}
+        self._stale = False
+
+    # Отрисовка
+
+    def _schedule_render(self):
+        # Сколько бы изменений ни пришло за тик, перерисовка одна
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self.render)
+
+    def render(self):
+        self._render_pending = False
+        if self._stale:
+            self._compact()
+        total = len(self._keys)
+        self._offset = max(0, min(self._offset, total - self._visible))
+
+        window = self._keys[self._offset:self._offset + self._visible]
+        if self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        for i in range(self._visible):
+            iid = f"row{i}"
+            values = self._rows[window[i]] if i < len(window) else ()
+            if self._shown[i] != values:
+                self.tree.item(iid, values=values)
+                self._shown[i] = values
+            if i < len(window) and window[i] == self._selected_key:
+                self.tree.selection_add(iid)
+
+        if total:
+            self.scrollbar.set(self._offset / total, min(1.0, (self._offset + self._visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_resize(self, event):
+        visible = max(1, event.height // self._row_height - 1)  # минус строка заголовков
+        if visible == self._visible:
+            return
+        for i in range(self._visible, visible):
+            self.tree.insert('', tk.END, iid=f"row{i}", values=())
+            self._shown.append(())
+        for i in range(visible, self._visible):
+            self.tree.delete(f"row{i}")
+        del self._shown[visible:]
+        self._visible = visible
+        self._schedule_render()
+
+    def _on_select(self, event):
+        selected = self.tree.selection()
+        if not selected:
+            return
+        position = self._offset + int(selected[0][3:])
+        if position < len(self._keys) and self._keys[position] in self._rows:
+            self._selected_key = self._keys[position]
+
+    # Прокрутка
+
+    def scroll(self, lines):
+        self._offset = max(0, self._offset + lines)
+        self._schedule_render()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == tk.MOVETO:
+            self._offset = int(float(amount) * len(self._keys))
+        elif unit == tk.PAGES:
+            self._offset += int(amount) * max(1, self._visible - 1)
+        else:
+            self._offset += int(amount)
+        self._offset = max(0, self._offset)
+        self._schedule_render()
+
+
+LogRecord = namedtuple('LogRecord', 'time level client message')
+
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+
+
+def make_log_record(message, level='INFO', client=None):
+    return LogRecord(time.strftime('%H:%M:%S'), level, client, message)
+
+
+class LogView(ttk.Frame):
+    """
+    Log panel backed by a ring buffer of the last `capacity` records
+
+    New records are collected and inserted into the Text widget in one
+    call at most every flush_ms. The widget never holds more than
+    `capacity` lines: the oldest are cut after each insert. Changing the
+    level or client filter redraws the widget from the buffer. With
+    spill_path every record is also written to a rotating log file.
+    """
+
+    def __init__(self, parent, capacity=5000, flush_ms=250, spill_path=None,
+                 spill_max_bytes=10 * 1024 * 1024, spill_backups=3, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.capacity = capacity
+        self.flush_ms = flush_ms
+        self._buffer = deque(maxlen=capacity)
+        self._pending = []
+        self._flush_scheduled = False
+
+        self._spill = None
+        if spill_path:
+            self._spill = RotatingFileHandler(spill_path, maxBytes=spill_max_bytes,
+                                              backupCount=spill_backups, encoding='utf-8')
+            self._spill.setFormatter(logging.Formatter('%(message)s'))
+
+        filters = ttk.Frame(self)
+        filters.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(filters, text="Level:").pack(side=tk.LEFT)
+        self.level = tk.StringVar(value='INFO')
+        level_box = ttk.Combobox(filters, textvariable=self.level, values=LOG_LEVELS,
+                                 state='readonly', width=9)
+        level_box.pack(side=tk.LEFT, padx=5)
+        level_box.bind('<<ComboboxSelected>>', lambda event: self.redraw())
+        ttk.Label(filters, text="Client:").pack(side=tk.LEFT)
+        self.client = tk.StringVar()
+        client_entry = ttk.Entry(filters, textvariable=self.client, width=20)
+        client_entry.pack(side=tk.LEFT, padx=5)
+        client_entry.bind('<Return>', lambda event: self.redraw())
+
+        scroll = ttk.Scrollbar(self)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text = tk.Text(self, height=8, yscrollcommand=scroll.set)
+        self.text.pack(fill=tk.BOTH, expand=True)
+        scroll.config(command=self.text.yview)
+        self.text.tag_configure('WARNING', foreground='#b36b00')
+        self.text.tag_configure('ERROR', foreground='#c00000')
+
+    def append(self, records):
+        """Add records (from the Tk thread); they appear on the next flush"""
+        self._buffer.extend(records)
+        self._pending.extend(records)
+        # Не даём очереди на вставку расти больше буфера
+        del self._pending[:-self.capacity]
+        if self._spill is not None:
+            for record in records:
+                self._spill.emit(logging.makeLogRecord({'msg': self._format(record).rstrip('\n')}))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.after(self.flush_ms, self._flush)
+
+    def _matcher(self):
+        min_level = LOG_LEVELS.index(self.level.get()) if self.level.get() in LOG_LEVELS else 0
+        client = self.client.get().strip()
+
+        def matches(record):
+            if record.level in LOG_LEVELS and LOG_LEVELS.index(record.level) < min_level:
+                return False
+            return not client or (record.client is not None and client in record.client)
+        return matches
+
+    @staticmethod
+    def _format(record):
+        level = '' if record.level == 'INFO' else f"[{record.level}] "
+        return f"{record.time} - {level}{record.message}\n"
+
+    def _insert(self, records):
+        """One Text.insert() for all records, then cut the widget to capacity"""
+        chunks = []
+        for record in records:
+            chunks.extend((self._format(record), record.level))
+        if not chunks:
+            return
+        # Прокручиваем вниз, только если пользователь и так смотрел в конец
+        follow = self.text.yview()[1] >= 1.0
+        self.text.insert(tk.END, *chunks)
+        # Считаем строки самого виджета: запись с \n в сообщении занимает
+        # несколько строк. Текст кончается на \n, поэтому end-1c стоит в
+        # начале пустой строки после последней записи
+        lines = int(self.text.index('end-1c').split('.')[0]) - 1
+        excess = lines - self.capacity
+        if excess > 0:
+            self.text.delete('1.0', f'{excess + 1}.0')
+        if follow:
+            self.text.see(tk.END)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, []
+        matches = self._matcher()
+        self._insert([record for record in pending if matches(record)])
+
+    def redraw(self):
+        """Re-apply the filters to the whole buffer"""
+        self._pending = []
+        self.text.delete('1.0', tk.END)
+        matches = self._matcher()
+        self._insert([record for record in self._buffer if matches(record)])
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
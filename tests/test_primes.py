@@ -0,0 +1,39 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from protocols.primes import generate_blum_modulus, is_probable_prime, SMALL_PRIMES
+
+# Наименьший допустимый размер модуля: половины меньше SMALL_PRIMES[-1]
+MIN_MODULUS_BITS = 16
+
+
+class BlumModulusTest(unittest.TestCase):
+    def check_modulus(self, bits, n, p, q):
+        self.assertEqual(n, p * q)
+        self.assertEqual(n.bit_length(), bits)
+        self.assertNotEqual(p, q)
+        for prime in (p, q):
+            self.assertEqual(prime % 4, 3)
+            self.assertTrue(is_probable_prime(prime))
+
+    def test_smallest_size(self):
+        # Кандидаты этого размера сами входят в SMALL_PRIMES
+        self.assertLess(MIN_MODULUS_BITS // 2, SMALL_PRIMES[-1].bit_length())
+        for _ in range(20):
+            self.check_modulus(MIN_MODULUS_BITS, *generate_blum_modulus(MIN_MODULUS_BITS, workers=1))
+
+    def test_small_sizes(self):
+        for bits in range(MIN_MODULUS_BITS, 32, 2):
+            self.check_modulus(bits, *generate_blum_modulus(bits, workers=1))
+
+    def test_rejects_invalid_sizes(self):
+        for bits in (MIN_MODULUS_BITS - 2, 17):
+            with self.assertRaises(ValueError):
+                generate_blum_modulus(bits, workers=1)
+
+
+if __name__ == "__main__":
+    unittest.main()